@@ -0,0 +1,311 @@
+# advisor.py
+# Порадник індексів і контроль регресій планів. Звіти та CRUD-запити проганяються через
+# EXPLAIN (ANALYZE, VERBOSE, BUFFERS, FORMAT JSON) у транзакції з відкатом; Seq Scan і Sort
+# на великих таблицях дають пропозиції індексів, які за наявності hypopg перевіряються
+# гіпотетичними індексами. Відбитки форми планів зберігаються між запусками.
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import sql
+
+from config import ADVISOR, BROWSE
+from queries import INDEX_COLUMNS_QUERY, REPORT_QUERIES, TABLE_ROWS_QUERY
+
+# (назва, запит, параметри)
+Statement = Tuple[str, sql.Composable, Dict[str, Any]]
+
+_WINDOW = "sp.supply_date >= now() - make_interval(days => %(days)s)"
+_REPORT_WINDOWS = {
+    "supplier_totals": "AND " + _WINDOW,
+    "products_below_min_stock": "",
+    "category_supply_costs": "WHERE " + _WINDOW,
+    "top_products_by_supply_volume": "WHERE " + _WINDOW,
+    "last_month_supplies": "",
+}
+
+_COLUMN_RE = re.compile(r"\b(\w+)\.(\w+)\b")
+_EQUALITY_RE = re.compile(r"\b(\w+)\.(\w+) = ")
+_NULL_TEST_RE = re.compile(r"\((\w+)\.(\w+) IS (NOT )?NULL\)")
+_SORT_KEY_RE = re.compile(r"^(\w+)\.(\w+)( DESC)?$")
+# Атрибути вузла, що разом із типом визначають форму плану
+_SHAPE_KEYS = ("Relation Name", "Index Name", "Join Type", "Strategy", "Parent Relationship", "Scan Direction")
+
+
+# ----------------- Набір запитів -----------------
+def workload(model, days: int = 30) -> List[Statement]:
+    statements: List[Statement] = [
+        (f"report:{name}", sql.SQL(REPORT_QUERIES[name]).format(window=sql.SQL(window)),
+         {"days": days, "limit": 10})
+        for name, window in _REPORT_WINDOWS.items()
+    ]
+    with model.connection() as conn, conn.cursor() as cur:
+        for table in model.list_tables():
+            pk = model.primary_key(table)
+            if not pk:
+                continue
+            table_id, pk_id = sql.Identifier(table), sql.Identifier(pk)
+            cur.execute(sql.SQL("SELECT {} FROM {} LIMIT 1").format(pk_id, table_id))
+            row = cur.fetchone()
+            if row is None:
+                continue
+            params = {"value": row[0], "limit": BROWSE["page_size"]}
+            statements += [
+                (f"select_by_pk:{table}", sql.SQL("SELECT * FROM {} WHERE {} = %(value)s").format(table_id, pk_id),
+                 params),
+                (f"select_page:{table}", sql.SQL("SELECT * FROM {} WHERE {} > %(value)s ORDER BY {} LIMIT %(limit)s")
+                 .format(table_id, pk_id, pk_id), params),
+                (f"update:{table}", sql.SQL("UPDATE {} SET {} = {} WHERE {} = %(value)s")
+                 .format(table_id, pk_id, pk_id, pk_id), params),
+                (f"delete:{table}", sql.SQL("DELETE FROM {} WHERE {} = %(value)s").format(table_id, pk_id), params),
+            ]
+            for child, column in model.referencing_keys(table, pk):
+                statements.append((
+                    f"has_child_rows:{child}.{column}",
+                    sql.SQL("SELECT EXISTS (SELECT 1 FROM {} WHERE {} = %(value)s)").format(
+                        sql.Identifier(child), sql.Identifier(column)),
+                    params,
+                ))
+    return statements
+
+
+def _analyzable(model, name: str) -> bool:
+    # DELETE рядка, на який посилаються дочірні таблиці, під ANALYZE завжди падає з 23503 (FK RESTRICT):
+    # для таких таблиць план лише оцінюється, без виконання
+    kind, _, table = name.partition(":")
+    return not (kind == "delete" and model.referencing_keys(table, model.primary_key(table)))
+
+
+def explain(conn, query: sql.Composable, params: Dict[str, Any], analyze: bool = True) -> Dict[str, Any]:
+    # Викликати всередині транзакції: DML під EXPLAIN ANALYZE справді виконується
+    options = "ANALYZE, VERBOSE, BUFFERS, FORMAT JSON" if analyze else "VERBOSE, FORMAT JSON"
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("EXPLAIN ({}) ").format(sql.SQL(options)) + query, params)
+        return cur.fetchone()[0][0]
+
+
+def nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from nodes(child)
+
+
+# ----------------- Відбитки планів -----------------
+def plan_shape(plan: Dict[str, Any]) -> str:
+    # Типи вузлів, таблиці, індекси та види з'єднань; оцінки й час не входять
+    attrs = ",".join(f"{plan[k]}" for k in _SHAPE_KEYS if k in plan)
+    children = ", ".join(plan_shape(child) for child in plan.get("Plans", []))
+    return f"{plan['Node Type']}[{attrs}]" + (f"({children})" if children else "")
+
+
+def fingerprint(shape: str) -> str:
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:16]
+
+
+def compare_fingerprints(current: Dict[str, Dict[str, Any]], path: str,
+                         accept: bool = False) -> List[Dict[str, Any]]:
+    # Змінений відбиток - регресія; базові відбитки оновлюються лише з accept,
+    # нові запити додаються завжди
+    stored: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            stored = json.load(f)
+    regressions = []
+    for name, entry in current.items():
+        old = stored.get(name)
+        if old is not None and old["fingerprint"] != entry["fingerprint"]:
+            regressions.append({
+                "query": name,
+                "old_shape": old["shape"],
+                "new_shape": entry["shape"],
+                "old_ms": old.get("execution_ms"),
+                "new_ms": entry.get("execution_ms"),
+            })
+        if old is None or accept:
+            stored[name] = entry
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stored, f, indent=2, ensure_ascii=False)
+    return regressions
+
+
+# ----------------- Аналіз планів -----------------
+def find_problems(name: str, plan: Dict[str, Any], table_rows: Dict[str, int],
+                  threshold: int) -> List[Dict[str, Any]]:
+    aliases = {n["Alias"]: n["Relation Name"] for n in nodes(plan) if "Relation Name" in n and "Alias" in n}
+    problems = []
+    for node in nodes(plan):
+        kind = node["Node Type"]
+        if kind == "Seq Scan" and table_rows.get(node["Relation Name"], 0) >= threshold:
+            problems.append({
+                "query": name,
+                "kind": "seq_scan",
+                "table": node["Relation Name"],
+                "alias": node.get("Alias", node["Relation Name"]),
+                "table_rows": table_rows[node["Relation Name"]],
+                "filter": node.get("Filter"),
+                "rows_removed": node.get("Rows Removed by Filter", 0),
+                "output": node.get("Output", []),
+                "time_ms": node.get("Actual Total Time"),
+            })
+        elif kind in ("Sort", "Incremental Sort"):
+            child = node["Plans"][0]
+            rows = child.get("Actual Rows", child.get("Plan Rows", 0)) * child.get("Actual Loops", 1)
+            if rows >= threshold or node.get("Sort Space Type") == "Disk":
+                keys = [_SORT_KEY_RE.match(k) for k in node.get("Sort Key", [])]
+                tables = {aliases.get(m.group(1), m.group(1)) for m in keys if m}
+                problems.append({
+                    "query": name,
+                    "kind": "sort",
+                    "table": tables.pop() if len(tables) == 1 and all(keys) else None,
+                    "sort_key": node.get("Sort Key", []),
+                    "rows": rows,
+                    "method": node.get("Sort Method"),
+                    "space_type": node.get("Sort Space Type"),
+                    "time_ms": node.get("Actual Total Time"),
+                })
+    return problems
+
+
+def _covered(indexes: Dict[str, List[List[str]]], table: str, columns: List[str]) -> bool:
+    # Вже є індекс, ключ якого починається з тих самих колонок
+    return any(cols[:len(columns)] == columns for cols in indexes.get(table, []))
+
+
+def suggest_index(problem: Dict[str, Any], columns: Dict[str, List[str]],
+                  indexes: Dict[str, List[List[str]]]) -> Optional[Dict[str, Any]]:
+    table = problem["table"]
+    if table is None:
+        return None
+    table_cols = columns.get(table, [])
+    where = None  # (колонка, "NOT " або "") для часткового індексу
+    if problem["kind"] == "seq_scan":
+        text = problem["filter"] or ""
+        alias = problem["alias"]
+        refs = [c for a, c in _COLUMN_RE.findall(text) if a == alias and c in table_cols]
+        equality = [c for a, c in _EQUALITY_RE.findall(text) if a == alias and c in table_cols]
+        # рівність - першими колонками ключа, діапазони після
+        key = list(dict.fromkeys(equality + refs))
+        null_test = _NULL_TEST_RE.search(text)
+        if null_test and null_test.group(1) == alias:
+            # предикат IS [NOT] NULL не потребує ключа: частковий індекс лише по потрібних рядках
+            where = (null_test.group(2), null_test.group(3) or "")
+            key = [c for c in key if c != null_test.group(2)] or key
+        if not key:
+            return None
+        keys = [(c, "") for c in key]
+        output = [c for a, c in (o.split(".", 1) for o in problem["output"] if "." in o)
+                  if a == alias and c in table_cols and c not in key]
+        include = output if 0 < len(output) <= ADVISOR["max_include"] else []
+    else:
+        keys = [(m.group(2), m.group(3) or "") for m in map(_SORT_KEY_RE.match, problem["sort_key"])]
+        include = []
+    key_cols = [c for c, _ in keys]
+    if not where and _covered(indexes, table, key_cols):
+        return None
+    name = (f"idx_{table}_" + "_".join(c + ("_desc" if d else "") for c, d in keys)
+            + ("_cov" if include else "") + ("_partial" if where else ""))
+    ddl = sql.SQL("CREATE INDEX {} ON {} ({})").format(
+        sql.Identifier(name[:63]), sql.Identifier(table),
+        sql.SQL(", ").join(sql.SQL("{}{}").format(sql.Identifier(c), sql.SQL(d)) for c, d in keys),
+    )
+    if include:
+        ddl += sql.SQL(" INCLUDE ({})").format(sql.SQL(", ").join(map(sql.Identifier, include)))
+    if where:
+        ddl += sql.SQL(" WHERE {} IS {}NULL").format(sql.Identifier(where[0]), sql.SQL(where[1]))
+    return {"table": table, "columns": key_cols, "include": include,
+            "where": f"{where[0]} IS {where[1]}NULL" if where else None, "ddl": ddl}
+
+
+def _hypopg_available(conn) -> bool:
+    with conn.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'hypopg')")
+        return cur.fetchone()[0]
+
+
+def evaluate_hypothetical(conn, ddl: str, statements: List[Statement]) -> List[Dict[str, Any]]:
+    # Оцінка вартості без ANALYZE до і після hypopg_create_index; індекс існує лише в сеансі
+    before = {name: explain(conn, query, params, analyze=False)["Plan"]["Total Cost"]
+              for name, query, params in statements}
+    with conn.cursor() as cur:
+        cur.execute("SELECT indexrelid FROM hypopg_create_index(%s)", (ddl,))
+        oid = cur.fetchone()[0]
+    try:
+        result = []
+        for name, query, params in statements:
+            plan = explain(conn, query, params, analyze=False)["Plan"]
+            used = any(n.get("Index Name", "").startswith(f"<{oid}>") for n in nodes(plan))
+            result.append({"query": name, "cost_before": before[name], "cost_after": plan["Total Cost"],
+                           "uses_index": used})
+        return result
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("SELECT hypopg_reset()")
+
+
+# ----------------- Запуск -----------------
+def advise(model, days: int = 30, accept: bool = False,
+           fingerprints_path: Optional[str] = None) -> Dict[str, Any]:
+    threshold = ADVISOR["large_table_rows"]
+    statements = workload(model, days)
+    columns = {t: [c["name"] for c in model.columns_info(t)] for t in model.list_tables()}
+    problems, errors, current = [], [], {}
+    with model.connection() as conn:
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                cur.execute(TABLE_ROWS_QUERY)
+                table_rows = dict(cur.fetchall())
+                cur.execute(INDEX_COLUMNS_QUERY)
+                indexes: Dict[str, List[List[str]]] = {}
+                for table, _, cols in cur.fetchall():
+                    indexes.setdefault(table, []).append(list(cols))
+            conn.rollback()
+            for name, query, params in statements:
+                try:
+                    result = explain(conn, query, params, analyze=_analyzable(model, name))
+                except psycopg2.Error as e:
+                    errors.append({"query": name, "error": (e.pgerror or str(e)).strip()})
+                    continue
+                finally:
+                    # DML з набору не повинен змінювати дані
+                    conn.rollback()
+                shape = plan_shape(result["Plan"])
+                current[name] = {"fingerprint": fingerprint(shape), "shape": shape,
+                                 "execution_ms": result.get("Execution Time"), "recorded_at": time.time()}
+                problems += find_problems(name, result["Plan"], table_rows, threshold)
+
+            suggestions: Dict[str, Dict[str, Any]] = {}
+            for problem in problems:
+                suggestion = suggest_index(problem, columns, indexes)
+                if suggestion is None:
+                    continue
+                ddl = suggestion["ddl"].as_string(conn)
+                entry = suggestions.setdefault(ddl, dict(suggestion, ddl=ddl, queries=[]))
+                if problem["query"] not in entry["queries"]:
+                    entry["queries"].append(problem["query"])
+
+            hypopg = _hypopg_available(conn)
+            if hypopg:
+                by_name = {name: (name, query, params) for name, query, params in statements}
+                for entry in suggestions.values():
+                    try:
+                        entry["hypothetical"] = evaluate_hypothetical(
+                            conn, entry["ddl"], [by_name[q] for q in entry["queries"]])
+                    except psycopg2.Error as e:
+                        entry["hypothetical_error"] = (e.pgerror or str(e)).strip()
+                    finally:
+                        conn.rollback()
+        finally:
+            conn.rollback()
+    regressions = compare_fingerprints(current, fingerprints_path or ADVISOR["fingerprints_path"], accept)
+    return {
+        "problems": problems,
+        "suggestions": list(suggestions.values()),
+        "regressions": regressions,
+        "errors": errors,
+        "hypopg": hypopg,
+    }
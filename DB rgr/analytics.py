@@ -0,0 +1,117 @@
+# analytics.py
+# Векторизована аналітика постачань над колонками з columnar.fetch_columns:
+# перцентилі цін, ковзний обсяг за днями, концентрація постачальників. Жодних циклів
+# по рядках - групування через np.unique / np.bincount, ковзні вікна через cumsum.
+from typing import Any, Dict, Optional, Sequence
+
+from psycopg2 import sql
+
+import columnar
+from config import ANALYTICS
+
+SUPPLY_COLUMNS = ["supply_id", "supplier_id", "product_id", "supply_date", "quantity", "unit_price"]
+
+
+def load_supply(model, days: Optional[int] = None) -> Dict[str, Any]:
+    # Колонки supply, впорядковані за supply_date; days - лише останні N днів
+    query = sql.SQL("SELECT {} FROM supply").format(sql.SQL(", ").join(map(sql.Identifier, SUPPLY_COLUMNS)))
+    if days:
+        query += sql.SQL(" WHERE supply_date >= now() - make_interval(days => %(days)s)")
+    # порядок за датою потрібен ковзним вікнам; ORDER BY має стояти в зовнішньому SELECT під COPY
+    return columnar.fetch_columns(model, query, {"days": days} if days else None, order_by=["supply_date"])
+
+
+def price_percentiles(unit_price, percentiles: Optional[Sequence[float]] = None) -> Dict[float, float]:
+    np = columnar.require_numpy()
+    percentiles = list(percentiles or ANALYTICS["percentiles"])
+    if not len(unit_price):
+        return {p: float("nan") for p in percentiles}
+    return dict(zip(percentiles, np.percentile(unit_price, percentiles).tolist()))
+
+
+def group_percentiles(keys, values, percentiles: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    # Перцентилі values у кожній групі keys (лінійна інтерполяція, як np.percentile) одним сортуванням
+    np = columnar.require_numpy()
+    percentiles = np.asarray(percentiles or ANALYTICS["percentiles"], dtype="float64")
+    order = np.lexsort((values, keys))
+    sorted_keys, sorted_values = keys[order], values[order]
+    groups, starts, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+    # позиції в кожній групі: (групи x перцентилі)
+    pos = (percentiles[None, :] / 100.0) * (counts[:, None] - 1)
+    lo = np.floor(pos).astype("int64")
+    hi = np.minimum(lo + 1, counts[:, None] - 1)
+    lo_values = sorted_values[starts[:, None] + lo]
+    hi_values = sorted_values[starts[:, None] + hi]
+    return {
+        "groups": groups,
+        "counts": counts,
+        "percentiles": percentiles,
+        "values": lo_values + (hi_values - lo_values) * (pos - lo),
+    }
+
+
+def price_moving_average(unit_price, window: Optional[int] = None):
+    # Ковзне середнє unit_price по window послідовних (за датою) постачаннях
+    np = columnar.require_numpy()
+    window = window or ANALYTICS["price_window"]
+    prices = np.asarray(unit_price, dtype="float64")
+    if len(prices) < window:
+        return np.empty(0, dtype="float64")
+    sums = np.cumsum(np.concatenate(([0.0], prices)))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def rolling_volume(supply_date, quantity, window_days: Optional[int] = None) -> Dict[str, Any]:
+    # Денний обсяг постачань по всьому календарю (дні без постачань - 0) і його ковзна сума
+    np = columnar.require_numpy()
+    window_days = window_days or ANALYTICS["rolling_days"]
+    if not len(supply_date):
+        empty = np.empty(0, dtype="float64")
+        return {"days": np.empty(0, dtype="datetime64[D]"), "daily": empty, "rolling": empty}
+    days = supply_date.astype("datetime64[D]")
+    first = days.min()
+    index = (days - first).astype("int64")
+    daily = np.bincount(index, weights=quantity)
+    sums = np.cumsum(np.concatenate(([0.0], daily)))
+    starts = np.maximum(np.arange(1, len(daily) + 1) - window_days, 0)
+    rolling = sums[1:] - sums[starts]
+    return {"days": first + np.arange(len(daily)), "daily": daily, "rolling": rolling}
+
+
+def supplier_concentration(supplier_id, quantity, unit_price, top: Optional[int] = None) -> Dict[str, Any]:
+    # Частки постачальників у вартості постачань, індекс Герфіндаля-Гіршмана (0..10000),
+    # частка top найбільших (CRn) і коефіцієнт Джині
+    np = columnar.require_numpy()
+    top = top or ANALYTICS["top_suppliers"]
+    suppliers, inverse = np.unique(supplier_id, return_inverse=True)
+    totals = np.bincount(inverse, weights=np.asarray(quantity, dtype="float64") * unit_price)
+    total = totals.sum()
+    if total <= 0:
+        return {"suppliers": suppliers, "totals": totals, "shares": totals, "hhi": 0.0,
+                "top_share": 0.0, "gini": 0.0}
+    shares = totals / total
+    ranked = np.sort(shares)
+    n = len(ranked)
+    gini = float((2 * np.arange(1, n + 1) - n - 1) @ ranked / n) if n else 0.0
+    order = np.argsort(shares)[::-1]
+    return {
+        "suppliers": suppliers[order],
+        "totals": totals[order],
+        "shares": shares[order],
+        "hhi": float((shares ** 2).sum() * 10000),
+        "top_share": float(ranked[-top:].sum()),
+        "gini": gini,
+    }
+
+
+def summary(model, days: Optional[int] = None, window_days: Optional[int] = None) -> Dict[str, Any]:
+    data = load_supply(model, days)
+    volume = rolling_volume(data["supply_date"], data["quantity"], window_days)
+    return {
+        "rows": len(data["supply_id"]),
+        "price_percentiles": price_percentiles(data["unit_price"]),
+        "product_price_percentiles": group_percentiles(data["product_id"], data["unit_price"]),
+        "rolling_volume": volume,
+        "price_moving_average": price_moving_average(data["unit_price"]),
+        "concentration": supplier_concentration(data["supplier_id"], data["quantity"], data["unit_price"]),
+    }
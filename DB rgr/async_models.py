@@ -0,0 +1,607 @@
+# async_models.py
+# Асинхронний варіант DBModel на psycopg 3 і AsyncConnectionPool з тим самим набором операцій:
+# CRUD, метадані схеми, перевірки FK, генератори та звіти. Кожна операція бере з'єднання з пулу,
+# тож сотні одночасних запитів з одного процесу не блокують один одного.
+# Генератори supply так само створюють місячні секції (якщо supply секціонована), звіт про
+# залишки використовує прапорці складської книги, а insert(reserve_id=True) бере id з блоків.
+# Лише в DBModel: кеш рядків і LISTEN/NOTIFY, UnitOfWork і пакетні *_many, потокове iter_rows,
+# інструментування, створення й оновлення матеріалізованих звітів, міграція та архівування секцій
+# supply, встановлення складської книги й повнотекстового пошуку - їх виконують через DBModel.
+#
+#   async with AsyncDBModel() as model:
+#       rows, time_ms, explain, err = await model.query_supplier_totals()
+import asyncio
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+import psycopg
+from psycopg import sql
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from config import (DB, ASYNC_POOL, BROWSE, GENERATE, ID_BLOCKS, MATERIALIZED_REPORTS, SCHEMA_CACHE_TTL,
+                    SUPPLY_PARTITIONING)
+import datagen
+from queries import (SCHEMA_QUERY, ID_BLOCKS_INSTALL, LOW_STOCK_FLAGGED_QUERY, REPORT_QUERIES, REPORT_VIEW_QUERIES,
+                     SERVER_GENERATE, SUPPLY_PARTITION_CREATE, SUPPLY_PARTITION_FROM_DEFAULT, SUPPLY_PARTITION_HAS_DEFAULT,
+                     SUPPLY_PARTITION_IN_DEFAULT, SUPPLY_PARTITIONS_QUERY, GenerateResult, ReportResult, add_months,
+                     build_schema, id_sequence, month_starts, partition_bounds)
+
+
+class AsyncDBModel:
+    def __init__(self, db: Optional[Dict[str, Any]] = None):
+        self.pool = AsyncConnectionPool(
+            psycopg.conninfo.make_conninfo(**(db or DB)),
+            min_size=ASYNC_POOL["min_size"],
+            max_size=ASYNC_POOL["max_size"],
+            kwargs={"autocommit": True},
+            open=False,
+        )
+        self._schema_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._schema_loaded_at = 0.0
+        self._schema_lock = asyncio.Lock()
+        self.materialized_reports = False
+        self._id_sequences: set = set()
+        self._id_blocks: Dict[str, List[int]] = {}
+        self._id_lock = asyncio.Lock()
+
+    async def open(self):
+        try:
+            await self.pool.open(wait=True)
+        except Exception as e:
+            raise RuntimeError("Не вдалося підключитися до бази даних. Перевірте налаштування в config.py") from e
+
+    async def close(self):
+        await self.pool.close()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # ----------------- Кеш метаданих схеми -----------------
+    async def _schema(self) -> Dict[str, Dict[str, Any]]:
+        ttl = SCHEMA_CACHE_TTL
+        async with self._schema_lock:
+            if self._schema_cache is None or (ttl is not None and time.monotonic() - self._schema_loaded_at > ttl):
+                async with self.pool.connection() as conn, conn.cursor() as cur:
+                    await cur.execute(SCHEMA_QUERY)
+                    self._schema_cache = build_schema(await cur.fetchall())
+                self._schema_loaded_at = time.monotonic()
+            return self._schema_cache
+
+    def invalidate_schema(self):
+        self._schema_cache = None
+
+    async def list_tables(self) -> List[str]:
+        return sorted(await self._schema())
+
+    async def columns_info(self, table: str) -> List[Dict[str, Any]]:
+        meta = (await self._schema()).get(table)
+        return [dict(c) for c in meta["columns"]] if meta else []
+
+    async def primary_key(self, table: str) -> Optional[str]:
+        meta = (await self._schema()).get(table)
+        return meta["pk"][0] if meta and meta["pk"] else None
+
+    async def foreign_keys(self, table: str) -> List[Tuple[str, str, str]]:
+        meta = (await self._schema()).get(table)
+        return list(meta["fks"]) if meta else []
+
+    async def referencing_keys(self, parent_table: str, parent_column: str) -> List[Tuple[str, str]]:
+        meta = (await self._schema()).get(parent_table)
+        if not meta:
+            return []
+        return [(table, column) for table, column, parent_col in meta["children"] if parent_col == parent_column]
+
+    # ----------------- Generic CRUD -----------------
+    async def select_all(self, table: str, limit: int = 200) -> List[Dict[str, Any]]:
+        async with self.pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(sql.SQL('SELECT * FROM {} ORDER BY 1 LIMIT %s').format(sql.Identifier(table)), (limit,))
+            return await cur.fetchall()
+
+    async def select_page(self, table: str, after: Any = None, before: Any = None,
+                          page_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        pk = await self.primary_key(table)
+        if not pk:
+            raise ValueError(f"Таблиця {table} не має первинного ключа")
+        page_size = page_size or BROWSE["page_size"]
+        table_id, pk_id = sql.Identifier(table), sql.Identifier(pk)
+        async with self.pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            if before is not None:
+                await cur.execute(sql.SQL('SELECT * FROM {} WHERE {} < %s ORDER BY {} DESC LIMIT %s').format(
+                    table_id, pk_id, pk_id), (before, page_size))
+                return list(reversed(await cur.fetchall()))
+            if after is not None:
+                await cur.execute(sql.SQL('SELECT * FROM {} WHERE {} > %s ORDER BY {} LIMIT %s').format(
+                    table_id, pk_id, pk_id), (after, page_size))
+            else:
+                await cur.execute(sql.SQL('SELECT * FROM {} ORDER BY {} LIMIT %s').format(table_id, pk_id),
+                                  (page_size,))
+            return await cur.fetchall()
+
+    async def select_by_pk(self, table: str, pk: str, pk_value: Any) -> Optional[Dict[str, Any]]:
+        async with self.pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(sql.SQL('SELECT * FROM {} WHERE {}=%s').format(sql.Identifier(table), sql.Identifier(pk)),
+                              (pk_value,))
+            return await cur.fetchone()
+
+    async def _execute(self, query: sql.Composable, params: Any) -> Tuple[bool, Optional[str]]:
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            try:
+                await cur.execute(query, params)
+                return True, None
+            except psycopg.Error as e:
+                return False, str(e)
+
+    async def insert(self, table: str, data: Dict[str, Any],
+                     reserve_id: bool = False) -> Tuple[bool, Optional[str]]:
+        ok, err, _ = await self._insert(table, data, reserve_id)
+        return ok, err
+
+    async def insert_checked(self, table: str, data: Dict[str, Any],
+                             reserve_id: bool = False) -> Tuple[bool, Optional[str], Dict[str, List[Any]]]:
+        # Див. DBModel.insert_checked: missing_parents - лише після порушення FK
+        ok, err, sqlstate = await self._insert(table, data, reserve_id)
+        missing = await self.missing_parents(table, [data]) if sqlstate == _FK_VIOLATION else {}
+        return ok, err, missing
+
+    async def _insert(self, table: str, data: Dict[str, Any],
+                      reserve_id: bool = False) -> Tuple[bool, Optional[str], Optional[str]]:
+        # (успіх, текст помилки, SQLSTATE)
+        if reserve_id:
+            # до взяття з'єднання: next_id за потреби бере з пулу власне
+            try:
+                data = await self._with_id(table, data)
+            except psycopg.Error as e:
+                return False, str(e), e.sqlstate
+        cols = list(data.keys())
+        query = sql.SQL('INSERT INTO {} ({}) VALUES ({})').format(
+            sql.Identifier(table),
+            sql.SQL(', ').join(map(sql.Identifier, cols)),
+            sql.SQL(', ').join(sql.Placeholder() * len(cols))
+        )
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            try:
+                await cur.execute(query, [data[c] for c in cols])
+                return True, None, None
+            except psycopg.Error as e:
+                return False, str(e), e.sqlstate
+
+    def _update_sql(self, table: str, pk: str, cols: List[str]) -> sql.Composed:
+        return sql.SQL('UPDATE {} SET {} WHERE {} = %s').format(
+            sql.Identifier(table),
+            sql.SQL(', ').join(sql.SQL('{} = %s').format(sql.Identifier(c)) for c in cols),
+            sql.Identifier(pk)
+        )
+
+    async def update(self, table: str, pk: str, pk_value: Any, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        cols = list(data.keys())
+        return await self._execute(self._update_sql(table, pk, cols), [data[c] for c in cols] + [pk_value])
+
+    async def update_returning(self, table: str, pk: str, pk_value: Any,
+                               data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        # Див. DBModel.update_returning: None - рядка немає
+        cols = list(data.keys())
+        async with self.pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            try:
+                await cur.execute(self._update_sql(table, pk, cols) + sql.SQL(" RETURNING *"),
+                                  [data[c] for c in cols] + [pk_value])
+                return await cur.fetchone(), None
+            except psycopg.Error as e:
+                return None, str(e)
+
+    async def delete(self, table: str, pk: str, pk_value: Any) -> Tuple[bool, Optional[str]]:
+        query = sql.SQL('DELETE FROM {} WHERE {} = %s').format(sql.Identifier(table), sql.Identifier(pk))
+        return await self._execute(query, (pk_value,))
+
+    async def delete_guarded(self, table: str, pk: str, pk_value: Any) -> Tuple[bool, bool, Optional[str]]:
+        # Див. DBModel.delete_guarded: (видалено, є дочірні записи, помилка) одним запитом
+        refs = await self.referencing_keys(table, pk)
+        blocked = sql.SQL(" OR ").join(
+            sql.SQL("EXISTS (SELECT 1 FROM {} WHERE {} = %(key)s)").format(sql.Identifier(t), sql.Identifier(c))
+            for t, c in refs
+        ) if refs else sql.SQL("false")
+        query = sql.SQL("""
+            WITH blocked AS (SELECT {} AS b),
+                 deleted AS (DELETE FROM {} WHERE {} = %(key)s AND NOT (SELECT b FROM blocked) RETURNING 1)
+            SELECT (SELECT b FROM blocked), (SELECT count(*) FROM deleted)
+        """).format(blocked, sql.Identifier(table), sql.Identifier(pk))
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            try:
+                await cur.execute(query, {"key": pk_value})
+                has_children, deleted = await cur.fetchone()
+            except psycopg.Error as e:
+                return False, False, str(e)
+        return bool(deleted), has_children, None
+
+    # ----------------- Helpers -----------------
+    async def has_child_rows(self, parent_table: str, parent_pk: str, pk_value: Any) -> bool:
+        refs = await self.referencing_keys(parent_table, parent_pk)
+        if not refs:
+            return False
+        query = sql.SQL('SELECT ') + sql.SQL(' OR ').join(
+            sql.SQL('EXISTS (SELECT 1 FROM {} WHERE {} = %s)').format(sql.Identifier(t), sql.Identifier(c))
+            for t, c in refs
+        )
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(query, [pk_value] * len(refs))
+            return (await cur.fetchone())[0]
+
+    async def parent_exists(self, parent_table: str, parent_pk: str, pk_value: Any) -> bool:
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(sql.SQL('SELECT EXISTS (SELECT 1 FROM {} WHERE {} = %s LIMIT 1)').format(
+                sql.Identifier(parent_table), sql.Identifier(parent_pk)
+            ), (pk_value,))
+            return (await cur.fetchone())[0]
+
+    async def missing_parents(self, table: str, rows: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        fks = await self.foreign_keys(table)
+        rows = list(rows)
+        types = {c["name"]: c["type"] for c in await self.columns_info(table)}
+        parts, params, values = [], [], {}
+        for col, parent_table, parent_col in fks:
+            distinct = list(dict.fromkeys(r[col] for r in rows if r.get(col) is not None))
+            if not distinct:
+                continue
+            values[col] = distinct
+            parts.append(sql.SQL(
+                'SELECT %s::text, u.ord FROM unnest(%s::{}[]) WITH ORDINALITY AS u(v, ord) '
+                'WHERE NOT EXISTS (SELECT 1 FROM {} p WHERE p.{} = u.v)'
+            ).format(sql.SQL(types[col]), sql.Identifier(parent_table), sql.Identifier(parent_col)))
+            params += [col, distinct]
+        if not parts:
+            return {}
+        missing: Dict[str, List[Any]] = {}
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(sql.SQL(' UNION ALL ').join(parts), params)
+            for col, ord_ in await cur.fetchall():
+                missing.setdefault(col, []).append(values[col][ord_ - 1])
+        return missing
+
+    def parse_date(self, value: str) -> Optional[str]:
+        from dateutil import parser as date_parser
+        try:
+            return date_parser.parse(value).date().isoformat()
+        except Exception:
+            return None
+
+    # ----------------- Аналітичні запити -----------------
+    async def _run_report(self, query: sql.Composable, params: Dict[str, Any]) -> ReportResult:
+        # Клієнтське підставлення параметрів: EXPLAIN не приймає серверних параметрів
+        async with self.pool.connection() as conn:
+            cur = psycopg.AsyncClientCursor(conn, row_factory=dict_row)
+            async with cur:
+                try:
+                    await cur.execute(query, params)
+                    rows = await cur.fetchall()
+                    await cur.execute(sql.SQL("EXPLAIN (ANALYZE, BUFFERS) ") + query, params)
+                    plan = [r["QUERY PLAN"] for r in await cur.fetchall()]
+                except psycopg.Error as e:
+                    return [], None, "", str(e)
+        time_ms = None
+        for line in plan:
+            if line.startswith("Execution Time:"):
+                time_ms = float(line.split(":")[1].split()[0])
+        return rows, time_ms, "\n".join(plan), None
+
+    def _use_views(self, materialized: Optional[bool]) -> bool:
+        return self.materialized_reports if materialized is None else materialized
+
+    async def query_supplier_totals(self, days: Optional[int] = None,
+                                    materialized: Optional[bool] = None) -> ReportResult:
+        if self._use_views(materialized) and not days:
+            return await self._run_report(sql.SQL(REPORT_VIEW_QUERIES["supplier_totals"]), {})
+        window = sql.SQL("AND sp.supply_date >= now() - make_interval(days => %(days)s)") if days else sql.SQL("")
+        return await self._run_report(sql.SQL(REPORT_QUERIES["supplier_totals"]).format(window=window),
+                                      {"days": days})
+
+    async def query_products_below_min_stock(self, materialized: Optional[bool] = None) -> ReportResult:
+        if self._use_views(materialized):
+            return await self._run_report(sql.SQL(REPORT_VIEW_QUERIES["products_below_min_stock"]), {})
+        if await self.stock_ledger_installed():
+            return await self._run_report(sql.SQL(LOW_STOCK_FLAGGED_QUERY), {})
+        return await self._run_report(sql.SQL(REPORT_QUERIES["products_below_min_stock"]), {})
+
+    async def query_category_supply_costs(self, days: Optional[int] = None,
+                                          materialized: Optional[bool] = None) -> ReportResult:
+        if self._use_views(materialized) and not days:
+            return await self._run_report(sql.SQL(REPORT_VIEW_QUERIES["category_supply_costs"]), {})
+        window = sql.SQL("WHERE sp.supply_date >= now() - make_interval(days => %(days)s)") if days else sql.SQL("")
+        return await self._run_report(sql.SQL(REPORT_QUERIES["category_supply_costs"]).format(window=window),
+                                      {"days": days})
+
+    async def query_top_products_by_supply_volume(self, limit: int = 10, days: Optional[int] = None,
+                                                  materialized: Optional[bool] = None) -> ReportResult:
+        if self._use_views(materialized) and not days:
+            return await self._run_report(sql.SQL(REPORT_VIEW_QUERIES["top_products_by_supply_volume"]),
+                                          {"limit": limit})
+        window = sql.SQL("WHERE sp.supply_date >= now() - make_interval(days => %(days)s)") if days else sql.SQL("")
+        return await self._run_report(sql.SQL(REPORT_QUERIES["top_products_by_supply_volume"]).format(window=window),
+                                      {"days": days, "limit": limit})
+
+    async def query_last_month_supplies(self, days: int = 30, materialized: Optional[bool] = None) -> ReportResult:
+        if self._use_views(materialized) and days <= MATERIALIZED_REPORTS["recent_days"]:
+            return await self._run_report(sql.SQL(REPORT_VIEW_QUERIES["last_month_supplies"]), {"days": days})
+        return await self._run_report(sql.SQL(REPORT_QUERIES["last_month_supplies"]), {"days": days})
+
+    async def run_parallel(self, tasks: List[Tuple[str, Any, tuple]]) -> List[Tuple[str, Any]]:
+        # (name, async func, args) -> усі задачі одночасно, кожна на своєму з'єднанні пулу
+        results = await asyncio.gather(*(func(*args) for _, func, args in tasks))
+        return [(name, result) for (name, _, _), result in zip(tasks, results)]
+
+    async def run_reports(self, reports: List[Tuple[str, Any, tuple]]) -> List[Tuple[str, ReportResult]]:
+        return await self.run_parallel(reports)
+
+    # ----------------- Складська книга та секції supply -----------------
+    async def stock_ledger_installed(self) -> bool:
+        meta = (await self._schema()).get("product")
+        return bool(meta) and any(c["name"] == "below_min" for c in meta["columns"])
+
+    async def supply_partitioned(self) -> bool:
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = 'supply'::regclass")
+            return (await cur.fetchone())[0]
+
+    async def supply_partitions(self) -> List[Dict[str, Any]]:
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(SUPPLY_PARTITIONS_QUERY)
+            result = []
+            for name, bound, rows in await cur.fetchall():
+                lo, hi = partition_bounds(bound)
+                result.append({"name": name, "from": lo, "to": hi, "rows": rows})
+            return result
+
+    async def ensure_supply_partitions(self, start: Optional[date] = None, end: Optional[date] = None,
+                                       months_ahead: Optional[int] = None) -> Tuple[bool, Optional[str]]:
+        # Див. DBModel.ensure_supply_partitions; міграцію (partition_supply) виконує DBModel
+        start = start or date.today()
+        if end is None:
+            ahead = SUPPLY_PARTITIONING["months_ahead"] if months_ahead is None else months_ahead
+            end = add_months(date.today(), ahead)
+        try:
+            existing = {p["from"] for p in await self.supply_partitions()}
+            async with self.pool.connection() as conn:
+                async with conn.transaction(), conn.cursor() as cur:
+                    for month in month_starts(start, end):
+                        if month not in existing:
+                            await _create_supply_partition(cur, month)
+            return True, None
+        except psycopg.Error as e:
+            return False, str(e)
+
+    async def _route_supply(self, newest: date) -> Tuple[bool, Optional[str]]:
+        # Генератори пишуть дати за останній рік: секції на кожен місяць, щоб рядки не йшли в DEFAULT
+        try:
+            if not await self.supply_partitioned():
+                return True, None
+        except psycopg.Error as e:
+            return False, str(e)
+        return await self.ensure_supply_partitions(newest - timedelta(days=366), newest)
+
+    # ----------------- Генерація даних -----------------
+    async def ensure_id_sequence(self, table: str):
+        # Див. DBModel.ensure_id_sequence
+        if table in self._id_sequences:
+            return
+        pk = await self.primary_key(table)
+        if not pk:
+            raise ValueError(f"Таблиця {table} не має первинного ключа")
+        params = {
+            "seq": sql.Identifier(id_sequence(table)),
+            "seq_name": sql.Literal(id_sequence(table)),
+            "pk": sql.Identifier(pk),
+            "table": sql.Identifier(table),
+        }
+        async with self.pool.connection() as conn:
+            async with conn.transaction():
+                for statement in ID_BLOCKS_INSTALL:
+                    await conn.execute(sql.SQL(statement).format(**params))
+        self._id_sequences.add(table)
+
+    async def reserve_ids(self, table: str, count: int) -> int:
+        await self.ensure_id_sequence(table)
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute("SELECT dbmodel_reserve_ids(%s::regclass, %s)", (id_sequence(table), max(count, 1)))
+            return (await cur.fetchone())[0]
+
+    async def next_id(self, table: str) -> int:
+        # Див. DBModel.next_id: блок з ID_BLOCKS["block_size"] id на одне звернення до БД
+        async with self._id_lock:
+            block = self._id_blocks.get(table)
+            if block is None or block[0] >= block[1]:
+                start = await self.reserve_ids(table, ID_BLOCKS["block_size"])
+                block = self._id_blocks[table] = [start, start + ID_BLOCKS["block_size"]]
+            block[0] += 1
+            return block[0] - 1
+
+    async def _with_id(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        pk = await self.primary_key(table)
+        if not pk or pk in data:
+            return data
+        col_info = next((c for c in await self.columns_info(table) if c["name"] == pk), None)
+        if not col_info or "int" not in col_info["type"]:
+            return data
+        return dict(data, **{pk: await self.next_id(table)})
+
+    async def _fetch_ids(self, query: str) -> List[int]:
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute(query)
+            return [r[0] for r in await cur.fetchall()]
+
+    async def _generate(self, table: str, count: int, start_id: int, seed: Optional[int], workers: Optional[int],
+                        chunk_size: Optional[int], context: Dict[str, Any],
+                        picked: Optional[List[int]] = None) -> GenerateResult:
+        # Блоки рендеряться поза циклом подій (у потоці або пулі процесів) і пишуться в один COPY
+        seed = datagen.resolve_seed(seed)
+        chunk_size = chunk_size or GENERATE["chunk_size"]
+        workers = workers or GENERATE["workers"]
+        blocks = datagen.plan_blocks(table, seed, start_id, count, chunk_size, picked)
+        loop = asyncio.get_running_loop()
+        executor = (ProcessPoolExecutor(workers, initializer=datagen.init_context, initargs=(context,))
+                    if workers > 1 else None)
+        render = datagen.render_block if executor else functools.partial(datagen.render_block, context=context)
+        query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+            sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, datagen.COLUMNS[table]))
+        )
+        try:
+            started = time.perf_counter()
+            async with self.pool.connection() as conn, conn.cursor() as cur:
+                async with cur.copy(query) as copy:
+                    while True:
+                        window = list(islice(blocks, max(workers, 1) * 4))
+                        if not window:
+                            break
+                        for text in await asyncio.gather(*(loop.run_in_executor(executor, render, b) for b in window)):
+                            await copy.write(text)
+            stats = datagen.throughput(count, time.perf_counter() - started)
+            stats["seed"] = seed
+            return True, None, stats
+        except psycopg.Error as e:
+            return False, str(e), None
+        finally:
+            if executor:
+                executor.shutdown()
+
+    async def generate_suppliers(self, count: int, chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                                 workers: Optional[int] = None) -> GenerateResult:
+        try:
+            start_id = await self.reserve_ids("supplier", count)
+        except psycopg.Error as e:
+            return False, str(e), None
+        return await self._generate("supplier", count, start_id, seed, workers, chunk_size, {})
+
+    async def generate_products(self, count: int, chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                                workers: Optional[int] = None) -> GenerateResult:
+        try:
+            start_id = await self.reserve_ids("product", count)
+        except psycopg.Error as e:
+            return False, str(e), None
+        return await self._generate("product", count, start_id, seed, workers, chunk_size, {})
+
+    async def generate_supplies(self, count: int, chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                                workers: Optional[int] = None, base_time: Optional[datetime] = None) -> GenerateResult:
+        try:
+            supplier_ids = await self._fetch_ids("SELECT supplier_id FROM supplier ORDER BY 1")
+            product_ids = await self._fetch_ids("SELECT product_id FROM product ORDER BY 1")
+            if not supplier_ids or not product_ids:
+                return False, "Відсутні дані для FK", None
+            start_id = await self.reserve_ids("supply", count)
+        except psycopg.Error as e:
+            return False, str(e), None
+        base_time = base_time or datagen.default_base_time()
+        ok, err = await self._route_supply(base_time.date())
+        if not ok:
+            return False, err, None
+        context = {
+            "supplier_ids": supplier_ids,
+            "product_ids": product_ids,
+            "base_time": base_time,
+        }
+        return await self._generate("supply", count, start_id, seed, workers, chunk_size, context)
+
+    async def generate_inventory(self, count: int, chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                                 workers: Optional[int] = None, base_time: Optional[datetime] = None) -> GenerateResult:
+        try:
+            product_ids = await self._fetch_ids("""
+                SELECT p.product_id FROM product p
+                WHERE NOT EXISTS (SELECT 1 FROM inventory i WHERE i.product_id = p.product_id)
+                ORDER BY 1
+            """)
+            if not product_ids:
+                return False, "Відсутні продукти для FK", None
+            seed = datagen.resolve_seed(seed)
+            picked = datagen.sample_products(seed, product_ids, count)
+            start_id = await self.reserve_ids("inventory", len(picked))
+        except psycopg.Error as e:
+            return False, str(e), None
+        context = {"base_time": base_time or datagen.default_base_time()}
+        return await self._generate("inventory", len(picked), start_id, seed, workers, chunk_size, context, picked)
+
+    async def _generate_server(self, table: str, count: int) -> GenerateResult:
+        try:
+            # до взяття з'єднання: ensure_id_sequence бере з пулу власне
+            await self.ensure_id_sequence(table)
+        except psycopg.Error as e:
+            return False, str(e), None
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            try:
+                started = time.perf_counter()
+                await cur.execute(SERVER_GENERATE[table], {"count": count})
+                return True, None, datagen.throughput(cur.rowcount, time.perf_counter() - started)
+            except psycopg.Error as e:
+                return False, str(e), None
+
+    async def generate_suppliers_server(self, count: int) -> GenerateResult:
+        return await self._generate_server("supplier", count)
+
+    async def generate_products_server(self, count: int) -> GenerateResult:
+        return await self._generate_server("product", count)
+
+    async def generate_supplies_server(self, count: int) -> GenerateResult:
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute("SELECT EXISTS (SELECT 1 FROM supplier) AND EXISTS (SELECT 1 FROM product)")
+            if not (await cur.fetchone())[0]:
+                return False, "Відсутні дані для FK", None
+        ok, err = await self._route_supply(date.today())
+        if not ok:
+            return False, err, None
+        return await self._generate_server("supply", count)
+
+    async def generate_inventory_server(self, count: int) -> GenerateResult:
+        async with self.pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute("SELECT EXISTS (SELECT 1 FROM product)")
+            if not (await cur.fetchone())[0]:
+                return False, "Відсутні продукти для FK", None
+        return await self._generate_server("inventory", count)
+
+    async def generate_all(self, count: int, server: bool = False,
+                           seed: Optional[int] = None) -> List[Tuple[str, GenerateResult]]:
+        # supplier і product незалежні, supply та inventory залежать лише від них
+        if server:
+            phases = [
+                [("supplier", self.generate_suppliers_server, (count,)),
+                 ("product", self.generate_products_server, (count,))],
+                [("supply", self.generate_supplies_server, (count,)),
+                 ("inventory", self.generate_inventory_server, (count,))],
+            ]
+        else:
+            seed = datagen.resolve_seed(seed)
+            phases = [
+                [("supplier", self.generate_suppliers, (count, None, seed)),
+                 ("product", self.generate_products, (count, None, seed))],
+                [("supply", self.generate_supplies, (count, None, seed)),
+                 ("inventory", self.generate_inventory, (count, None, seed))],
+            ]
+        results = []
+        for phase in phases:
+            results.extend(await self.run_parallel(phase))
+        return results
+
+
+# SQLSTATE foreign_key_violation
+_FK_VIOLATION = "23503"
+
+
+async def _create_supply_partition(cur, month: date):
+    # Див. models._create_supply_partition
+    params = {
+        "name": sql.Identifier(f"supply_p{month:%Y%m}"),
+        "lo": sql.Literal(month.isoformat()),
+        "hi": sql.Literal(add_months(month, 1).isoformat()),
+    }
+    await cur.execute(SUPPLY_PARTITION_HAS_DEFAULT)
+    has_default = (await cur.fetchone())[0]
+    if has_default:
+        await cur.execute(sql.SQL(SUPPLY_PARTITION_IN_DEFAULT).format(**params))
+    if not has_default or not (await cur.fetchone())[0]:
+        await cur.execute(sql.SQL(SUPPLY_PARTITION_CREATE).format(**params))
+        return
+    for statement in SUPPLY_PARTITION_FROM_DEFAULT:
+        await cur.execute(sql.SQL(statement).format(**params))
@@ -0,0 +1,233 @@
+# bench.py
+# Відтворюваний бенчмарк DBModel: тимчасова БД зі схемою "DB1lab (2).sql",
+# наповнення в кількох масштабах, p50/p95/p99 затримки та пропускна здатність у JSON.
+#
+#   python bench.py --scales 10000,1000000,10000000 --repeat 200 --output bench.json
+#
+# Окремо порівнюються формати рядків (ROW_FORMAT): час і пам'ять Python-об'єктів (tracemalloc)
+# на вибірці до --fetch-rows рядків supply.
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import psycopg2
+
+from config import DB
+from models import ROW_FACTORIES, DBModel
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "DB1lab (2).sql")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    # nearest-rank
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    total_s = sum(samples_ms) / 1000
+    return {
+        "n": len(samples_ms),
+        "mean_ms": sum(samples_ms) / len(samples_ms),
+        "p50_ms": percentile(samples_ms, 50),
+        "p95_ms": percentile(samples_ms, 95),
+        "p99_ms": percentile(samples_ms, 99),
+        "ops_per_sec": len(samples_ms) / total_s if total_s > 0 else 0.0,
+    }
+
+
+def measure(func: Callable[[int], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def measure_row_formats(db: Dict[str, Any], rows: int) -> Dict[str, Dict[str, float]]:
+    # Час - окремим прогоном без tracemalloc (трасування сповільнює кожне виділення пам'яті)
+    result = {}
+    for row_format in ROW_FACTORIES:
+        model = DBModel(db, row_format=row_format)
+        try:
+            started = time.perf_counter()
+            fetched = len(model.select_all("supply", limit=rows))
+            seconds = time.perf_counter() - started
+
+            tracemalloc.start()
+            try:
+                kept = model.select_all("supply", limit=rows)
+                retained, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            del kept
+        finally:
+            model.close()
+        result[row_format] = {
+            "rows": fetched,
+            "seconds": seconds,
+            "rows_per_sec": fetched / seconds if seconds > 0 else 0.0,
+            "retained_bytes": retained,
+            "peak_bytes": peak,
+            "bytes_per_row": retained / fetched if fetched else 0.0,
+        }
+    return result
+
+
+# ----------------- Тимчасова база -----------------
+def create_database() -> Dict[str, Any]:
+    name = f"dbmodel_bench_{uuid.uuid4().hex[:8]}"
+    admin = psycopg2.connect(**DB)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'CREATE DATABASE "{name}"')
+    admin.close()
+
+    db = dict(DB, dbname=name)
+    conn = psycopg2.connect(**db)
+    conn.autocommit = True
+    with conn.cursor() as cur, open(SCHEMA_FILE, encoding="utf-8") as f:
+        cur.execute(f.read())
+    conn.close()
+    return db
+
+
+def drop_database(db: Dict[str, Any]):
+    admin = psycopg2.connect(**DB)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{db["dbname"]}"')
+    admin.close()
+
+
+def _checked(result):
+    ok, err = result[0], result[1]
+    if not ok:
+        raise RuntimeError(err)
+    return result
+
+
+# ----------------- Сценарій -----------------
+def seed(model: DBModel, supply_rows: int) -> Dict[str, Any]:
+    suppliers = max(supply_rows // 100, 10)
+    products = max(supply_rows // 10, 10)
+    report = {}
+    for name, func, count in [
+        ("supplier", model.generate_suppliers_server, suppliers),
+        ("product", model.generate_products_server, products),
+        ("supply", model.generate_supplies_server, supply_rows),
+        ("inventory", model.generate_inventory_server, products),
+    ]:
+        report[name] = _checked(func(count))[2]
+    with model.conn.cursor() as cur:
+        cur.execute("ANALYZE")
+    return report
+
+
+def run_scale(supply_rows: int, repeat: int, rng: random.Random, fetch_rows: int) -> Dict[str, Any]:
+    db = create_database()
+    model = DBModel(db)
+    try:
+        seeded = seed(model, supply_rows)
+        with model.conn.cursor() as cur:
+            cur.execute("SELECT MAX(supply_id) FROM supply")
+            max_supply = cur.fetchone()[0]
+            cur.execute("SELECT MAX(supplier_id) FROM supplier")
+            max_supplier = cur.fetchone()[0]
+
+        ops: Dict[str, Dict[str, float]] = {}
+
+        # генератори: обидва рушії на однаковому обсязі
+        gen_rows = min(max(supply_rows // 10, 1000), 100000)
+        for name, func in [
+            ("generate_supplies_copy", model.generate_supplies),
+            ("generate_supplies_server", model.generate_supplies_server),
+        ]:
+            stats = _checked(func(gen_rows))[2]
+            ops[name] = {"n": stats["rows"], "seconds": stats["seconds"], "rows_per_sec": stats["rows_per_sec"]}
+
+        ops["select_all"] = measure(lambda i: model.select_all("supply", limit=200), repeat)
+        ops["select_page"] = measure(
+            lambda i: model.select_page("supply", after=rng.randint(1, max_supply)), repeat)
+        ops["select_by_pk"] = measure(
+            lambda i: model.select_by_pk("supply", "supply_id", rng.randint(1, max_supply)), repeat)
+        ops["has_child_rows"] = measure(
+            lambda i: model.has_child_rows("supplier", "supplier_id", rng.randint(1, max_supplier)), repeat)
+
+        # insert -> update -> delete по нових ключах, щоб таблиця поверталась до вихідного стану
+        base_id = max_supplier + 1_000_000
+        ops["insert"] = measure(lambda i: _checked(model.insert("supplier", {
+            "supplier_id": base_id + i, "company_name": f"Bench {base_id + i}",
+            "contact_person": "Bench", "phone": "+380500000000", "email": f"bench{base_id + i}@example.ua",
+        })), repeat)
+        ops["update"] = measure(lambda i: _checked(model.update(
+            "supplier", "supplier_id", base_id + i, {"phone": "+380999999999"})), repeat)
+        ops["delete"] = measure(lambda i: _checked(model.delete("supplier", "supplier_id", base_id + i)), repeat)
+
+        report_repeat = max(3, repeat // 20)
+        for name, func in [
+            ("query_supplier_totals", model.query_supplier_totals),
+            ("query_products_below_min_stock", model.query_products_below_min_stock),
+            ("query_category_supply_costs", model.query_category_supply_costs),
+            ("query_top_products_by_supply_volume", model.query_top_products_by_supply_volume),
+            ("query_last_month_supplies", model.query_last_month_supplies),
+        ]:
+            ops[name] = measure(lambda i, f=func: f(), report_repeat)
+
+        row_formats = measure_row_formats(db, min(supply_rows, fetch_rows))
+        return {"supply_rows": supply_rows, "seed": seeded, "operations": ops, "row_formats": row_formats}
+    finally:
+        model.close()
+        drop_database(db)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк DBModel на тимчасовій базі PostgreSQL")
+    parser.add_argument("--scales", default="10000,1000000,10000000",
+                        help="кількості рядків supply через кому")
+    parser.add_argument("--repeat", type=int, default=200, help="повторів кожної точкової операції")
+    parser.add_argument("--seed", type=int, default=42, help="seed вибору ключів")
+    parser.add_argument("--fetch-rows", type=int, default=1_000_000,
+                        help="рядків supply у порівнянні форматів рядків (dict / tuple)")
+    parser.add_argument("--output", help="файл JSON (за замовчуванням stdout)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    with psycopg2.connect(**DB) as conn, conn.cursor() as cur:
+        cur.execute("SHOW server_version")
+        server_version = cur.fetchone()[0]
+    conn.close()
+
+    result = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "server_version": server_version,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "scales": [run_scale(int(n), args.repeat, rng, args.fetch_rows) for n in args.scales.split(",")],
+    }
+
+    out = json.dumps(result, indent=2, ensure_ascii=False, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(out)
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
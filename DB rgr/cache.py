@@ -0,0 +1,109 @@
+# cache.py
+# Обмежений LRU/TTL кеш рядків для select_by_pk з лічильниками влучань.
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+
+class RowCache:
+    # Читання з БД і put не атомарні: рядок, прочитаний до конкурентного запису, не повинен потрапити
+    # в кеш після його invalidate. Тому put приймає version(), взяту до читання, і відкидає рядок,
+    # якщо відтоді ключ або таблицю інвалідовано.
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (table, pk, pk_value) -> (час запису, рядок або None, якщо рядка немає)
+        self._rows: "OrderedDict[Tuple[str, str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        # table -> pk_value -> ключі _rows: інвалідація рядка не перебирає весь кеш
+        self._index: Dict[str, Dict[Hashable, Set[Tuple[str, str, Hashable]]]] = {}
+        # лічильник інвалідацій і номер останньої для таблиці / ключа; найстаріші номери ключів
+        # витісняються, піднімаючи _floor (put після цього хіба зайвий раз відкидається)
+        self._clock = 0
+        self._floor = 0
+        self._table_stamps: Dict[str, int] = {}
+        self._key_stamps: "OrderedDict[Tuple[str, Hashable], int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_puts = 0
+
+    def version(self) -> int:
+        with self._lock:
+            return self._clock
+
+    def get(self, table: str, pk: str, pk_value: Hashable) -> Tuple[bool, Any]:
+        key = (table, pk, pk_value)
+        with self._lock:
+            entry = self._rows.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[0] <= self.ttl):
+                self._rows.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return False, None
+
+    def put(self, table: str, pk: str, pk_value: Hashable, row: Any, version: Optional[int] = None):
+        # version - значення version() до читання рядка; None - без перевірки
+        key = (table, pk, pk_value)
+        with self._lock:
+            if version is not None and max(self._floor, self._table_stamps.get(table, 0),
+                                           self._key_stamps.get((table, pk_value), 0)) > version:
+                self.stale_puts += 1
+                return
+            self._rows[key] = (time.monotonic(), row)
+            self._rows.move_to_end(key)
+            self._index.setdefault(table, {}).setdefault(pk_value, set()).add(key)
+            while len(self._rows) > self.maxsize:
+                self._drop(next(iter(self._rows)))
+                self.evictions += 1
+
+    def invalidate(self, table: str, pk_value: Any = None):
+        # pk_value None - усі рядки таблиці
+        with self._lock:
+            self._clock += 1
+            if pk_value is None:
+                self._table_stamps[table] = self._clock
+                for keys in self._index.pop(table, {}).values():
+                    for key in keys:
+                        del self._rows[key]
+                return
+            self._key_stamps[(table, pk_value)] = self._clock
+            self._key_stamps.move_to_end((table, pk_value))
+            while len(self._key_stamps) > self.maxsize:
+                self._floor = self._key_stamps.popitem(last=False)[1]
+            for key in self._index.get(table, {}).pop(pk_value, ()):
+                del self._rows[key]
+
+    def _drop(self, key: Tuple[str, str, Hashable]):
+        del self._rows[key]
+        keys = self._index[key[0]][key[2]]
+        keys.discard(key)
+        if not keys:
+            del self._index[key[0]][key[2]]
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._index.clear()
+            # рядки, прочитані до clear, теж не повертаються в кеш
+            self._clock += 1
+            self._floor = self._clock
+            self._table_stamps.clear()
+            self._key_stamps.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._rows),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stale_puts": self.stale_puts,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
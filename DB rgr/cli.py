@@ -0,0 +1,380 @@
+# cli.py
+# Неінтерактивний інтерфейс командного рядка для cron і конвеєрів.
+# Модулі з psycopg2 / dateutil імпортуються лише в обробниках команд, а з'єднання
+# відкривається лише для команд, яким потрібна база: `--help` не торкається ні того, ні іншого.
+import argparse
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+TABLES = ["supplier", "product", "supply", "inventory"]
+
+# Назва звіту в CLI -> (метод DBModel, параметри)
+REPORTS = {
+    "supplier-totals": ("query_supplier_totals", ("days",)),
+    "below-min-stock": ("query_products_below_min_stock", ()),
+    "category-costs": ("query_category_supply_costs", ("days",)),
+    "top-products": ("query_top_products_by_supply_volume", ("limit", "days")),
+    "recent-supplies": ("query_last_month_supplies", ("days",)),
+}
+
+
+def _model():
+    from models import DBModel
+    return DBModel()
+
+
+def _error(message: str) -> int:
+    print(f"Помилка: {message}", file=sys.stderr)
+    return 1
+
+
+def _write_rows(rows: Iterable[Any], fmt: str, out) -> int:
+    # json - по одному об'єкту на рядок (JSON Lines), csv - із заголовком; рядки - dict або namedtuple
+    from models import row_dict
+    count = 0
+    if fmt == "csv":
+        import csv
+        writer = None
+        for row in rows:
+            row = row_dict(row)
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+        return count
+    import json
+    for row in rows:
+        out.write(json.dumps(row_dict(row), ensure_ascii=False, default=str) + "\n")
+        count += 1
+    return count
+
+
+def _parse_pk(model, table: str, pk: str, raw: str) -> Any:
+    col_info = next((c for c in model.columns_info(table) if c["name"] == pk), None)
+    return int(raw) if col_info and "int" in col_info["type"] else raw
+
+
+# ----------------- Команди -----------------
+def cmd_generate(args) -> int:
+    model = _model()
+    try:
+        failed = False
+        report = []
+        for name, (ok, err, stats) in model.generate_all(args.count, server=args.server, seed=args.seed):
+            if ok:
+                report.append((name, stats))
+            else:
+                failed = True
+                print(f"{name}: {err}", file=sys.stderr)
+        import views
+        views.show_throughput(report)
+        return 1 if failed else 0
+    finally:
+        model.close()
+
+
+def cmd_show(args) -> int:
+    model = _model()
+    try:
+        rows = model.select_page(args.table, after=args.after, page_size=args.limit)
+        _write_rows(rows, args.format, sys.stdout)
+        return 0
+    finally:
+        model.close()
+
+
+def cmd_get(args) -> int:
+    model = _model()
+    try:
+        pk = model.primary_key(args.table)
+        if not pk:
+            return _error(f"таблиця {args.table} не має первинного ключа")
+        try:
+            pk_value = _parse_pk(model, args.table, pk, args.pk_value)
+        except ValueError:
+            return _error("PK має бути числом")
+        row = model.select_by_pk(args.table, pk, pk_value)
+        if row is None:
+            return _error("рядок не знайдено")
+        _write_rows([row], args.format, sys.stdout)
+        return 0
+    finally:
+        model.close()
+
+
+def cmd_insert(args) -> int:
+    data: Dict[str, Any] = {}
+    for item in args.values:
+        name, sep, value = item.partition("=")
+        if not sep:
+            return _error(f"очікується колонка=значення, отримано {item!r}")
+        # порожнє значення - NULL; решту приводить PostgreSQL за типом колонки
+        data[name] = value if value != "" else None
+    model = _model()
+    try:
+        # без PK у значеннях id резервується з послідовності таблиці
+        ok, err, missing = model.insert_checked(args.table, data, reserve_id=True)
+        for col, parent_table, _ in model.foreign_keys(args.table):
+            if col in missing:
+                return _error(f"{col}={data[col]} не існує у {parent_table}")
+        return 0 if ok else _error(err)
+    finally:
+        model.close()
+
+
+def cmd_report(args) -> int:
+    method, param_names = REPORTS[args.name]
+    params = {name: getattr(args, name) for name in param_names if getattr(args, name) is not None}
+    if args.materialized:
+        params["materialized"] = True
+    model = _model()
+    try:
+        rows, time_ms, explain, err = getattr(model, method)(**params)
+        if err:
+            return _error(err)
+        _write_rows(rows, args.format, sys.stdout)
+        if args.explain:
+            print(explain, file=sys.stderr)
+        # без рядка "Execution Time" у плані час невідомий
+        if time_ms is not None:
+            print(f"Час виконання: {time_ms:.2f} ms", file=sys.stderr)
+        return 0
+    finally:
+        model.close()
+
+
+def _transfer_report(results) -> int:
+    failed = False
+    for table, (ok, err, stats) in results:
+        if ok:
+            print(f"{table}: {stats['rows']} рядків, {stats['bytes']} байт, {stats['seconds']:.2f} с "
+                  f"({stats['rows_per_sec']:.0f} рядків/с) - {stats['path']}", file=sys.stderr)
+        else:
+            failed = True
+            print(f"{table}: {err}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def _transfer(args, run) -> int:
+    unknown = [t for t in args.tables if t not in TABLES]
+    if unknown:
+        return _error(f"невідомі таблиці: {', '.join(unknown)}")
+    import transfer
+    if args.format == "csv" and args.compression and args.compression not in transfer.STREAM_COMPRESSION:
+        return _error(f"стиснення CSV: {', '.join(transfer.STREAM_COMPRESSION)}")
+    model = _model()
+    try:
+        return _transfer_report(run(model, args.tables or TABLES, args.dir, args.format,
+                                    args.compression, args.workers))
+    finally:
+        model.close()
+
+
+def cmd_export(args) -> int:
+    import transfer
+    return _transfer(args, transfer.export_tables)
+
+
+def cmd_import(args) -> int:
+    import transfer
+    return _transfer(args, transfer.import_tables)
+
+
+def cmd_advise(args) -> int:
+    import advisor
+    model = _model()
+    try:
+        report = advisor.advise(model, args.days, args.accept, args.fingerprints)
+    finally:
+        model.close()
+    if args.format == "json":
+        import json
+        print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+    else:
+        import views
+        views.show_advice(report)
+    # ненульовий код при регресії плану - для перевірок у cron/CI
+    return 2 if report["regressions"] else 0
+
+
+def cmd_partitions(args) -> int:
+    model = _model()
+    try:
+        if args.action == "migrate":
+            ok, err = model.partition_supply()
+            if err:
+                print(err, file=sys.stderr)
+            return 0 if ok else 1
+        if not model.supply_partitioned():
+            return _error("supply не секціонована: спершу partitions migrate")
+        if args.action == "ensure":
+            ok, err = model.ensure_supply_partitions(months_ahead=args.months_ahead)
+            if not ok:
+                return _error(err)
+        elif args.action == "detach":
+            if not args.name:
+                return _error("вкажіть назву секції")
+            ok, err = model.detach_supply_partition(args.name, archive=not args.drop)
+            if not ok:
+                return _error(err)
+        elif args.action == "archive":
+            ok, err, names = model.archive_supply_partitions(args.retention_months, archive=not args.drop)
+            for name in names:
+                print(f"{name}: від'єднано", file=sys.stderr)
+            if not ok:
+                return _error(err)
+        import views
+        views.show_partitions(model.supply_partitions())
+        return 0
+    finally:
+        model.close()
+
+
+def cmd_stock(args) -> int:
+    model = _model()
+    try:
+        if args.action == "install":
+            ok, err = model.install_stock_ledger(rebuild=args.rebuild)
+        else:
+            ok, err = model.uninstall_stock_ledger()
+        return 0 if ok else _error(err)
+    finally:
+        model.close()
+
+
+def cmd_search(args) -> int:
+    model = _model()
+    try:
+        if args.install:
+            ok, err = model.install_search()
+            if not ok:
+                return _error(err)
+            if not args.term:
+                return 0
+        if not args.term:
+            return _error("потрібен рядок пошуку або --install")
+        rows, err = model.search(args.term, args.table, args.limit, args.threshold)
+        if err:
+            return _error(err)
+        _write_rows(rows, args.format, sys.stdout)
+        return 0
+    finally:
+        model.close()
+
+
+def cmd_analyze(args) -> int:
+    import analytics
+    model = _model()
+    try:
+        result = analytics.summary(model, args.days, args.window)
+    finally:
+        model.close()
+    import views
+    views.show_analytics(result, args.tail)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="Облік постачань: пакетні команди")
+    parser.add_argument("--timing", action="store_true", help="вивести час виконання команди в stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("generate", help="згенерувати дані в усі таблиці")
+    p.add_argument("count", type=int)
+    p.add_argument("--server", action="store_true", help="generate_series на сервері замість COPY")
+    p.add_argument("--seed", type=int)
+    p.set_defaults(handler=cmd_generate)
+
+    p = commands.add_parser("show", help="сторінка таблиці за PK (keyset)")
+    p.add_argument("table", choices=TABLES)
+    p.add_argument("--after", type=int, help="PK, після якого почати сторінку")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--format", choices=("json", "csv"), default="json")
+    p.set_defaults(handler=cmd_show)
+
+    p = commands.add_parser("get", help="запис за первинним ключем")
+    p.add_argument("table", choices=TABLES)
+    p.add_argument("pk_value")
+    p.add_argument("--format", choices=("json", "csv"), default="json")
+    p.set_defaults(handler=cmd_get)
+
+    p = commands.add_parser("insert", help="додати запис: колонка=значення ...")
+    p.add_argument("table", choices=TABLES)
+    p.add_argument("values", nargs="+", metavar="колонка=значення")
+    p.set_defaults(handler=cmd_insert)
+
+    p = commands.add_parser("report", help="аналітичний звіт")
+    p.add_argument("name", choices=sorted(REPORTS))
+    p.add_argument("--days", type=int)
+    p.add_argument("--limit", type=int)
+    p.add_argument("--materialized", action="store_true", help="читати з матеріалізованих представлень")
+    p.add_argument("--explain", action="store_true", help="вивести план EXPLAIN ANALYZE в stderr")
+    p.add_argument("--format", choices=("json", "csv"), default="json")
+    p.set_defaults(handler=cmd_report)
+
+    for name, handler, help_text in (("export", cmd_export, "вивантажити таблиці через COPY TO"),
+                                     ("import", cmd_import, "завантажити таблиці через COPY FROM")):
+        p = commands.add_parser(name, help=help_text)
+        p.add_argument("tables", nargs="*", metavar="table", help=f"типово - усі: {', '.join(TABLES)}")
+        p.add_argument("-d", "--dir", default=".", help="каталог файлів <таблиця>.<формат>")
+        p.add_argument("--format", choices=("csv", "parquet", "arrow"), default="csv")
+        p.add_argument("--compression", help="csv: gzip, bz2, xz; parquet/arrow: кодек pyarrow (zstd, lz4, ...)")
+        p.add_argument("--workers", type=int, help="таблиць паралельно")
+        p.set_defaults(handler=handler)
+
+    p = commands.add_parser("partitions", help="секціонування supply за місяцями")
+    p.add_argument("action", choices=("migrate", "list", "ensure", "detach", "archive"))
+    p.add_argument("name", nargs="?", help="секція для detach")
+    p.add_argument("--months-ahead", type=int, help="ensure: скільки місяців наперед")
+    p.add_argument("--retention-months", type=int, help="archive: старші секції від'єднуються")
+    p.add_argument("--drop", action="store_true", help="видалити від'єднані секції замість архівної схеми")
+    p.set_defaults(handler=cmd_partitions)
+
+    p = commands.add_parser("stock", help="складська книга: тригери supply -> inventory і прапорець нестачі")
+    p.add_argument("action", choices=("install", "uninstall"))
+    p.add_argument("--rebuild", action="store_true", help="перерахувати залишки з усієї історії supply")
+    p.set_defaults(handler=cmd_stock)
+
+    p = commands.add_parser("search", help="нечіткий пошук товарів і постачальників (pg_trgm)")
+    p.add_argument("term", nargs="?")
+    p.add_argument("--table", action="append", choices=("product", "supplier"),
+                   help="шукати лише в цій таблиці (можна кілька разів)")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--threshold", type=float, help="поріг word_similarity 0..1")
+    p.add_argument("--install", action="store_true", help="створити pg_trgm і триграмні GIN-індекси")
+    p.add_argument("--format", choices=("json", "csv"), default="json")
+    p.set_defaults(handler=cmd_search)
+
+    p = commands.add_parser("analyze", help="аналітика supply у NumPy (бінарний COPY)")
+    p.add_argument("--days", type=int, help="лише останні N днів")
+    p.add_argument("--window", type=int, help="вікно ковзного обсягу, днів")
+    p.add_argument("--tail", type=int, default=10, help="скільки рядків таблиць показати")
+    p.set_defaults(handler=cmd_analyze)
+
+    p = commands.add_parser("advise", help="порадник індексів і регресії планів")
+    p.add_argument("--days", type=int, default=30, help="період для звітів з фільтром за датою")
+    p.add_argument("--accept", action="store_true", help="прийняти поточні плани як базові")
+    p.add_argument("--fingerprints", help="файл відбитків (типово з config.ADVISOR)")
+    p.add_argument("--format", choices=("text", "json"), default="text")
+    p.set_defaults(handler=cmd_advise)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    try:
+        return args.handler(args)
+    except Exception as e:
+        # помилки підключення та бази - повідомлення в stderr і ненульовий код виходу
+        return _error(str(e))
+    finally:
+        if args.timing:
+            print(f"{args.command}: {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
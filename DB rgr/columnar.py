@@ -0,0 +1,159 @@
+# columnar.py
+# Колонковий режим результатів: запит виконується як COPY (...) TO STDOUT (FORMAT binary),
+# а потік розбирається в NumPy-масиви по колонках. Якщо всі колонки фіксованої ширини
+# і без NULL, рядки мають однаковий розмір і весь буфер читається одним np.frombuffer
+# зі структурним dtype; інакше - порядковий розбір з NaN / NaT / None на місці NULL.
+import io
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2 import sql
+
+_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+
+# OID типу -> (приведення в запиті або None, big-endian dtype у потоці); решта типів іде як text
+_INT2, _INT4, _INT8, _FLOAT4, _FLOAT8, _BOOL = 21, 23, 20, 700, 701, 16
+_NUMERIC, _DATE, _TIMESTAMP, _TIMESTAMPTZ = 1700, 1082, 1114, 1184
+_WIRE = {
+    _BOOL: (None, "?"),
+    _INT2: (None, ">i2"),
+    _INT4: (None, ">i4"),
+    _INT8: (None, ">i8"),
+    _FLOAT4: (None, ">f4"),
+    _FLOAT8: (None, ">f8"),
+    # numeric у бінарному вигляді - десяткові цифри по 4; float8 достатньо для аналітики
+    _NUMERIC: ("float8", ">f8"),
+    # дні та мікросекунди від 2000-01-01
+    _DATE: (None, ">i4"),
+    _TIMESTAMP: (None, ">i8"),
+    _TIMESTAMPTZ: (None, ">i8"),
+}
+
+# dtype NumPy -> формат struct для порядкового розбору
+_STRUCT = {"?": ">?", ">i2": ">h", ">i4": ">i", ">i8": ">q", ">f4": ">f", ">f8": ">d"}
+
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise RuntimeError("Для колонкового режиму потрібен numpy (pip install numpy)") from e
+    return numpy
+
+
+def _describe(cur, query: str) -> List[Tuple[str, int]]:
+    cur.execute(f"SELECT * FROM ({query}) q LIMIT 0")
+    return [(d.name, d.type_code) for d in cur.description]
+
+
+def _columns_sql(columns: List[Tuple[str, int]]) -> sql.Composed:
+    parts = []
+    for name, oid in columns:
+        cast = _WIRE[oid][0] if oid in _WIRE else "text"
+        ident = sql.Identifier(name)
+        parts.append(sql.SQL("q.{}::{} AS {}").format(ident, sql.SQL(cast), ident) if cast else
+                     sql.SQL("q.{}").format(ident))
+    return sql.SQL(", ").join(parts)
+
+
+def _finish(np, oid: int, values):
+    # значення з потоку -> масив з рідним порядком байтів і типами дат NumPy
+    epoch_days = np.datetime64("2000-01-01", "D")
+    if oid == _DATE:
+        return epoch_days + values.astype("timedelta64[D]")
+    if oid in (_TIMESTAMP, _TIMESTAMPTZ):
+        return epoch_days.astype("datetime64[us]") + values.astype("timedelta64[us]")
+    return values.astype(values.dtype.newbyteorder("="))
+
+
+def _parse_fixed(np, data: memoryview, offset: int, columns: List[Tuple[str, int]]) -> Optional[Dict[str, Any]]:
+    fields = [("count", ">i2")]
+    for i, (name, oid) in enumerate(columns):
+        fields += [(f"len{i}", ">i4"), (f"col{i}", _WIRE[oid][1])]
+    dtype = np.dtype(fields)
+    body = len(data) - offset - 2  # завершальне -1
+    if body % dtype.itemsize:
+        return None
+    rows = np.frombuffer(data, dtype=dtype, count=body // dtype.itemsize, offset=offset)
+    widths = [dtype[f"col{i}"].itemsize for i in range(len(columns))]
+    # NULL має довжину -1 і зсуває всі наступні рядки: тоді потрібен порядковий розбір
+    if not (rows["count"] == len(columns)).all() or \
+            any(not (rows[f"len{i}"] == w).all() for i, w in enumerate(widths)):
+        return None
+    return {name: _finish(np, oid, rows[f"col{i}"]) for i, (name, oid) in enumerate(columns)}
+
+
+def _parse_rows(np, data: memoryview, offset: int, columns: List[Tuple[str, int]]) -> Dict[str, Any]:
+    raw: List[List[Any]] = [[] for _ in columns]
+    unpack_count, unpack_len = struct.Struct(">h").unpack_from, struct.Struct(">i").unpack_from
+    formats = [struct.Struct(_STRUCT[_WIRE[oid][1]]) if oid in _WIRE else None for _, oid in columns]
+    while True:
+        (count,) = unpack_count(data, offset)
+        offset += 2
+        if count == -1:
+            break
+        for i in range(count):
+            (length,) = unpack_len(data, offset)
+            offset += 4
+            if length == -1:
+                raw[i].append(None)
+                continue
+            if formats[i] is None:
+                raw[i].append(bytes(data[offset:offset + length]).decode("utf-8"))
+            else:
+                raw[i].append(formats[i].unpack_from(data, offset)[0])
+            offset += length
+    result = {}
+    for (name, oid), values in zip(columns, raw):
+        if oid not in _WIRE:
+            result[name] = np.array(values, dtype=object)
+            continue
+        wire = np.dtype(_WIRE[oid][1])
+        if any(v is None for v in values):
+            if oid in (_DATE, _TIMESTAMP, _TIMESTAMPTZ):
+                unit = "D" if oid == _DATE else "us"
+                base = np.datetime64("2000-01-01", unit)
+                result[name] = np.array([base + np.timedelta64(v, unit) if v is not None else np.datetime64("NaT")
+                                         for v in values], dtype=f"datetime64[{unit}]")
+            else:
+                # цілі та логічні з NULL стають float64 з NaN
+                result[name] = np.array([np.nan if v is None else v for v in values], dtype="float64")
+        else:
+            result[name] = _finish(np, oid, np.array(values, dtype=wire.newbyteorder("=")))
+    return result
+
+
+def fetch_columns(model, query: Any, params: Optional[Any] = None,
+                  order_by: Optional[List[str]] = None) -> Dict[str, Any]:
+    # {колонка: np.ndarray}; numeric -> float64, date -> datetime64[D], timestamp(tz) -> datetime64[us] (UTC),
+    # решта типів - масиви str. Запит загортається в SELECT ... FROM (query): його ORDER BY порядку
+    # не гарантує, тому потрібний порядок задається order_by (колонки результату)
+    np = require_numpy()
+    with model.connection() as conn, conn.cursor() as cur:
+        if isinstance(query, sql.Composable):
+            query = query.as_string(cur)
+        # COPY не приймає параметрів: значення підставляються на клієнті
+        inner = cur.mogrify(query, params).decode("utf-8") if params is not None else query
+        columns = _describe(cur, inner)
+        buf = io.BytesIO()
+        order = sql.SQL(" ORDER BY ") + sql.SQL(", ").join(
+            sql.Identifier("q", c) for c in order_by) if order_by else sql.SQL("")
+        cur.copy_expert(sql.SQL("COPY (SELECT {} FROM ({}) q{}) TO STDOUT WITH (FORMAT binary)").format(
+            _columns_sql(columns), sql.SQL(inner), order).as_string(cur), buf)
+    data = buf.getbuffer()
+    if bytes(data[:len(_SIGNATURE)]) != _SIGNATURE:
+        raise ValueError("Неочікуваний формат бінарного COPY")
+    (extension,) = struct.unpack_from(">i", data, len(_SIGNATURE) + 4)
+    offset = len(_SIGNATURE) + 8 + extension
+    fixed = all(oid in _WIRE for _, oid in columns)
+    result = _parse_fixed(np, data, offset, columns) if fixed and columns else None
+    return result if result is not None else _parse_rows(np, data, offset, columns)
+
+
+def fetch_table_columns(model, table: str, columns: Optional[List[str]] = None,
+                        where: Optional[sql.Composable] = None, params: Optional[Any] = None) -> Dict[str, Any]:
+    query = sql.SQL("SELECT {} FROM {}").format(
+        sql.SQL(", ").join(map(sql.Identifier, columns)) if columns else sql.SQL("*"), sql.Identifier(table))
+    if where is not None:
+        query += sql.SQL(" WHERE ") + where
+    return fetch_columns(model, query, params)
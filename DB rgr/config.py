@@ -5,3 +5,155 @@ DB = {
     "user": "postgres",
     "password": ""
 }
+
+# Генерація даних: кількість рядків в одній порції COPY FROM STDIN (і в одному блоці генератора),
+# seed для відтворюваних даних (None - випадковий, повертається у звіті) і кількість процесів
+GENERATE = {
+    "chunk_size": 10000,
+    "seed": None,
+    "workers": 1,
+}
+
+# Кеш метаданих схеми (колонки, PK, FK) у DBModel: час життя в секундах, None - без обмеження
+SCHEMA_CACHE_TTL = None
+
+# Пул з'єднань: межі пулу та кількість паралельних робочих потоків (workers < maxconn)
+POOL = {
+    "minconn": 1,
+    "maxconn": 8,
+    "workers": 4,
+}
+
+# Перегляд таблиць: рядків на сторінці та розмір порції серверного курсора
+BROWSE = {
+    "page_size": 50,
+    "fetch_size": 2000,
+}
+
+# Звіти меню 8 з матеріалізованих представлень, що оновлюються у фоні кожні refresh_interval секунд;
+# recent_days - глибина вітрини для звіту "постачання за останні N днів"
+MATERIALIZED_REPORTS = {
+    "enabled": False,
+    "refresh_interval": 300,
+    "recent_days": 30,
+}
+
+# Пакетний CRUD (insert_many / update_many / delete_many): рядків в одній транзакції
+BATCH = {
+    "page_size": 1000,
+}
+
+# Unit of work (DBModel.unit_of_work): операцій в одній транзакції до проміжного COMMIT;
+# savepoints - кожна операція під SAVEPOINT, помилкова відкочується сама, решта пакета лишається
+UNIT_OF_WORK = {
+    "commit_every": 1000,
+    "savepoints": True,
+}
+
+# Резервування id (послідовності {table}_id_blocks): скільки id next_id бере за одне звернення
+ID_BLOCKS = {
+    "block_size": 1000,
+}
+
+# Інструментування запитів: гістограми затримок, звернення до сервера на дію меню,
+# журнал запитів, довших за slow_query_ms (None - не вести). Вимкнено за замовчуванням:
+# кожне виконання курсора нормалізує текст запиту, а журнал пишеться в поточний каталог
+INSTRUMENTATION = {
+    "enabled": False,
+    "slow_query_ms": 200,
+    "slow_log_path": "slow_queries.log",
+}
+
+# Пул з'єднань AsyncDBModel (psycopg 3)
+ASYNC_POOL = {
+    "min_size": 1,
+    "max_size": 20,
+}
+
+# Представлення рядків select_*, iter_rows і звітів: "dict" - RealDictCursor (словник на рядок),
+# "tuple" - NamedTupleCursor (кортежі зі спільним на запит класом полів, у кілька разів менше пам'яті)
+ROW_FORMAT = "dict"
+
+# Кеш рядків select_by_pk (LRU + необов'язковий TTL, с); notify - розсилати інвалідації
+# іншим процесам через LISTEN/NOTIFY на каналі channel
+ROW_CACHE = {
+    "enabled": False,
+    "maxsize": 10000,
+    "ttl": None,
+    "notify": False,
+    "channel": "dbmodel_row_cache",
+}
+
+# Експорт/імпорт через COPY (transfer.py): паралельні таблиці, розмір блоку розбору CSV
+# для parquet/arrow (байт) і рядків у порції при імпорті колонкових файлів
+TRANSFER = {
+    "workers": 4,
+    "block_size": 4 * 1024 * 1024,
+    "batch_rows": 65536,
+}
+
+# Порадник індексів (advisor.py): таблиці від large_table_rows рядків вважаються великими,
+# max_include - скільки колонок виводу додавати в INCLUDE покривного індексу
+ADVISOR = {
+    "large_table_rows": 10000,
+    "max_include": 3,
+    "fingerprints_path": "plan_fingerprints.json",
+}
+
+# Секціонування supply за місяцями supply_date: months_ahead - скільки майбутніх місяців
+# створювати заздалегідь, retention_months - після скількох місяців секції відходять в архівну схему
+SUPPLY_PARTITIONING = {
+    "enabled": False,
+    "months_ahead": 3,
+    "retention_months": 24,
+    "archive_schema": "archive",
+}
+
+# Складська книга (тригери supply -> inventory, прапорець product.below_min):
+# канал NOTIFY, куди надсилаються id товарів, що щойно опустилися нижче min_stock
+STOCK_LEDGER = {
+    "alert_channel": "stock_low",
+}
+
+# Аналітика постачань (analytics.py): перцентилі цін, вікно ковзного обсягу в днях,
+# скільки найбільших постачальників входить у частку CRn, вікно ковзного середнього ціни (постачань)
+ANALYTICS = {
+    "percentiles": [5, 25, 50, 75, 95],
+    "rolling_days": 7,
+    "price_window": 30,
+    "top_suppliers": 4,
+}
+
+# Пошук за назвами (DBModel.search): колонки з триграмними GIN-індексами по таблицях (перша - назва
+# в результатах), скільки результатів повертати і поріг word_similarity (0..1)
+SEARCH = {
+    "columns": {
+        "product": ["product_name", "category"],
+        "supplier": ["company_name", "contact_person"],
+    },
+    "limit": 20,
+    "threshold": 0.4,
+}
+
+# Навантажувальний тест (loadtest.py): частки операцій у суміші, lock_timeout сеансів працівників (мс),
+# hot_keys - скільки найменших supply_id отримують усі update (0 - рівномірно по таблиці),
+# інтервал опитування pg_stat_activity на очікування блокувань (с)
+LOADTEST = {
+    "workers": 8,
+    "mode": "thread",
+    "duration": 30,
+    "lock_timeout_ms": 2000,
+    "hot_keys": 0,
+    "sample_interval": 0.2,
+    "mix": {
+        "get": 40,
+        "insert": 15,
+        "update": 15,
+        "delete": 5,
+        "supplier-totals": 5,
+        "below-min-stock": 5,
+        "category-costs": 5,
+        "top-products": 5,
+        "recent-supplies": 5,
+    },
+}
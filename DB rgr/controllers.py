@@ -1,5 +1,8 @@
 # controllers.py
-from models import DBModel
+from models import DBModel, row_dict
+from config import MATERIALIZED_REPORTS, SEARCH, SUPPLY_PARTITIONING
+from instrumentation import QUERY_STATS, diff_pg_stat_statements, traced
+import time
 import views
 from typing import Dict, Any
 
@@ -15,6 +18,28 @@ class Controller:
             "supply",
             "inventory",
         ]
+        # знімок pg_stat_statements перед навантаженням (меню 10)
+        self._pgss_before = None
+
+        if MATERIALIZED_REPORTS["enabled"]:
+            ok, err = self.model.create_report_views()
+            if ok:
+                self.model.materialized_reports = True
+                self.model.start_report_refresher()
+            else:
+                views.show_error(f"Матеріалізовані звіти недоступні: {err}")
+
+        if SUPPLY_PARTITIONING["enabled"]:
+            # секції наперед; сама міграція - явно: main.py partitions migrate
+            try:
+                partitioned = self.model.supply_partitioned()
+            except Exception as e:
+                partitioned = False
+                views.show_error(f"Не вдалося перевірити секціонування supply: {e}")
+            if partitioned:
+                ok, err = self.model.ensure_supply_partitions()
+                if not ok:
+                    views.show_error(f"Не вдалося створити секції supply: {err}")
 
     def close(self):
         self.model.close()
@@ -42,6 +67,10 @@ class Controller:
                 self.action_complex_queries()
             elif choice == "9":
                 self.action_demo_check_children()
+            elif choice == "10":
+                self.action_query_stats()
+            elif choice == "11":
+                self.action_search()
             elif choice == "0":
                 print("До побачення!")
                 break
@@ -51,6 +80,7 @@ class Controller:
     # ---------------------------------------------------------
     # 1. Список таблиць
     # ---------------------------------------------------------
+    @traced
     def action_list_tables(self):
         try:
             tables = self.model.list_tables()
@@ -61,20 +91,43 @@ class Controller:
     # ---------------------------------------------------------
     # 2. Показати таблицю
     # ---------------------------------------------------------
+    @traced
     def action_show_table(self):
         table = views.prompt("Назва таблиці")
         if table not in self.tables:
             views.show_error("Невідома таблиця. Приклад: supplier")
             return
+        pk = self.model.primary_key(table)
         try:
-            rows = self.model.select_all(table, limit=500)
-            views.print_rows(rows)
+            rows = self.model.select_page(table)
         except Exception as e:
             views.show_error("Не вдалося отримати записи.")
+            return
+
+        while True:
+            views.print_rows(rows)
+            if not rows:
+                return
+            nav = views.prompt_page_nav()
+            try:
+                if nav == "n":
+                    page = self.model.select_page(table, after=row_dict(rows[-1])[pk])
+                elif nav == "p":
+                    page = self.model.select_page(table, before=row_dict(rows[0])[pk])
+                else:
+                    return
+            except Exception as e:
+                views.show_error("Не вдалося отримати записи.")
+                return
+            if page:
+                rows = page
+            else:
+                views.show_message("Більше записів немає.")
 
     # ---------------------------------------------------------
     # 3. Отримати запис за PK
     # ---------------------------------------------------------
+    @traced
     def action_show_by_pk(self):
         table = views.prompt("Назва таблиці")
         if table not in self.tables:
@@ -154,6 +207,7 @@ class Controller:
     # ---------------------------------------------------------
     # 4. INSERT
     # ---------------------------------------------------------
+    @traced
     def action_insert(self):
         table = views.prompt("Назва таблиці")
         if table not in self.tables:
@@ -162,26 +216,18 @@ class Controller:
 
         data = self._input_and_validate_for_table(table)
 
-        # Перевірка FK для supply і inventory
-        if table == "supply":
-            checks = [
-                ("supplier", "supplier_id"),
-                ("product", "product_id"),
-            ]
-        elif table == "inventory":
-            checks = [
-                ("product", "product_id"),
-            ]
-        else:
-            checks = []
-
-        for parent_table, col in checks:
-            val = data.get(col)
-            if val is None or not self.model.parent_exists(parent_table, col, val):
-                views.show_error(f"{col}={val} не існує у {parent_table}")
+        fks = self.model.foreign_keys(table)
+        for col, parent_table, _ in fks:
+            if data.get(col) is None:
+                views.show_error(f"{col}=None не існує у {parent_table}")
+                return
+        # FK перевіряє сам INSERT; відсутні батьківські значення шукаються лише після відмови.
+        # PK не вводиться - id резервується з послідовності таблиці
+        success, err, missing = self.model.insert_checked(table, data, reserve_id=True)
+        for col, parent_table, _ in fks:
+            if col in missing:
+                views.show_error(f"{col}={data[col]} не існує у {parent_table}")
                 return
-
-        success, err = self.model.insert(table, data)
         if success:
             views.show_success("Запис додано.")
         else:
@@ -190,6 +236,7 @@ class Controller:
     # ---------------------------------------------------------
     # 5. UPDATE
     # ---------------------------------------------------------
+    @traced
     def action_update(self):
         table = views.prompt("Назва таблиці")
         if table not in self.tables:
@@ -209,7 +256,7 @@ class Controller:
         else:
             pk_val = pk_raw
 
-        row = self.model.select_by_pk(table, pk, pk_val)
+        row = row_dict(self.model.select_by_pk(table, pk, pk_val))
         if not row:
             views.show_error("Рядок не знайдено")
             return
@@ -227,15 +274,20 @@ class Controller:
             views.show_message("Нічого не змінено.")
             return
 
-        success, err = self.model.update(table, pk, pk_val, updates)
-        if success:
-            views.show_success("Оновлено.")
-        else:
+        # UPDATE ... RETURNING: новий стан рядка без повторного читання
+        updated, err = self.model.update_returning(table, pk, pk_val, updates)
+        if err:
             views.show_error(f"Помилка: {err}")
+        elif updated is None:
+            views.show_error("Рядок не знайдено (можливо, його щойно видалили)")
+        else:
+            views.show_success("Оновлено.")
+            views.print_row(updated)
 
     # ---------------------------------------------------------
     # 6. DELETE
     # ---------------------------------------------------------
+    @traced
     def action_delete(self):
         table = views.prompt("Назва таблиці")
         if table not in self.tables:
@@ -255,6 +307,7 @@ class Controller:
         else:
             pk_val = pk_raw
 
+        # дочірні записи - до підтвердження; для таблиць без посилань запиту немає
         try:
             if self.model.has_child_rows(table, pk, pk_val):
                 views.show_error("Не можна видалити — є дочірні записи.")
@@ -267,15 +320,21 @@ class Controller:
             views.show_message("Скасовано.")
             return
 
-        success, err = self.model.delete(table, pk, pk_val)
-        if success:
-            views.show_success("Видалено.")
-        else:
+        # повторна перевірка і DELETE - один запит: дочірні записи могли з'явитися під час підтвердження
+        deleted, has_children, err = self.model.delete_guarded(table, pk, pk_val)
+        if err:
             views.show_error(f"Не вдалося: {err}")
+        elif has_children:
+            views.show_error("Не можна видалити — є дочірні записи.")
+        elif not deleted:
+            views.show_error("Рядок не знайдено")
+        else:
+            views.show_success("Видалено.")
 
     # ---------------------------------------------------------
     # 7. Генерація даних
     # ---------------------------------------------------------
+    @traced
     def action_generate(self):
         count_raw = views.prompt("Скільки записів генерувати?")
         try:
@@ -284,46 +343,94 @@ class Controller:
             views.show_error("Потрібно число.")
             return
 
-        tasks = [
-            ("supplier", self.model.generate_suppliers),
-            ("product", self.model.generate_products),
-            ("supply", self.model.generate_supplies),
-            ("inventory", self.model.generate_inventory),
-        ]
+        mode = views.prompt("Режим (1 - COPY з Python, 2 - generate_series на сервері)") or "1"
+        if mode not in ("1", "2"):
+            views.show_error("Невірний режим.")
+            return
+
+        seed = None
+        if mode == "1":
+            seed_raw = views.prompt("Seed (порожньо - випадковий)")
+            if seed_raw:
+                try:
+                    seed = int(seed_raw)
+                except ValueError:
+                    views.show_error("Seed має бути числом.")
+                    return
 
-        for name, func in tasks:
-            ok, err = func(count)
+        report = []
+        for name, (ok, err, stats) in self.model.generate_all(count, server=(mode == "2"), seed=seed):
             if ok:
-                views.show_success(f"{name}: згенеровано {count}")
+                views.show_success(f"{name}: згенеровано {stats['rows']}")
+                report.append((name, stats))
             else:
                 views.show_error(f"{name}: помилка — {err}")
 
+        views.show_throughput(report)
+
     # ---------------------------------------------------------
     # 8. Складні SQL запити
     # ---------------------------------------------------------
+    @traced
     def action_complex_queries(self):
         views.show_message("1) Загальна сума постачань по постачальниках")
         views.show_message("2) Товари нижче мінімального запасу")
         views.show_message("3) Найдорожчі категорії постачань")
-        views.show_message("4) ТОП-10 товарів за обсягом постачань")
-        views.show_message("5) Постачання за останні 30 днів")
+        views.show_message("4) ТОП-N товарів за обсягом постачань")
+        views.show_message("5) Постачання за останні N днів")
+        views.show_message("6) Оновити матеріалізовані звіти")
+        views.show_message("7) Порадник індексів і регресії планів")
+
+        choice = views.prompt("Виберіть запит (1-7)")
+
+        if choice == "7":
+            import advisor
+            try:
+                views.show_advice(advisor.advise(self.model))
+            except Exception as e:
+                views.show_error(f"Помилка: {e}")
+            return
 
-        choice = views.prompt("Виберіть запит (1-5)")
+        if choice == "6":
+            ok, err = self.model.create_report_views()
+            if ok:
+                ok, err = self.model.refresh_report_views()
+            if ok:
+                views.show_success("Матеріалізовані звіти оновлено.")
+            else:
+                views.show_error(f"Помилка: {err}")
+            return
 
         query_map = {
-            "1": self.model.query_supplier_totals,
-            "2": self.model.query_products_below_min_stock,
-            "3": self.model.query_category_supply_costs,
-            "4": self.model.query_top_products_by_supply_volume,
-            "5": self.model.query_last_month_supplies,
+            "1": (self.model.query_supplier_totals, ("days",)),
+            "2": (self.model.query_products_below_min_stock, ()),
+            "3": (self.model.query_category_supply_costs, ("days",)),
+            "4": (self.model.query_top_products_by_supply_volume, ("limit", "days")),
+            "5": (self.model.query_last_month_supplies, ("days",)),
         }
 
-        func = query_map.get(choice)
-        if not func:
+        entry = query_map.get(choice)
+        if not entry:
             views.show_error("Невірний вибір")
             return
+        func, param_names = entry
 
-        rows, time_ms, explain, err = func()
+        prompts = {
+            "days": "Період у днях (порожньо - весь період, для 5 - 30)",
+            "limit": "Кількість товарів у ТОП (порожньо - 10)",
+        }
+        params = {}
+        for name in param_names:
+            raw = views.prompt(prompts[name])
+            if not raw:
+                continue
+            try:
+                params[name] = int(raw)
+            except ValueError:
+                views.show_error("Потрібно число.")
+                return
+
+        rows, time_ms, explain, err = func(**params)
         if err:
             views.show_error(err)
             return
@@ -333,6 +440,7 @@ class Controller:
     # ---------------------------------------------------------
     # 9. Перевірка залежностей
     # ---------------------------------------------------------
+    @traced
     def action_demo_check_children(self):
         table = views.prompt("Назва таблиці")
         if table not in self.tables:
@@ -352,3 +460,81 @@ class Controller:
             views.show_message("Є дочірні записи.")
         else:
             views.show_message("Немає дочірніх записів.")
+
+    # ---------------------------------------------------------
+    # 10. Статистика запитів
+    # ---------------------------------------------------------
+    def action_query_stats(self):
+        views.show_message("1) Найдорожчі запити та звернення до сервера по діях")
+        views.show_message("2) Експорт статистики в JSON")
+        views.show_message("3) Скинути статистику")
+        views.show_message("4) Зробити знімок pg_stat_statements")
+        views.show_message("5) Різниця pg_stat_statements від знімка")
+
+        choice = views.prompt("Виберіть (1-5)")
+        if choice == "1":
+            views.show_query_stats(QUERY_STATS.hot_spots(), QUERY_STATS.snapshot()["actions"])
+            views.show_cache_stats(self.model.row_cache_stats())
+        elif choice == "2":
+            path = views.prompt("Файл (порожньо - query_stats.json)") or "query_stats.json"
+            try:
+                QUERY_STATS.export(path)
+                views.show_success(f"Збережено у {path}")
+            except OSError as e:
+                views.show_error(str(e))
+        elif choice == "3":
+            QUERY_STATS.reset()
+            views.show_success("Статистику скинуто.")
+        elif choice == "4":
+            try:
+                self._pgss_before = self.model.pg_stat_statements_snapshot()
+                views.show_success("Знімок збережено.")
+            except Exception as e:
+                views.show_error(f"pg_stat_statements недоступне: {e}")
+        elif choice == "5":
+            if self._pgss_before is None:
+                views.show_error("Спочатку зробіть знімок (4).")
+                return
+            try:
+                after = self.model.pg_stat_statements_snapshot()
+            except Exception as e:
+                views.show_error(f"pg_stat_statements недоступне: {e}")
+                return
+            views.show_pg_stat_diff(diff_pg_stat_statements(self._pgss_before, after)[:10])
+        else:
+            views.show_error("Невірний вибір")
+
+    # ---------------------------------------------------------
+    # 11. Пошук за назвою
+    # ---------------------------------------------------------
+    @traced
+    def action_search(self):
+        term = views.prompt("Що шукати (назва товару, категорія, компанія, контактна особа)")
+        if not term:
+            views.show_error("Порожній запит")
+            return
+        table = views.prompt("Таблиця (product/supplier, порожньо - обидві)")
+        if table and table not in SEARCH["columns"]:
+            views.show_error(f"Пошук доступний лише в: {', '.join(SEARCH['columns'])}")
+            return
+
+        started = time.perf_counter()
+        rows, err = self.model.search(term, [table] if table else None)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if err:
+            views.show_error(err)
+            if self.model.search_installed() or \
+                    views.prompt("pg_trgm не встановлено. Створити його і триграмні індекси? (y/n)").lower() != "y":
+                return
+            ok, err = self.model.install_search()
+            if not ok:
+                views.show_error(err)
+                return
+            views.show_success("Індекси пошуку створено.")
+            started = time.perf_counter()
+            rows, err = self.model.search(term, [table] if table else None)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if err:
+                views.show_error(err)
+                return
+        views.show_search_results(rows, elapsed_ms)
@@ -0,0 +1,162 @@
+# datagen.py
+# Детермінований потоковий генератор синтетичних даних для COPY FROM STDIN.
+# Простір рядків ділиться на блоки фіксованого розміру; кожен блок має власний
+# random.Random(seed, таблиця, номер блоку), тож результат для заданого seed не залежить
+# від кількості процесів і порядку їх виконання.
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+from multiprocessing import Pool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config import GENERATE
+
+COLUMNS = {
+    "supplier": ["supplier_id", "company_name", "contact_person", "phone", "email"],
+    "product": ["product_id", "product_name", "unit_measure", "min_stock", "category"],
+    "supply": ["supply_id", "supplier_id", "product_id", "supply_date", "document_number", "quantity", "unit_price"],
+    "inventory": ["inventory_id", "product_id", "quantity", "last_updated", "location"],
+}
+
+FIRST_NAMES = ["Іван", "Петро", "Ольга", "Марія", "Андрій"]
+LAST_NAMES = ["Іванов", "Петренко", "Сидоренко", "Коваленко", "Бондаренко"]
+DOMAINS = ["example.ua", "mail.ua", "suppliers.ua"]
+UNITS = ["шт", "уп", "кг", "л"]
+CATEGORIES = ["Комп'ютерна техніка", "Оргтехніка", "Канцтовари", "Витратні матеріали"]
+LOCATIONS = [
+    "Секція A, полиця 1", "Секція A, полиця 2", "Секція A, полиця 3",
+    "Секція B, полиця 1", "Секція B, полиця 2", "Секція B, полиця 3",
+    "Секція C, полиця 1", "Секція C, полиця 2", "Секція C, полиця 3",
+    "Секція D, полиця 1", "Секція D, полиця 2"
+]
+
+# Блок: (таблиця, seed, номер блоку, перший id блоку, кількість рядків, дані блоку)
+Block = Tuple[str, int, int, int, int, Optional[List[int]]]
+
+# Спільні для всіх блоків дані (id батьківських рядків, базовий час); у процесах-працівниках
+# задаються один раз через initializer, а не передаються з кожним блоком
+_context: Dict[str, Any] = {}
+
+
+def default_base_time() -> datetime:
+    # Початок поточної доби: однаковий seed дає однакові дати протягом дня
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def resolve_seed(seed: Optional[int]) -> int:
+    if seed is None:
+        seed = GENERATE["seed"]
+    return seed if seed is not None else random.randrange(2 ** 32)
+
+
+def throughput(rows: int, seconds: float) -> Dict[str, float]:
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else float(rows),
+    }
+
+
+def init_context(context: Dict[str, Any]):
+    global _context
+    _context = context
+
+
+def _block_rng(table: str, seed: int, block: int) -> random.Random:
+    return random.Random(f"{seed}:{table}:{block}")
+
+
+# ----------------- Рядки таблиць (текстовий формат COPY) -----------------
+# Усі значення будуються з фіксованих словників і чисел, тому не містять
+# табуляцій, переносів рядків і зворотних слешів і не потребують екранування.
+def _supplier_block(rng: random.Random, start_id: int, count: int, data, context: Dict[str, Any]) -> str:
+    out = []
+    for supplier_id in range(start_id, start_id + count):
+        out.append(
+            f"{supplier_id}\tКомпанія {supplier_id}\t{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}\t"
+            f"+380{rng.randint(500000000, 999999999)}\tuser{supplier_id}@{rng.choice(DOMAINS)}\n"
+        )
+    return "".join(out)
+
+
+def _product_block(rng: random.Random, start_id: int, count: int, data, context: Dict[str, Any]) -> str:
+    out = []
+    for product_id in range(start_id, start_id + count):
+        out.append(
+            f"{product_id}\tТовар {product_id}\t{rng.choice(UNITS)}\t{rng.randint(1, 100)}\t{rng.choice(CATEGORIES)}\n"
+        )
+    return "".join(out)
+
+
+def _supply_block(rng: random.Random, start_id: int, count: int, data, context: Dict[str, Any]) -> str:
+    supplier_ids = context["supplier_ids"]
+    product_ids = context["product_ids"]
+    base_time = context["base_time"]
+    out = []
+    for supply_id in range(start_id, start_id + count):
+        supply_date = base_time - timedelta(days=rng.randint(0, 365))
+        out.append(
+            f"{supply_id}\t{rng.choice(supplier_ids)}\t{rng.choice(product_ids)}\t"
+            f"{supply_date.isoformat(sep=' ')}\tПН-{supply_id:05d}\t"
+            f"{round(rng.uniform(1, 100), 2)}\t{round(rng.uniform(10, 5000), 2)}\n"
+        )
+    return "".join(out)
+
+
+def _inventory_block(rng: random.Random, start_id: int, count: int, product_ids: List[int],
+                     context: Dict[str, Any]) -> str:
+    base_time = context["base_time"]
+    out = []
+    for offset, product_id in enumerate(product_ids):
+        last_updated = base_time - timedelta(days=rng.randint(0, 365))
+        out.append(
+            f"{start_id + offset}\t{product_id}\t{round(rng.uniform(0, 200), 2)}\t"
+            f"{last_updated.isoformat(sep=' ')}\t{rng.choice(LOCATIONS)}\n"
+        )
+    return "".join(out)
+
+
+_RENDERERS = {
+    "supplier": _supplier_block,
+    "product": _product_block,
+    "supply": _supply_block,
+    "inventory": _inventory_block,
+}
+
+
+def render_block(block: Block, context: Optional[Dict[str, Any]] = None) -> str:
+    # context None - дані процесу-працівника, задані через init_context
+    table, seed, index, start_id, count, data = block
+    return _RENDERERS[table](_block_rng(table, seed, index), start_id, count, data,
+                             _context if context is None else context)
+
+
+# ----------------- Розбиття на блоки -----------------
+def plan_blocks(table: str, seed: int, start_id: int, count: int, block_size: int,
+                picked: Optional[Sequence[int]] = None) -> Iterator[Block]:
+    # Ліниво: для мільярдів рядків у пам'яті лише поточне вікно блоків
+    for index, offset in enumerate(range(0, count, block_size)):
+        size = min(block_size, count - offset)
+        data = list(picked[offset:offset + size]) if picked is not None else None
+        yield table, seed, index, start_id + offset, size, data
+
+
+def sample_products(seed: int, product_ids: Sequence[int], count: int) -> List[int]:
+    # Унікальні product_id для inventory: вибірка без повторення, O(count)
+    return random.Random(f"{seed}:inventory:sample").sample(list(product_ids), min(count, len(product_ids)))
+
+
+def render_blocks(blocks: Iterable[Block], context: Dict[str, Any], workers: int = 1) -> Iterator[str]:
+    # Блоки рендеряться в пулі процесів вікнами по workers * 4 і віддаються в початковому порядку
+    if workers <= 1:
+        # у власному процесі контекст передається явно: генератори можуть працювати в паралельних потоках
+        for block in blocks:
+            yield render_block(block, context)
+        return
+    blocks = iter(blocks)
+    with Pool(workers, initializer=init_context, initargs=(context,)) as pool:
+        while True:
+            window = list(islice(blocks, workers * 4))
+            if not window:
+                break
+            yield from pool.imap(render_block, window)
@@ -0,0 +1,220 @@
+# instrumentation.py
+# Інструментування всіх виконань курсора: гістограми затримок і кількість рядків по запитах,
+# кількість звернень до сервера на дію контролера, журнал повільних запитів.
+import json
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import sql
+
+from config import INSTRUMENTATION
+
+# Верхні межі кошиків гістограми, мс; останній кошик - усе, що довше
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Нормалізується лише початок тексту: пакети execute_values бувають мегабайтними,
+# а ключ статистики однаково обрізається до 300 символів
+NORMALIZE_PREFIX = 4096
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\?[^()]*\)(?: ?, ?\(\?[^()]*\))+")
+_SPACE_RE = re.compile(r"\s+")
+# хвіст обрізаного тексту: незакритий рядковий літерал і недописаний кортеж VALUES
+_OPEN_STRING_RE = re.compile(r"'[^']*$")
+_OPEN_TUPLE_RE = re.compile(r"(\(\.\.\.\)) ?, ?\([^()]*$")
+
+
+def normalize(query: Any) -> str:
+    # Літерали -> ?, списки VALUES з execute_values згортаються, щоб однакові запити групувались
+    if not isinstance(query, (str, bytes)):
+        query = str(query)
+    truncated = len(query) > NORMALIZE_PREFIX
+    query = query[:NORMALIZE_PREFIX]
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    text = _SPACE_RE.sub(" ", str(query)).strip()
+    text = _STRING_RE.sub("?", text)
+    if truncated:
+        text = _OPEN_STRING_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _LIST_RE.sub("(...)", text)
+    if truncated:
+        text = _OPEN_TUPLE_RE.sub(r"\1", text)
+    return text[:300]
+
+
+class Instrumentation:
+    def __init__(self, slow_query_ms: Optional[float] = None, slow_log_path: Optional[str] = None):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._slow_log: Optional[logging.Logger] = None
+        if slow_log_path:
+            self._slow_log = logging.getLogger("dbmodel.slow_queries")
+            self._slow_log.setLevel(logging.INFO)
+            self._slow_log.propagate = False
+            if not self._slow_log.handlers:
+                handler = logging.FileHandler(slow_log_path, encoding="utf-8", delay=True)
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                self._slow_log.addHandler(handler)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements: Dict[str, Dict[str, Any]] = {}
+            self.actions: Dict[str, Dict[str, Any]] = {}
+
+    # ----------------- Дії контролера -----------------
+    def current_action(self) -> Optional[str]:
+        stack = getattr(self._local, "actions", None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def attach(self, name: Optional[str]):
+        # Прив'язати запити поточного потоку до дії, розпочатої в іншому потоці
+        stack = getattr(self._local, "actions", None)
+        if stack is None:
+            stack = self._local.actions = []
+        stack.append(name)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    @contextmanager
+    def action(self, name: str):
+        started = time.perf_counter()
+        try:
+            with self.attach(name):
+                yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                stats = self.actions.setdefault(name, {"calls": 0, "round_trips": 0, "db_ms": 0.0,
+                                                       "wall_ms": 0.0, "errors": {}})
+                stats["calls"] += 1
+                stats["wall_ms"] += elapsed
+
+    # ----------------- Запити -----------------
+    def record(self, query: Any, elapsed_ms: float, rows: int, error_code: Optional[str] = None):
+        key = normalize(query)
+        action = self.current_action()
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                                                "errors": 0, "histogram": [0] * (len(BUCKETS_MS) + 1)}
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["rows"] += max(rows, 0)
+            stats["histogram"][bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+            if error_code:
+                stats["errors"] += 1
+            if action is not None:
+                a = self.actions.setdefault(action, {"calls": 0, "round_trips": 0, "db_ms": 0.0,
+                                                     "wall_ms": 0.0, "errors": {}})
+                a["round_trips"] += 1
+                a["db_ms"] += elapsed_ms
+                if error_code:
+                    a["errors"][error_code] = a["errors"].get(error_code, 0) + 1
+        if self._slow_log and self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            self._slow_log.info("%.2f ms | rows=%s | action=%s | %s", elapsed_ms, rows, action, key)
+
+    def hot_spots(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [dict(stats, query=query) for query, stats in self.statements.items()]
+        items.sort(key=lambda s: s["total_ms"], reverse=True)
+        return items[:limit]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "buckets_ms": list(BUCKETS_MS),
+                "statements": json.loads(json.dumps(self.statements)),
+                "actions": json.loads(json.dumps(self.actions)),
+            }
+
+    def export(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+
+
+QUERY_STATS = Instrumentation(INSTRUMENTATION["slow_query_ms"], INSTRUMENTATION["slow_log_path"])
+
+
+def traced(func):
+    # Декоратор дій контролера: усі запити всередині зараховуються цій дії
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with QUERY_STATS.action(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# ----------------- Курсори та з'єднання -----------------
+class InstrumentedCursorMixin:
+    def _timed(self, query, call):
+        started = time.perf_counter()
+        error_code = None
+        try:
+            return call()
+        except psycopg2.Error as e:
+            error_code = e.pgcode or e.__class__.__name__
+            raise
+        finally:
+            if isinstance(query, sql.Composable):
+                query = query.as_string(self)
+            QUERY_STATS.record(query, (time.perf_counter() - started) * 1000, self.rowcount, error_code)
+
+    def execute(self, query, vars=None):
+        return self._timed(query, lambda: super(InstrumentedCursorMixin, self).execute(query, vars))
+
+    def executemany(self, query, vars_list):
+        return self._timed(query, lambda: super(InstrumentedCursorMixin, self).executemany(query, vars_list))
+
+    def copy_expert(self, query, file, size=8192):
+        return self._timed(query, lambda: super(InstrumentedCursorMixin, self).copy_expert(query, file, size))
+
+
+@lru_cache(maxsize=None)
+def instrumented_cursor(factory: type) -> type:
+    if issubclass(factory, InstrumentedCursorMixin):
+        return factory
+    return type(f"Instrumented{factory.__name__}", (InstrumentedCursorMixin, factory), {})
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    # Будь-який cursor_factory (зокрема RealDictCursor) загортається в інструментовану версію
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = instrumented_cursor(factory)
+        return super().cursor(*args, **kwargs)
+
+
+def diff_pg_stat_statements(before: Dict[Any, Dict[str, Any]],
+                            after: Dict[Any, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Приріст calls / total_ms / rows між двома знімками pg_stat_statements, найдорожчі першими
+    result = []
+    for queryid, stats in after.items():
+        prev = before.get(queryid, {"calls": 0, "total_ms": 0.0, "rows": 0})
+        calls = stats["calls"] - prev["calls"]
+        if calls <= 0:
+            continue
+        result.append({
+            "query": stats["query"],
+            "calls": calls,
+            "total_ms": stats["total_ms"] - prev["total_ms"],
+            "rows": stats["rows"] - prev["rows"],
+        })
+    result.sort(key=lambda s: s["total_ms"], reverse=True)
+    return result
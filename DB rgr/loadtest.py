@@ -0,0 +1,341 @@
+# loadtest.py
+# Навантажувальний тест DBModel: N працівників (потоки або процеси) протягом заданого часу
+# відтворюють зважену суміш дій контролера - пошук за PK, вставку з перевіркою FK, оновлення,
+# видалення з перевіркою дочірніх записів і п'ять звітів. Результат по кожному типу операцій:
+# пропускна здатність, p50/p99 затримки, коди помилок блокувань (40P01, 55P03, 40001),
+# а також приріст pg_stat_database.deadlocks і вибірка очікувань блокувань з pg_stat_activity.
+# Коди помилок рахує інструментований курсор, тож на час тесту INSTRUMENTATION вмикається
+# незалежно від config.
+#
+#   python loadtest.py --workers 16 --mode process --duration 60 --mix get=50,update=30,delete=20
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2
+
+from bench import percentile
+from cli import REPORTS
+from config import DB, INSTRUMENTATION, LOADTEST
+from instrumentation import QUERY_STATS, normalize
+from models import DBModel
+
+# SQLSTATE -> назва в звіті
+LOCK_ERRORS = {
+    "40P01": "deadlocks",
+    "55P03": "lock_timeouts",
+    "40001": "serialization_failures",
+}
+
+ACTION_PREFIX = "loadtest:"
+
+
+# ----------------- Операції -----------------
+class _Worker:
+    def __init__(self, index: int, context: Dict[str, Any], seed: int):
+        self.rng = random.Random(f"{seed}-{index}")
+        self.context = context
+        # lock_timeout перетворює довгі очікування блокувань на помилки 55P03, які видно у звіті
+        options = f"{DB.get('options', '')} -c lock_timeout={LOADTEST['lock_timeout_ms']}".strip()
+        self.model = DBModel(dict(DB, options=options))
+        # власні вставлені рядки: видаляються лише вони, вихідні дані лишаються
+        self.inserted: List[int] = []
+
+    def supply_id(self, hot: bool = False) -> int:
+        lo, hi = self.context["supply_range"]
+        if hot and LOADTEST["hot_keys"]:
+            hi = min(hi, lo + LOADTEST["hot_keys"] - 1)
+        return self.rng.randint(lo, hi)
+
+
+def _get(w: _Worker) -> bool:
+    w.model.select_by_pk("supply", "supply_id", w.supply_id())
+    return True
+
+
+def _insert(w: _Worker) -> bool:
+    # як action_insert: FK перевіряє сам INSERT
+    supply_id = w.model.next_id("supply")
+    data = {
+        "supply_id": supply_id,
+        "supplier_id": w.rng.choice(w.context["supplier_ids"]),
+        "product_id": w.rng.choice(w.context["product_ids"]),
+        "supply_date": date.today(),
+        "document_number": f"НТ-{supply_id}",
+        "quantity": round(w.rng.uniform(1, 100), 2),
+        "unit_price": round(w.rng.uniform(10, 5000), 2),
+    }
+    ok, _, _ = w.model.insert_checked("supply", data)
+    if ok:
+        w.inserted.append(supply_id)
+    return ok
+
+
+def _update(w: _Worker) -> bool:
+    # як action_update: UPDATE ... RETURNING
+    _, err = w.model.update_returning("supply", "supply_id", w.supply_id(hot=True),
+                                      {"quantity": round(w.rng.uniform(1, 100), 2)})
+    return err is None
+
+
+def _delete(w: _Worker) -> bool:
+    # як action_delete: перевірка дочірніх записів і видалення одним запитом
+    if not w.inserted:
+        return True
+    supply_id = w.inserted.pop(w.rng.randrange(len(w.inserted)))
+    _, _, err = w.model.delete_guarded("supply", "supply_id", supply_id)
+    return err is None
+
+
+def _report(method: str) -> Callable[[_Worker], bool]:
+    def run(w: _Worker) -> bool:
+        return getattr(w.model, method)()[3] is None
+    return run
+
+
+OPERATIONS: Dict[str, Callable[[_Worker], bool]] = {
+    "get": _get,
+    "insert": _insert,
+    "update": _update,
+    "delete": _delete,
+    **{name: _report(method) for name, (method, _) in REPORTS.items()},
+}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    # "get=40,insert=10" -> {"get": 40.0, "insert": 10.0}
+    mix = {}
+    for item in text.split(","):
+        name, sep, weight = item.partition("=")
+        name = name.strip()
+        if not sep or name not in OPERATIONS:
+            raise ValueError(f"Невідома операція {name!r}; доступні: {', '.join(OPERATIONS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def run_worker(index: int, context: Dict[str, Any], mix: Dict[str, float], duration: float, seed: int,
+               own_stats: bool) -> Dict[str, Any]:
+    # own_stats - окремий процес зі своїм QUERY_STATS: коди помилок повертаються разом із затримками
+    if own_stats:
+        # при spawn процес читає config заново
+        INSTRUMENTATION["enabled"] = True
+        QUERY_STATS.reset()
+    worker = _Worker(index, context, seed)
+    names, weights = list(mix), list(mix.values())
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    failures = dict.fromkeys(names, 0)
+    # винятки, що вийшли з операції: SQLSTATE або клас (PoolError, обрив з'єднання)
+    raised: Dict[str, Dict[str, int]] = {name: {} for name in names}
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            name = worker.rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                with QUERY_STATS.action(ACTION_PREFIX + name):
+                    ok = OPERATIONS[name](worker)
+            except psycopg2.Error as e:
+                code = e.pgcode or e.__class__.__name__
+                raised[name][code] = raised[name].get(code, 0) + 1
+                ok = False
+            samples[name].append((time.perf_counter() - started) * 1000)
+            if not ok:
+                failures[name] += 1
+    finally:
+        worker.model.close()
+    return {
+        "samples": samples,
+        "failures": failures,
+        "raised": raised,
+        "actions": QUERY_STATS.snapshot()["actions"] if own_stats else None,
+    }
+
+
+# ----------------- Спостереження за сервером -----------------
+class LockSampler(threading.Thread):
+    # Окреме з'єднання раз на interval рахує сеанси, що чекають на блокування, і їхні запити
+    def __init__(self, interval: float):
+        super().__init__(name="lock-sampler", daemon=True)
+        self.interval = interval
+        self.stop = threading.Event()
+        self.samples = 0
+        self.waiting_total = 0
+        self.max_waiting = 0
+        self.queries: Dict[str, int] = {}
+
+    def run(self):
+        conn = psycopg2.connect(**DB)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                while not self.stop.wait(self.interval):
+                    cur.execute("""
+                        SELECT query FROM pg_stat_activity
+                        WHERE datname = current_database() AND wait_event_type = 'Lock'
+                    """)
+                    waiting = [normalize(q) for (q,) in cur.fetchall()]
+                    self.samples += 1
+                    self.waiting_total += len(waiting)
+                    self.max_waiting = max(self.max_waiting, len(waiting))
+                    for query in waiting:
+                        self.queries[query] = self.queries.get(query, 0) + 1
+        finally:
+            conn.close()
+
+    def report(self) -> Dict[str, Any]:
+        top = sorted(self.queries.items(), key=lambda kv: kv[1], reverse=True)[:5]
+        return {
+            "samples": self.samples,
+            "avg_waiting": self.waiting_total / self.samples if self.samples else 0.0,
+            "max_waiting": self.max_waiting,
+            "top_queries": [{"query": q, "samples": n} for q, n in top],
+        }
+
+
+def _deadlocks(model: DBModel) -> int:
+    with model.conn.cursor() as cur:
+        # статистика читається знімком на транзакцію; скидаємо його, щоб бачити свіжі лічильники
+        cur.execute("SELECT pg_stat_clear_snapshot()")
+        cur.execute("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+        return cur.fetchone()[0]
+
+
+def load_context(model: DBModel) -> Dict[str, Any]:
+    with model.conn.cursor() as cur:
+        cur.execute("""
+            SELECT (SELECT array_agg(supplier_id) FROM supplier),
+                   (SELECT array_agg(product_id) FROM product),
+                   (SELECT MIN(supply_id) FROM supply),
+                   (SELECT MAX(supply_id) FROM supply)
+        """)
+        supplier_ids, product_ids, lo, hi = cur.fetchone()
+    if not supplier_ids or not product_ids or lo is None:
+        raise RuntimeError("Порожня база: спершу згенеруйте дані (python main.py generate N)")
+    return {"supplier_ids": supplier_ids, "product_ids": product_ids, "supply_range": (lo, hi)}
+
+
+# ----------------- Звіт -----------------
+def summarize(results: List[Dict[str, Any]], actions: Dict[str, Dict[str, Any]],
+              seconds: float) -> Dict[str, Dict[str, Any]]:
+    operations = {}
+    names = sorted({name for r in results for name in r["samples"]})
+    for name in names + ["total"]:
+        if name == "total":
+            samples = [s for r in results for ms in r["samples"].values() for s in ms]
+            failed = sum(n for r in results for n in r["failures"].values())
+            errors: Dict[str, int] = {}
+            for a in actions.values():
+                for code, n in a["errors"].items():
+                    errors[code] = errors.get(code, 0) + n
+            raised: Dict[str, int] = {}
+            for r in results:
+                for codes in r["raised"].values():
+                    for code, n in codes.items():
+                        raised[code] = raised.get(code, 0) + n
+        else:
+            samples = [s for r in results for s in r["samples"].get(name, [])]
+            failed = sum(r["failures"].get(name, 0) for r in results)
+            errors = dict(actions.get(ACTION_PREFIX + name, {}).get("errors", {}))
+            raised = {}
+            for r in results:
+                for code, n in r["raised"].get(name, {}).items():
+                    raised[code] = raised.get(code, 0) + n
+        if not samples:
+            continue
+        stats = {
+            "count": len(samples),
+            "failed": failed,
+            "ops_per_sec": len(samples) / seconds if seconds > 0 else 0.0,
+            "p50_ms": percentile(samples, 50),
+            "p99_ms": percentile(samples, 99),
+            "max_ms": max(samples),
+            # errors - кожен невдалий запит (і ті, що метод перетворив на (ok, err));
+            # raised - винятки, що перервали операцію
+            "errors": errors,
+            "raised": raised,
+        }
+        for code, key in LOCK_ERRORS.items():
+            stats[key] = errors.get(code, 0)
+        operations[name] = stats
+    return operations
+
+
+def _merge_actions(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    merged: Dict[str, Dict[str, Any]] = {}
+    for r in results:
+        for name, a in (r["actions"] or {}).items():
+            if not name.startswith(ACTION_PREFIX):
+                continue
+            errors = merged.setdefault(name, {"errors": {}})["errors"]
+            for code, n in a["errors"].items():
+                errors[code] = errors.get(code, 0) + n
+    return merged
+
+
+def run(workers: int, mode: str, duration: float, mix: Dict[str, float], seed: int) -> Dict[str, Any]:
+    instrumented = INSTRUMENTATION["enabled"]
+    INSTRUMENTATION["enabled"] = True
+    model = DBModel()
+    try:
+        context = load_context(model)
+        deadlocks_before = _deadlocks(model)
+        QUERY_STATS.reset()
+        sampler = LockSampler(LOADTEST["sample_interval"])
+        sampler.start()
+        executor_class = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+        started = time.perf_counter()
+        try:
+            with executor_class(max_workers=workers) as executor:
+                futures = [executor.submit(run_worker, i, context, mix, duration, seed, mode == "process")
+                           for i in range(workers)]
+                results = [f.result() for f in futures]
+        finally:
+            sampler.stop.set()
+            sampler.join()
+        seconds = time.perf_counter() - started
+        actions = _merge_actions(results) if mode == "process" else {
+            name: a for name, a in QUERY_STATS.snapshot()["actions"].items() if name.startswith(ACTION_PREFIX)}
+        deadlocks_after = _deadlocks(model)
+    finally:
+        model.close()
+        INSTRUMENTATION["enabled"] = instrumented
+    return {
+        "meta": {"workers": workers, "mode": mode, "duration": duration, "seconds": seconds,
+                 "mix": mix, "seed": seed, "lock_timeout_ms": LOADTEST["lock_timeout_ms"],
+                 "hot_keys": LOADTEST["hot_keys"]},
+        "operations": summarize(results, actions, seconds),
+        "server": {"deadlocks": deadlocks_after - deadlocks_before, "lock_waits": sampler.report()},
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Навантажувальний тест DBModel сумішшю дій контролера")
+    parser.add_argument("--workers", type=int, default=LOADTEST["workers"])
+    parser.add_argument("--mode", choices=["thread", "process"], default=LOADTEST["mode"])
+    parser.add_argument("--duration", type=float, default=LOADTEST["duration"], help="секунд")
+    parser.add_argument("--mix", help="операція=вага через кому (за замовчуванням LOADTEST['mix'])")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="також записати звіт у JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix) if args.mix else dict(LOADTEST["mix"])
+    except ValueError as e:
+        parser.error(str(e))
+    report = run(args.workers, args.mode, args.duration, mix, args.seed)
+
+    import views
+    views.show_load_test(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 # main.py
-from controllers import Controller
+import sys
+
 
 def main():
+    # з аргументами - пакетний режим (cli.py), без них - інтерактивне меню
+    if len(sys.argv) > 1:
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
+
+    from controllers import Controller
     ctrl = Controller()
     try:
         ctrl.run()
@@ -1,137 +1,700 @@
 # models.py
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Callable
+import io
+import json
+import logging
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 from psycopg2 import sql
-from config import DB
-from dateutil import parser as date_parser
-import random
-from datetime import datetime, timedelta
+from config import (DB, BATCH, BROWSE, GENERATE, ID_BLOCKS, INSTRUMENTATION, MATERIALIZED_REPORTS, POOL, ROW_CACHE,
+                    ROW_FORMAT, SCHEMA_CACHE_TTL, SEARCH, STOCK_LEDGER, SUPPLY_PARTITIONING, UNIT_OF_WORK)
+from cache import RowCache
+from instrumentation import QUERY_STATS, InstrumentedConnection
+from datetime import date, datetime, timedelta
+import datagen
+from queries import (SCHEMA_QUERY, ID_BLOCKS_INSTALL, REPORT_QUERIES, REPORT_VIEWS, REPORT_VIEW_QUERIES, SERVER_GENERATE, SUPPLY_PARTITIONS_QUERY,
+                     SUPPLY_GUARD_COMMENT, SUPPLY_GUARDS_QUERY, SUPPLY_UNIQUE_GUARD, SUPPLY_UNIQUE_INDEXES_QUERY,
+                     LOW_STOCK_FLAGGED_QUERY, SEARCH_EXTENSION, SEARCH_INDEX, SEARCH_INDEX_INVALID, STOCK_LEDGER_INSTALL, STOCK_LEDGER_REBUILD, STOCK_LEDGER_UNINSTALL,
+                     SUPPLY_PARTITION_CREATE, SUPPLY_PARTITION_FROM_DEFAULT, SUPPLY_PARTITION_HAS_DEFAULT, SUPPLY_PARTITION_IN_DEFAULT,
+                     BatchResult, GenerateResult, ReportResult, Row, add_months, build_schema, id_sequence, month_starts,
+                     partition_bounds)
+
+
+# ROW_FORMAT -> фабрика курсорів; NamedTupleCursor кешує клас namedtuple за набором колонок
+ROW_FACTORIES = {
+    "dict": psycopg2.extras.RealDictCursor,
+    "tuple": psycopg2.extras.NamedTupleCursor,
+}
+
+
+def row_dict(row: Any) -> Optional[Dict[str, Any]]:
+    # Рядок будь-якого ROW_FORMAT як словник (для виводу, CSV/JSON і доступу за назвою колонки)
+    if row is None or isinstance(row, dict):
+        return row
+    return row._asdict()
+
+
+def _own_row(row: Any) -> Any:
+    # копія для кешу: кортежі незмінні, словник викликач може змінити
+    return dict(row) if isinstance(row, dict) else row
 
 
 class DBModel:
-    def __init__(self):
+    def __init__(self, db: Optional[Dict[str, Any]] = None, row_format: Optional[str] = None):
+        self.row_format = row_format or ROW_FORMAT
+        if self.row_format not in ROW_FACTORIES:
+            raise ValueError(f"Невідомий формат рядків {self.row_format!r}: {', '.join(ROW_FACTORIES)}")
+        self._row_factory = ROW_FACTORIES[self.row_format]
         try:
-            self.conn = psycopg2.connect(**DB)
+            options = dict(db or DB)
+            if INSTRUMENTATION["enabled"]:
+                options["connection_factory"] = InstrumentedConnection
+            self.pool = psycopg2.pool.ThreadedConnectionPool(POOL["minconn"], POOL["maxconn"], **options)
+            self._connect_options = options
+            # ThreadedConnectionPool не чекає, а кидає PoolError: зайві потоки чекають на семафорі.
+            # Одне місце з maxconn постійно займає self.conn
+            self._slots = threading.BoundedSemaphore(_pool_slots())
+            # основне з'єднання для інтерактивних операцій; паралельні задачі беруть свої з пулу
+            self.conn = self.pool.getconn()
             self.conn.autocommit = True
         except Exception as e:
             raise RuntimeError("Не вдалося підключитися до бази даних. Перевірте налаштування в config.py") from e
+        self._schema_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._schema_loaded_at = 0.0
+        # звіти з матеріалізованих представлень (див. create_report_views)
+        self.materialized_reports = False
+        self._refresher: Optional[Tuple[threading.Thread, threading.Event]] = None
+        self.row_cache: Optional[RowCache] = None
+        self._listener: Optional[Tuple[threading.Thread, threading.Event]] = None
+        # таблиці з уже перевіреною послідовністю id і локальні блоки next_id: таблиця -> [наступний, кінець)
+        self._id_sequences: set = set()
+        self._id_blocks: Dict[str, List[int]] = {}
+        self._id_lock = threading.Lock()
+        if ROW_CACHE["enabled"]:
+            self.row_cache = RowCache(ROW_CACHE["maxsize"], ROW_CACHE["ttl"])
+            if ROW_CACHE["notify"]:
+                self.start_cache_listener()
 
     def close(self):
-        self.conn.close()
+        self.stop_report_refresher()
+        self.stop_cache_listener()
+        self.pool.closeall()
+
+    # ----------------- Пул з'єднань -----------------
+    def _checkout(self):
+        self._slots.acquire()
+        try:
+            return self.pool.getconn()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkin(self, conn):
+        try:
+            self.pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        try:
+            conn.autocommit = True
+            yield conn
+        finally:
+            self._checkin(conn)
+
+    def run_parallel(self, tasks: List[Tuple[str, Callable[..., Any], tuple]],
+                     workers: Optional[int] = None) -> List[Tuple[str, Any]]:
+        # Незалежні задачі (name, func, args) виконуються в пулі потоків, кожна на своєму з'єднанні
+        action = QUERY_STATS.current_action()
+
+        def call(func, args):
+            with QUERY_STATS.attach(action):
+                return func(*args)
+
+        # більше потоків, ніж вільних з'єднань, лише чекали б на семафорі
+        with ThreadPoolExecutor(max_workers=min(workers or POOL["workers"], _pool_slots())) as executor:
+            futures = [(name, executor.submit(call, func, args)) for name, func, args in tasks]
+            return [(name, future.result()) for name, future in futures]
+
+    # ----------------- Кеш метаданих схеми -----------------
+    def _schema(self) -> Dict[str, Dict[str, Any]]:
+        ttl = SCHEMA_CACHE_TTL
+        if self._schema_cache is None or (ttl is not None and time.monotonic() - self._schema_loaded_at > ttl):
+            self._schema_cache = self._load_schema()
+            self._schema_loaded_at = time.monotonic()
+        return self._schema_cache
+
+    def _load_schema(self) -> Dict[str, Dict[str, Any]]:
+        # Колонки, PK та FK усіх таблиць public одним запитом до pg_catalog
+        with self.conn.cursor() as cur:
+            cur.execute(SCHEMA_QUERY)
+            return build_schema(cur.fetchall())
+
+    def invalidate_schema(self):
+        # Викликати після DDL, якщо TTL не задано
+        self._schema_cache = None
 
     # ----------------- Generic CRUD -----------------
     def list_tables(self) -> List[str]:
-        q = """
-        SELECT table_name
-        FROM information_schema.tables
-        WHERE table_schema='public' AND table_type='BASE TABLE'
-        ORDER BY table_name;
-        """
-        with self.conn.cursor() as cur:
-            cur.execute(q)
-            return [r[0] for r in cur.fetchall()]
+        return sorted(self._schema())
 
     def columns_info(self, table: str) -> List[Dict[str, Any]]:
-        q = """
-        SELECT column_name, data_type, is_nullable
-        FROM information_schema.columns
-        WHERE table_schema='public' AND table_name=%s
-        ORDER BY ordinal_position;
-        """
-        with self.conn.cursor() as cur:
-            cur.execute(q, (table,))
-            res = []
-            for r in cur.fetchall():
-                res.append({"name": r[0], "type": r[1], "nullable": (r[2] == 'YES')})
-            return res
+        meta = self._schema().get(table)
+        return [dict(c) for c in meta["columns"]] if meta else []
 
     def primary_key(self, table: str) -> Optional[str]:
-        q = """
-        SELECT a.attname
-        FROM pg_index i
-        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-        WHERE i.indrelid = quote_ident(%s)::regclass AND i.indisprimary;
-        """
-        with self.conn.cursor() as cur:
-            cur.execute(q, (table,))
-            row = cur.fetchone()
-            return row[0] if row else None
+        meta = self._schema().get(table)
+        return meta["pk"][0] if meta and meta["pk"] else None
+
+    def foreign_keys(self, table: str) -> List[Tuple[str, str, str]]:
+        # [(колонка, батьківська таблиця, батьківська колонка)]
+        meta = self._schema().get(table)
+        return list(meta["fks"]) if meta else []
 
-    def select_all(self, table: str, limit: int = 200) -> List[Dict[str, Any]]:
-        with self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+    def referencing_keys(self, parent_table: str, parent_column: str) -> List[Tuple[str, str]]:
+        # [(дочірня таблиця, колонка FK)], що посилаються на parent_table.parent_column
+        meta = self._schema().get(parent_table)
+        if not meta:
+            return []
+        return [(table, column) for table, column, parent_col in meta["children"] if parent_col == parent_column]
+
+    def select_all(self, table: str, limit: int = 200) -> List[Row]:
+        with self.conn.cursor(cursor_factory=self._row_factory) as cur:
             cur.execute(sql.SQL('SELECT * FROM {} ORDER BY 1 LIMIT %s').format(sql.Identifier(table)), (limit,))
             return cur.fetchall()
 
-    def select_by_pk(self, table: str, pk: str, pk_value: Any) -> Optional[Dict[str, Any]]:
-        with self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+    def select_page(self, table: str, after: Any = None, before: Any = None,
+                    page_size: Optional[int] = None) -> List[Row]:
+        # Keyset-пагінація за PK: сторінка після after або перед before, без OFFSET
+        pk = self.primary_key(table)
+        if not pk:
+            raise ValueError(f"Таблиця {table} не має первинного ключа")
+        page_size = page_size or BROWSE["page_size"]
+        table_id, pk_id = sql.Identifier(table), sql.Identifier(pk)
+        with self.conn.cursor(cursor_factory=self._row_factory) as cur:
+            if before is not None:
+                cur.execute(sql.SQL('SELECT * FROM {} WHERE {} < %s ORDER BY {} DESC LIMIT %s').format(
+                    table_id, pk_id, pk_id), (before, page_size))
+                return list(reversed(cur.fetchall()))
+            if after is not None:
+                cur.execute(sql.SQL('SELECT * FROM {} WHERE {} > %s ORDER BY {} LIMIT %s').format(
+                    table_id, pk_id, pk_id), (after, page_size))
+            else:
+                cur.execute(sql.SQL('SELECT * FROM {} ORDER BY {} LIMIT %s').format(table_id, pk_id), (page_size,))
+            return cur.fetchall()
+
+    @contextmanager
+    def iter_rows(self, table: str, fetch_size: Optional[int] = None) -> Iterator[Iterator[Row]]:
+        # Потокове читання всієї таблиці іменованим (серверним) курсором порціями по fetch_size.
+        # Курсор тримає з'єднання пулу й транзакцію, тож лише з with - вихід їх звільняє,
+        # навіть якщо рядки дочитано не до кінця:
+        #   with model.iter_rows("supply") as rows:
+        #       for row in rows: ...
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                with conn.cursor(name=f"iter_{table}", cursor_factory=self._row_factory) as cur:
+                    cur.itersize = fetch_size or BROWSE["fetch_size"]
+                    cur.execute(sql.SQL('SELECT * FROM {}').format(sql.Identifier(table)))
+                    yield iter(cur)
+            finally:
+                conn.rollback()
+
+    def select_by_pk(self, table: str, pk: str, pk_value: Any) -> Optional[Row]:
+        if self.row_cache is not None:
+            hit, row = self.row_cache.get(table, pk, pk_value)
+            if hit:
+                # копія: зміни рядка викликачем не потрапляють у кеш
+                return _own_row(row) if row is not None else None
+            # інвалідація між цим моментом і put означає, що прочитаний рядок міг застаріти
+            version = self.row_cache.version()
+        with self.conn.cursor(cursor_factory=self._row_factory) as cur:
             cur.execute(sql.SQL('SELECT * FROM {} WHERE {}=%s').format(sql.Identifier(table), sql.Identifier(pk)), (pk_value,))
-            return cur.fetchone()
-
-    def insert(self, table: str, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-        cols = list(data.keys())
-        vals = [data[c] for c in cols]
-        query = sql.SQL('INSERT INTO {} ({}) VALUES ({})').format(
-            sql.Identifier(table),
-            sql.SQL(', ').join(map(sql.Identifier, cols)),
-            sql.SQL(', ').join(sql.Placeholder() * len(cols))
-        )
+            row = cur.fetchone()
+        if self.row_cache is not None:
+            # відсутній рядок теж кешується; insert його інвалідує
+            self.row_cache.put(table, pk, pk_value, _own_row(row) if row is not None else None, version)
+        return row
+
+    def insert(self, table: str, data: Dict[str, Any], reserve_id: bool = False) -> Tuple[bool, Optional[str]]:
+        ok, err, _ = self._insert(table, data, reserve_id)
+        return ok, err
+
+    def insert_checked(self, table: str, data: Dict[str, Any],
+                       reserve_id: bool = False) -> Tuple[bool, Optional[str], Dict[str, List[Any]]]:
+        # FK перевіряє сам INSERT; missing_parents - лише після порушення FK, щоб назвати відсутні значення.
+        # Успішна вставка - одне звернення замість двох
+        ok, err, pgcode = self._insert(table, data, reserve_id)
+        missing = self.missing_parents(table, [data]) if pgcode == _FK_VIOLATION else {}
+        return ok, err, missing
+
+    def _insert(self, table: str, data: Dict[str, Any],
+                reserve_id: bool = False) -> Tuple[bool, Optional[str], Optional[str]]:
+        # (успіх, текст помилки, SQLSTATE); reserve_id - рядок без PK отримує id з next_id
+        if reserve_id:
+            try:
+                data = self._with_id(table, data)
+            except psycopg2.Error as e:
+                return False, e.pgerror or str(e), e.pgcode
         with self.conn.cursor() as cur:
             try:
-                cur.execute(query, vals)
-                return True, None
+                cols = tuple(data.keys())
+                cur.execute(_insert_sql(table, cols), [data[c] for c in cols])
+                pk = self.primary_key(table)
+                # без явного PK невідомо, який закешований "відсутній" рядок з'явився
+                self.invalidate_rows(table, [data[pk]] if pk in data else None, cur=cur)
+                return True, None, None
             except psycopg2.Error as e:
-                return False, e.pgerror or str(e)
+                return False, e.pgerror or str(e), e.pgcode
 
     def update(self, table: str, pk: str, pk_value: Any, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-        cols = list(data.keys())
+        cols = tuple(data.keys())
         vals = [data[c] for c in cols] + [pk_value]
-        set_clause = sql.SQL(', ').join(
-            sql.Composed([sql.Identifier(c), sql.SQL(' = '), sql.Placeholder()]) for c in cols
-        )
-        query = sql.SQL('UPDATE {} SET {} WHERE {} = %s').format(
-            sql.Identifier(table),
-            set_clause,
-            sql.Identifier(pk)
-        )
         with self.conn.cursor() as cur:
             try:
-                cur.execute(query, vals)
+                cur.execute(_update_sql(table, pk, cols), vals)
+                keys = [pk_value, data[pk]] if pk in data else [pk_value]
+                self.invalidate_rows(table, keys, cascade=pk in data, cur=cur)
                 return True, None
             except psycopg2.Error as e:
                 return False, e.pgerror or str(e)
 
+    def update_returning(self, table: str, pk: str, pk_value: Any,
+                         data: Dict[str, Any]) -> Tuple[Optional[Row], Optional[str]]:
+        # Оновлений рядок з UPDATE ... RETURNING *: без повторного select_by_pk; None - рядка немає
+        cols = tuple(data.keys())
+        with self.conn.cursor(cursor_factory=self._row_factory) as cur:
+            try:
+                cur.execute(_update_sql(table, pk, cols) + sql.SQL(" RETURNING *"),
+                            [data[c] for c in cols] + [pk_value])
+                row = cur.fetchone()
+            except psycopg2.Error as e:
+                return None, e.pgerror or str(e)
+        keys = [pk_value, data[pk]] if pk in data else [pk_value]
+        self.invalidate_rows(table, keys, cascade=pk in data)
+        return row, None
+
+    def delete_guarded(self, table: str, pk: str, pk_value: Any) -> Tuple[bool, bool, Optional[str]]:
+        # (видалено, є дочірні записи, помилка): перевірка has_child_rows і DELETE одним запитом
+        refs = self.referencing_keys(table, pk)
+        blocked = sql.SQL(" OR ").join(
+            sql.SQL("EXISTS (SELECT 1 FROM {} WHERE {} = %(key)s)").format(sql.Identifier(t), sql.Identifier(c))
+            for t, c in refs
+        ) if refs else sql.SQL("false")
+        query = sql.SQL("""
+            WITH blocked AS (SELECT {} AS b),
+                 deleted AS (DELETE FROM {} WHERE {} = %(key)s AND NOT (SELECT b FROM blocked) RETURNING 1)
+            SELECT (SELECT b FROM blocked), (SELECT count(*) FROM deleted)
+        """).format(blocked, sql.Identifier(table), sql.Identifier(pk))
+        with self.conn.cursor() as cur:
+            try:
+                cur.execute(query, {"key": pk_value})
+                has_children, deleted = cur.fetchone()
+            except psycopg2.Error as e:
+                return False, False, e.pgerror or str(e)
+        if deleted:
+            self.invalidate_rows(table, [pk_value], cascade=True)
+        return bool(deleted), has_children, None
+
     def delete(self, table: str, pk: str, pk_value: Any) -> Tuple[bool, Optional[str]]:
-        query = sql.SQL('DELETE FROM {} WHERE {} = %s').format(sql.Identifier(table), sql.Identifier(pk))
         with self.conn.cursor() as cur:
             try:
-                cur.execute(query, (pk_value,))
+                cur.execute(_delete_sql(table, pk), (pk_value,))
+                self.invalidate_rows(table, [pk_value], cascade=True, cur=cur)
                 return True, None
             except psycopg2.Error as e:
                 return False, e.pgerror or str(e)
 
+    # ----------------- Пошук за назвами -----------------
+    def search_installed(self) -> bool:
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            return cur.fetchone()[0]
+
+    def install_search(self) -> Tuple[bool, Optional[str]]:
+        # pg_trgm і GIN-індекс на кожну колонку SEARCH["columns"]; CONCURRENTLY - поза транзакцією
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                cur.execute(SEARCH_EXTENSION)
+                for table, columns in SEARCH["columns"].items():
+                    for column in columns:
+                        index = f"{table}_{column}_trgm_idx"
+                        cur.execute(SEARCH_INDEX_INVALID, (index,))
+                        invalid = cur.fetchone()
+                        if invalid and invalid[0]:
+                            cur.execute(sql.SQL("DROP INDEX CONCURRENTLY {}").format(sql.Identifier(index)))
+                        cur.execute(sql.SQL(SEARCH_INDEX).format(
+                            index=sql.Identifier(index), table=sql.Identifier(table), column=sql.Identifier(column)))
+            except psycopg2.Error as e:
+                return False, e.pgerror or str(e)
+        return True, None
+
+    def search(self, term: str, tables: Optional[List[str]] = None, limit: Optional[int] = None,
+               threshold: Optional[float] = None) -> Tuple[List[Row], Optional[str]]:
+        # Рядки (source, id, label, detail, rank) за спаданням word_similarity. Кожна таблиця -
+        # окремий підзапит з власним LIMIT по триграмних індексах, потім спільне впорядкування
+        limit = limit or SEARCH["limit"]
+        threshold = SEARCH["threshold"] if threshold is None else threshold
+        parts = []
+        for table in tables or SEARCH["columns"]:
+            if table not in SEARCH["columns"]:
+                raise ValueError(f"Пошук не налаштований для таблиці {table}")
+            columns = [sql.Identifier(c) for c in SEARCH["columns"][table]]
+            parts.append(sql.SQL(
+                "(SELECT {source} AS source, {pk} AS id, {label} AS label, concat_ws(' / ', {rest}) AS detail, "
+                "GREATEST({rank}) AS rank FROM {table} WHERE {match} ORDER BY rank DESC LIMIT %(limit)s)"
+            ).format(
+                source=sql.Literal(table),
+                pk=sql.Identifier(self.primary_key(table)),
+                label=columns[0],
+                rest=sql.SQL(", ").join(columns[1:]) if len(columns) > 1 else sql.SQL("NULL"),
+                rank=sql.SQL(", ").join(sql.SQL("word_similarity(%(term)s, {})").format(c) for c in columns),
+                table=sql.Identifier(table),
+                match=sql.SQL(" OR ").join(sql.SQL("%(term)s <%% {}").format(c) for c in columns),
+            ))
+        # поріг задається лише на цю транзакцію й іде тим самим зверненням, що й запит
+        query = (sql.SQL("SELECT set_config('pg_trgm.word_similarity_threshold', %(threshold)s, true); ")
+                 + sql.SQL(" UNION ALL ").join(parts) + sql.SQL(" ORDER BY rank DESC LIMIT %(limit)s"))
+        params = {"term": term, "limit": limit, "threshold": str(threshold)}
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                with conn.cursor(cursor_factory=self._row_factory) as cur:
+                    cur.execute(query, params)
+                    return cur.fetchall(), None
+            except psycopg2.Error as e:
+                return [], e.pgerror or str(e)
+            finally:
+                conn.rollback()
+
+    # ----------------- Unit of work -----------------
+    def unit_of_work(self, commit_every: Optional[int] = None, savepoints: Optional[bool] = None) -> "UnitOfWork":
+        return UnitOfWork(self, commit_every, savepoints)
+
+    # ----------------- Резервування id -----------------
+    def ensure_id_sequence(self, table: str):
+        # Послідовність id таблиці, піднята до MAX(pk); перевіряється раз за життя моделі
+        if table in self._id_sequences:
+            return
+        pk = self.primary_key(table)
+        if not pk:
+            raise ValueError(f"Таблиця {table} не має первинного ключа")
+        params = {
+            "seq": sql.Identifier(id_sequence(table)),
+            "seq_name": sql.Literal(id_sequence(table)),
+            "pk": sql.Identifier(pk),
+            "table": sql.Identifier(table),
+        }
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                with conn.cursor() as cur:
+                    for statement in ID_BLOCKS_INSTALL:
+                        cur.execute(sql.SQL(statement).format(**params))
+                conn.commit()
+            except psycopg2.Error:
+                conn.rollback()
+                raise
+        self._id_sequences.add(table)
+
+    def reserve_ids(self, table: str, count: int) -> int:
+        # Перший з count послідовних id, яких не отримає жоден інший виклик (інші процеси, тригери)
+        self.ensure_id_sequence(table)
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT dbmodel_reserve_ids(%s, %s)", (id_sequence(table), max(count, 1)))
+            return cur.fetchone()[0]
+
+    def next_id(self, table: str) -> int:
+        # hi/lo: блок з ID_BLOCKS["block_size"] id резервується одним зверненням, далі id видаються локально
+        with self._id_lock:
+            block = self._id_blocks.get(table)
+            if block is None or block[0] >= block[1]:
+                start = self.reserve_ids(table, ID_BLOCKS["block_size"])
+                block = self._id_blocks[table] = [start, start + ID_BLOCKS["block_size"]]
+            block[0] += 1
+            return block[0] - 1
+
+    def _with_id(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Рядок без цілочисельного PK отримує id з блоку next_id. Лише на явний запит (reserve_id):
+        # перший виклик для таблиці створює її послідовність (DDL)
+        pk = self.primary_key(table)
+        if not pk or pk in data:
+            return data
+        col_info = next((c for c in self.columns_info(table) if c["name"] == pk), None)
+        if not col_info or "int" not in col_info["type"]:
+            return data
+        return dict(data, **{pk: self.next_id(table)})
+
+    # ----------------- Кеш рядків -----------------
+    def invalidate_rows(self, table: str, pk_values: Optional[List[Any]] = None, cascade: bool = False,
+                        notify: bool = True, cur=None):
+        # pk_values None - уся таблиця; cascade - також дочірні таблиці (ON DELETE/UPDATE CASCADE, SET NULL).
+        # cur - курсор викликача, на його з'єднанні йде NOTIFY (без другого з'єднання з пулу)
+        if self.row_cache is None:
+            return
+        tables = [table]
+        if cascade:
+            meta = self._schema().get(table)
+            tables += sorted({child for child, _, _ in meta["children"]}) if meta else []
+        if table in _LEDGER_DEPENDENTS and self.stock_ledger_installed():
+            # тригери складської книги змінюють залишки й прапорці невідомих наперед рядків
+            tables += _LEDGER_DEPENDENTS[table]
+        for t in tables:
+            if t == table and pk_values is not None:
+                for value in pk_values:
+                    self.row_cache.invalidate(t, value)
+            else:
+                self.row_cache.invalidate(t)
+        if notify:
+            self._notify_invalidation(table, pk_values, cascade, cur)
+
+    def _notify_invalidation(self, table: str, pk_values: Optional[List[Any]], cascade: bool, cur=None):
+        # NOTIFY обмежений 8000 байтами; великі пакети та ключі не-JSON типів інвалідують таблицю цілком
+        if self.row_cache is None or not ROW_CACHE["notify"]:
+            return
+        try:
+            payload = json.dumps({"table": table, "keys": pk_values, "cascade": cascade})
+        except TypeError:
+            payload = None
+        if payload is None or len(payload.encode("utf-8")) > 7900:
+            payload = json.dumps({"table": table, "keys": None, "cascade": cascade})
+        params = (ROW_CACHE["channel"], payload)
+        if cur is not None and not cur.connection.autocommit:
+            # у транзакції викликача: повідомлення піде разом з COMMIT і зникне з ROLLBACK
+            cur.execute("SELECT pg_notify(%s, %s)", params)
+            return
+        try:
+            if cur is not None:
+                cur.execute("SELECT pg_notify(%s, %s)", params)
+            else:
+                with self.conn.cursor() as own:
+                    own.execute("SELECT pg_notify(%s, %s)", params)
+        except psycopg2.Error as e:
+            # локальний кеш уже інвалідовано, але інші процеси триматимуть старі рядки до TTL
+            # (з ttl=None - назавжди), тож втрата повідомлення не мовчазна
+            _cache_log.warning("Інвалідацію %s не розіслано: %s", table, e.pgerror or e)
+
+    def row_cache_stats(self) -> Optional[Dict[str, Any]]:
+        return self.row_cache.stats() if self.row_cache is not None else None
+
+    def start_cache_listener(self):
+        # Окреме (не з пулу) з'єднання слухає інвалідації від інших процесів
+        if self._listener is not None or self.row_cache is None:
+            return
+        conn = psycopg2.connect(**self._connect_options)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(ROW_CACHE["channel"])))
+        stop = threading.Event()
+
+        def loop():
+            try:
+                while not stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        message = json.loads(conn.notifies.pop(0).payload)
+                        self.invalidate_rows(message["table"], message["keys"], message["cascade"], notify=False)
+            finally:
+                conn.close()
+
+        thread = threading.Thread(target=loop, name="row-cache-listener", daemon=True)
+        thread.start()
+        self._listener = (thread, stop)
+
+    def stop_cache_listener(self):
+        if self._listener is None:
+            return
+        thread, stop = self._listener
+        stop.set()
+        thread.join()
+        self._listener = None
+
+    # ----------------- Пакетний CRUD -----------------
+    def _apply_batches(self, items: Iterable[Any], bulk: Callable[[Any, List[Any]], int],
+                       single: Callable[[Any, Any], int], page_size: Optional[int] = None) -> BatchResult:
+        # Кожна сторінка - одна транзакція з одним пакетним запитом. Якщо він падає,
+        # сторінка повторюється по рядку під SAVEPOINT, щоб відсіяти лише помилкові рядки.
+        page_size = page_size or BATCH["page_size"]
+        done = 0
+        errors: List[Tuple[int, str]] = []
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                with conn.cursor() as cur:
+                    for offset, page in _pages(items, page_size):
+                        cur.execute("SAVEPOINT batch_page")
+                        try:
+                            done += bulk(cur, page)
+                            cur.execute("RELEASE SAVEPOINT batch_page")
+                        except psycopg2.Error:
+                            cur.execute("ROLLBACK TO SAVEPOINT batch_page")
+                            for i, item in enumerate(page):
+                                cur.execute("SAVEPOINT batch_row")
+                                try:
+                                    done += single(cur, item)
+                                    cur.execute("RELEASE SAVEPOINT batch_row")
+                                except psycopg2.Error as e:
+                                    cur.execute("ROLLBACK TO SAVEPOINT batch_row")
+                                    errors.append((offset + i, e.pgerror or str(e)))
+                        conn.commit()
+            finally:
+                conn.rollback()
+        return done, errors
+
+    def _values_template(self, table: str, cols: Tuple[str, ...]) -> str:
+        # Явні приведення типів для VALUES, інакше PostgreSQL вважає літерали text
+        types = {c["name"]: c["type"] for c in self.columns_info(table)}
+        return "(" + ", ".join(f"%s::{types[c]}" for c in cols) + ")"
+
+    def insert_many(self, table: str, rows: Iterable[Dict[str, Any]], page_size: Optional[int] = None) -> BatchResult:
+        def bulk(cur, page):
+            count = 0
+            for cols, group in _group_by_columns(page):
+                psycopg2.extras.execute_values(
+                    cur, sql.SQL('INSERT INTO {} ({}) VALUES %s').format(
+                        sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, cols))
+                    ).as_string(cur),
+                    [tuple(r[c] for c in cols) for r in group], page_size=len(group)
+                )
+                count += cur.rowcount
+            return count
+
+        def single(cur, row):
+            cols = tuple(row.keys())
+            cur.execute(_insert_sql(table, cols), [row[c] for c in cols])
+            return cur.rowcount
+
+        try:
+            return self._apply_batches(rows, bulk, single, page_size)
+        finally:
+            self.invalidate_rows(table)
+
+    def update_many(self, table: str, pk: str, rows: Iterable[Dict[str, Any]],
+                    page_size: Optional[int] = None) -> BatchResult:
+        # Кожен рядок містить значення PK та колонки, які треба змінити
+        def bulk(cur, page):
+            count = 0
+            for cols, group in _group_by_columns(page):
+                set_cols = [c for c in cols if c != pk]
+                ordered = (pk,) + tuple(set_cols)
+                query = sql.SQL('UPDATE {} AS t SET {} FROM (VALUES %s) AS v ({}) WHERE t.{} = v.{}').format(
+                    sql.Identifier(table),
+                    sql.SQL(', ').join(
+                        sql.SQL('{} = v.{}').format(sql.Identifier(c), sql.Identifier(c)) for c in set_cols
+                    ),
+                    sql.SQL(', ').join(map(sql.Identifier, ordered)),
+                    sql.Identifier(pk), sql.Identifier(pk)
+                ).as_string(cur)
+                psycopg2.extras.execute_values(
+                    cur, query, [tuple(r[c] for c in ordered) for r in group],
+                    template=self._values_template(table, ordered), page_size=len(group)
+                )
+                count += cur.rowcount
+            return count
+
+        def single(cur, row):
+            cols = tuple(c for c in row if c != pk)
+            cur.execute(_update_sql(table, pk, cols), [row[c] for c in cols] + [row[pk]])
+            return cur.rowcount
+
+        try:
+            return self._apply_batches(rows, bulk, single, page_size)
+        finally:
+            self.invalidate_rows(table)
+
+    def delete_many(self, table: str, pk: str, keys: Iterable[Any], page_size: Optional[int] = None) -> BatchResult:
+        pk_type = next(c["type"] for c in self.columns_info(table) if c["name"] == pk)
+
+        def bulk(cur, page):
+            cur.execute(sql.SQL('DELETE FROM {} WHERE {} = ANY(%s::{}[])').format(
+                sql.Identifier(table), sql.Identifier(pk), sql.SQL(pk_type)
+            ), (page,))
+            return cur.rowcount
+
+        def single(cur, key):
+            cur.execute(_delete_sql(table, pk), (key,))
+            return cur.rowcount
+
+        try:
+            return self._apply_batches(keys, bulk, single, page_size)
+        finally:
+            self.invalidate_rows(table, cascade=True)
+
     # ----------------- Helpers -----------------
     def has_child_rows(self, parent_table: str, parent_pk: str, pk_value: Any) -> bool:
-        q = """
-        SELECT c.table_name, kcu.column_name
-        FROM information_schema.table_constraints c
-        JOIN information_schema.key_column_usage kcu
-          ON c.constraint_name = kcu.constraint_name AND c.table_schema = kcu.table_schema
-        JOIN information_schema.constraint_column_usage ccu
-          ON c.constraint_name = ccu.constraint_name AND c.table_schema = ccu.constraint_schema
-        WHERE c.constraint_type = 'FOREIGN KEY' AND ccu.table_name = %s AND ccu.column_name = %s;
-        """
+        # Усі FK-посилання перевіряються одним запитом EXISTS(...) OR EXISTS(...)
+        refs = self.referencing_keys(parent_table, parent_pk)
+        if not refs:
+            return False
+        query = sql.SQL('SELECT ') + sql.SQL(' OR ').join(
+            sql.SQL('EXISTS (SELECT 1 FROM {} WHERE {} = %s)').format(sql.Identifier(t), sql.Identifier(c))
+            for t, c in refs
+        )
         with self.conn.cursor() as cur:
-            cur.execute(q, (parent_table, parent_pk))
-            fks = cur.fetchall()
-            for fk_table, fk_col in fks:
-                check_q = sql.SQL('SELECT EXISTS (SELECT 1 FROM {} WHERE {} = %s LIMIT 1)').format(
-                    sql.Identifier(fk_table), sql.Identifier(fk_col)
-                )
-                cur.execute(check_q, (pk_value,))
-                if cur.fetchone()[0]:
-                    return True
-        return False
+            cur.execute(query, [pk_value] * len(refs))
+            return cur.fetchone()[0]
+
+    def missing_parents(self, table: str, rows: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        # Для кожної FK-колонки - значення з rows, яких немає в батьківській таблиці.
+        # Один запит UNION ALL на всі FK; значення передаються масивами.
+        fks = self.foreign_keys(table)
+        rows = list(rows)
+        types = {c["name"]: c["type"] for c in self.columns_info(table)}
+        parts, params, values = [], [], {}
+        for col, parent_table, parent_col in fks:
+            distinct = list(dict.fromkeys(r[col] for r in rows if r.get(col) is not None))
+            if not distinct:
+                continue
+            values[col] = distinct
+            parts.append(sql.SQL(
+                'SELECT %s, u.ord FROM unnest(%s::{}[]) WITH ORDINALITY AS u(v, ord) '
+                'WHERE NOT EXISTS (SELECT 1 FROM {} p WHERE p.{} = u.v)'
+            ).format(sql.SQL(types[col]), sql.Identifier(parent_table), sql.Identifier(parent_col)))
+            params += [col, distinct]
+        if not parts:
+            return {}
+        missing: Dict[str, List[Any]] = {}
+        with self.conn.cursor() as cur:
+            cur.execute(sql.SQL(' UNION ALL ').join(parts), params)
+            for col, ord_ in cur.fetchall():
+                missing.setdefault(col, []).append(values[col][ord_ - 1])
+        return missing
+
+    def blocking_children(self, table: str, keys: Iterable[Any]) -> Dict[Any, List[str]]:
+        # Для кожного ключа - дочірні таблиці, рядки яких не дають його видалити
+        pk = self.primary_key(table)
+        refs = self.referencing_keys(table, pk)
+        keys = list(dict.fromkeys(keys))
+        if not refs or not keys:
+            return {}
+        pk_type = next(c["type"] for c in self.columns_info(table) if c["name"] == pk)
+        parts = [
+            sql.SQL(
+                'SELECT %s, u.ord FROM unnest(%s::{}[]) WITH ORDINALITY AS u(v, ord) '
+                'WHERE EXISTS (SELECT 1 FROM {} c WHERE c.{} = u.v)'
+            ).format(sql.SQL(pk_type), sql.Identifier(t), sql.Identifier(c))
+            for t, c in refs
+        ]
+        params: List[Any] = []
+        for t, _ in refs:
+            params += [t, keys]
+        blocked: Dict[Any, List[str]] = {}
+        with self.conn.cursor() as cur:
+            cur.execute(sql.SQL(' UNION ALL ').join(parts), params)
+            for child_table, ord_ in cur.fetchall():
+                blocked.setdefault(keys[ord_ - 1], []).append(child_table)
+        return blocked
 
     def parent_exists(self, parent_table: str, parent_pk: str, pk_value: Any) -> bool:
         with self.conn.cursor() as cur:
@@ -141,117 +704,781 @@ class DBModel:
             return cur.fetchone()[0]
 
     def parse_date(self, value: str) -> Optional[str]:
+        # dateutil імпортується лише тут: більшість запусків дат не розбирає
+        from dateutil import parser as date_parser
         try:
             d = date_parser.parse(value)
             return d.date().isoformat()
         except Exception:
             return None
 
-    # ----------------- Генерація даних -----------------
-    def generate_suppliers(self, count: int) -> Tuple[bool, Optional[str]]:
-        first_names = ["Іван", "Петро", "Ольга", "Марія", "Андрій"]
-        last_names = ["Іванов", "Петренко", "Сидоренко", "Коваленко", "Бондаренко"]
-        domains = ["example.ua", "mail.ua", "suppliers.ua"]
+    # ----------------- Аналітичні запити -----------------
+    def _run_report(self, query: sql.Composable, params: Dict[str, Any]) -> ReportResult:
+        # Рядки результату + серверний час виконання та план з EXPLAIN (ANALYZE, BUFFERS)
+        with self.connection() as conn, conn.cursor(cursor_factory=self._row_factory) as cur, \
+                conn.cursor() as plain:
+            try:
+                cur.execute(query, params)
+                rows = cur.fetchall()
+                plain.execute(sql.SQL("EXPLAIN (ANALYZE, BUFFERS) ") + query, params)
+                plan = [r[0] for r in plain.fetchall()]
+            except psycopg2.Error as e:
+                return [], None, "", e.pgerror or str(e)
+        time_ms = None
+        for line in plan:
+            if line.startswith("Execution Time:"):
+                time_ms = float(line.split(":")[1].split()[0])
+        return rows, time_ms, "\n".join(plan), None
+
+    def _use_views(self, materialized: Optional[bool]) -> bool:
+        return self.materialized_reports if materialized is None else materialized
+
+    def query_supplier_totals(self, days: Optional[int] = None, materialized: Optional[bool] = None) -> ReportResult:
+        if self._use_views(materialized) and not days:
+            return self._run_report(sql.SQL(REPORT_VIEW_QUERIES["supplier_totals"]), {})
+        window = sql.SQL("AND sp.supply_date >= now() - make_interval(days => %(days)s)") if days else sql.SQL("")
+        return self._run_report(sql.SQL(REPORT_QUERIES["supplier_totals"]).format(window=window), {"days": days})
+
+    def query_products_below_min_stock(self, materialized: Optional[bool] = None) -> ReportResult:
+        if self._use_views(materialized):
+            return self._run_report(sql.SQL(REPORT_VIEW_QUERIES["products_below_min_stock"]), {})
+        if self.stock_ledger_installed():
+            # лише товари з прапорцем - частковий індекс замість повного з'єднання
+            return self._run_report(sql.SQL(LOW_STOCK_FLAGGED_QUERY), {})
+        return self._run_report(sql.SQL(REPORT_QUERIES["products_below_min_stock"]), {})
+
+    def query_category_supply_costs(self, days: Optional[int] = None,
+                                    materialized: Optional[bool] = None) -> ReportResult:
+        if self._use_views(materialized) and not days:
+            return self._run_report(sql.SQL(REPORT_VIEW_QUERIES["category_supply_costs"]), {})
+        window = sql.SQL("WHERE sp.supply_date >= now() - make_interval(days => %(days)s)") if days else sql.SQL("")
+        return self._run_report(sql.SQL(REPORT_QUERIES["category_supply_costs"]).format(window=window), {"days": days})
+
+    def query_top_products_by_supply_volume(self, limit: int = 10, days: Optional[int] = None,
+                                            materialized: Optional[bool] = None) -> ReportResult:
+        if self._use_views(materialized) and not days:
+            return self._run_report(sql.SQL(REPORT_VIEW_QUERIES["top_products_by_supply_volume"]), {"limit": limit})
+        window = sql.SQL("WHERE sp.supply_date >= now() - make_interval(days => %(days)s)") if days else sql.SQL("")
+        return self._run_report(sql.SQL(REPORT_QUERIES["top_products_by_supply_volume"]).format(window=window),
+                                {"days": days, "limit": limit})
+
+    def query_last_month_supplies(self, days: int = 30, materialized: Optional[bool] = None) -> ReportResult:
+        # вітрина містить лише останні recent_days днів; довший період рахується по supply
+        if self._use_views(materialized) and days <= MATERIALIZED_REPORTS["recent_days"]:
+            return self._run_report(sql.SQL(REPORT_VIEW_QUERIES["last_month_supplies"]), {"days": days})
+        return self._run_report(sql.SQL(REPORT_QUERIES["last_month_supplies"]), {"days": days})
+
+    def run_reports(self, reports: List[Tuple[str, Callable[..., ReportResult], tuple]]) -> List[Tuple[str, ReportResult]]:
+        # Кілька звітів одночасно, кожен на окремому з'єднанні пулу
+        return self.run_parallel(reports)
+
+    # ----------------- pg_stat_statements -----------------
+    def pg_stat_statements_snapshot(self) -> Dict[Any, Dict[str, Any]]:
+        # Потребує розширення pg_stat_statements; до PostgreSQL 13 колонка називалась total_time
+        total = "total_exec_time" if self.conn.server_version >= 130000 else "total_time"
         with self.conn.cursor() as cur:
+            cur.execute(sql.SQL("""
+                SELECT queryid, query, calls, {}, rows
+                FROM pg_stat_statements
+                WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+            """).format(sql.Identifier(total)))
+            return {
+                r[0]: {"query": r[1], "calls": r[2], "total_ms": r[3], "rows": r[4]}
+                for r in cur.fetchall()
+            }
+
+    # ----------------- Матеріалізовані звіти -----------------
+    def create_report_views(self) -> Tuple[bool, Optional[str]]:
+        recent_days = sql.Literal(MATERIALIZED_REPORTS["recent_days"])
+        with self.connection() as conn, conn.cursor() as cur:
             try:
-                cur.execute("SELECT COALESCE(MAX(supplier_id),0)+1 FROM supplier")
-                start_id = cur.fetchone()[0]
-                for i in range(count):
-                    supplier_id = start_id + i
-                    company_name = f"Компанія {supplier_id}"
-                    contact_person = f"{random.choice(first_names)} {random.choice(last_names)}"
-                    phone = f"+380{random.randint(500000000, 999999999)}"
-                    email = f"user{supplier_id}@{random.choice(domains)}"
-                    cur.execute("""
-                        INSERT INTO supplier(supplier_id, company_name, contact_person, phone, email)
-                        VALUES (%s,%s,%s,%s,%s)
-                    """, (supplier_id, company_name, contact_person, phone, email))
+                for name, (query, unique_cols, sort_col) in REPORT_VIEWS.items():
+                    cur.execute(sql.SQL("CREATE MATERIALIZED VIEW IF NOT EXISTS {} AS ").format(sql.Identifier(name))
+                                + sql.SQL(query).format(recent_days=recent_days))
+                    # унікальний індекс потрібен для REFRESH ... CONCURRENTLY
+                    cur.execute(sql.SQL("CREATE UNIQUE INDEX IF NOT EXISTS {} ON {} ({})").format(
+                        sql.Identifier(f"{name}_key"), sql.Identifier(name),
+                        sql.SQL(', ').join(map(sql.Identifier, unique_cols))
+                    ))
+                    if sort_col:
+                        cur.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({})").format(
+                            sql.Identifier(f"{name}_{sort_col}_idx"), sql.Identifier(name), sql.Identifier(sort_col)
+                        ))
                 return True, None
             except psycopg2.Error as e:
                 return False, e.pgerror or str(e)
 
-    def generate_products(self, count: int) -> Tuple[bool, Optional[str]]:
-        units = ["шт", "уп", "кг", "л"]
-        categories = ["Комп'ютерна техніка", "Оргтехніка", "Канцтовари", "Витратні матеріали"]
-        with self.conn.cursor() as cur:
+    def drop_report_views(self) -> Tuple[bool, Optional[str]]:
+        with self.connection() as conn, conn.cursor() as cur:
             try:
-                cur.execute("SELECT COALESCE(MAX(product_id),0)+1 FROM product")
-                start_id = cur.fetchone()[0]
-                for i in range(count):
-                    product_id = start_id + i
-                    product_name = f"Товар {product_id}"
-                    unit_measure = random.choice(units)
-                    min_stock = random.randint(1, 100)
-                    category = random.choice(categories)
-                    cur.execute("""
-                        INSERT INTO product(product_id, product_name, unit_measure, min_stock, category)
-                        VALUES (%s,%s,%s,%s,%s)
-                    """, (product_id, product_name, unit_measure, min_stock, category))
+                for name in REPORT_VIEWS:
+                    cur.execute(sql.SQL("DROP MATERIALIZED VIEW IF EXISTS {}").format(sql.Identifier(name)))
                 return True, None
             except psycopg2.Error as e:
                 return False, e.pgerror or str(e)
 
-    def generate_supplies(self, count: int) -> Tuple[bool, Optional[str]]:
-        with self.conn.cursor() as cur:
+    def refresh_report_views(self, concurrently: bool = True) -> Tuple[bool, Optional[str]]:
+        # CONCURRENTLY не блокує читання звітів під час оновлення
+        mode = sql.SQL("CONCURRENTLY ") if concurrently else sql.SQL("")
+        with self.connection() as conn, conn.cursor() as cur:
             try:
-                # FK: get existing supplier_ids and product_ids
-                cur.execute("SELECT supplier_id FROM supplier")
-                supplier_ids = [r[0] for r in cur.fetchall()]
-                cur.execute("SELECT product_id FROM product")
-                product_ids = [r[0] for r in cur.fetchall()]
-                if not supplier_ids or not product_ids:
-                    return False, "Відсутні дані для FK"
-
-                cur.execute("SELECT COALESCE(MAX(supply_id),0)+1 FROM supply")
-                start_id = cur.fetchone()[0]
-
-                for i in range(count):
-                    supply_id = start_id + i
-                    supplier_id = random.choice(supplier_ids)
-                    product_id = random.choice(product_ids)
-                    supply_date = datetime.now() - timedelta(days=random.randint(0, 365))
-                    document_number = f"ПН-{supply_id:05d}"
-                    quantity = round(random.uniform(1, 100), 2)
-                    unit_price = round(random.uniform(10, 5000), 2)
-                    cur.execute("""
-                        INSERT INTO supply(supply_id, supplier_id, product_id, supply_date, document_number, quantity, unit_price)
-                        VALUES (%s,%s,%s,%s,%s,%s,%s)
-                    """, (supply_id, supplier_id, product_id, supply_date, document_number, quantity, unit_price))
+                for name in REPORT_VIEWS:
+                    cur.execute(sql.SQL("REFRESH MATERIALIZED VIEW {}{}").format(mode, sql.Identifier(name)))
                 return True, None
             except psycopg2.Error as e:
                 return False, e.pgerror or str(e)
 
-    def generate_inventory(self, count: int) -> Tuple[bool, Optional[str]]:
-        locations = [
-            "Секція A, полиця 1", "Секція A, полиця 2", "Секція A, полиця 3",
-            "Секція B, полиця 1", "Секція B, полиця 2", "Секція B, полиця 3",
-            "Секція C, полиця 1", "Секція C, полиця 2", "Секція C, полиця 3",
-            "Секція D, полиця 1", "Секція D, полиця 2"
-        ]
-        with self.conn.cursor() as cur:
+    def start_report_refresher(self, interval: Optional[float] = None):
+        if self._refresher is not None:
+            return
+        interval = interval or MATERIALIZED_REPORTS["refresh_interval"]
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.refresh_report_views()
+
+        thread = threading.Thread(target=loop, name="report-refresher", daemon=True)
+        thread.start()
+        self._refresher = (thread, stop)
+
+    def stop_report_refresher(self):
+        if self._refresher is None:
+            return
+        thread, stop = self._refresher
+        stop.set()
+        thread.join()
+        self._refresher = None
+
+    # ----------------- Складська книга -----------------
+    def stock_ledger_installed(self) -> bool:
+        meta = self._schema().get("product")
+        return bool(meta) and any(c["name"] == "below_min" for c in meta["columns"])
+
+    def install_stock_ledger(self, rebuild: bool = False) -> Tuple[bool, Optional[str]]:
+        # rebuild - перерахувати залишки з історії supply; інакше книга веде поточні залишки далі
+        try:
+            # нові записи inventory тригер нумерує з inventory_id_blocks
+            self.ensure_id_sequence("inventory")
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e)
+        with self.connection() as conn:
+            conn.autocommit = False
             try:
-                cur.execute("SELECT COALESCE(MAX(inventory_id),0)+1 FROM inventory")
-                start_id = cur.fetchone()[0]
-                cur.execute("SELECT product_id FROM product")
-                product_ids = [r[0] for r in cur.fetchall()]
-                if not product_ids:
-                    return False, "Відсутні продукти для FK"
-
-                used_products = set()
-                for i in range(count):
-                    inventory_id = start_id + i
-                    product_id = random.choice(product_ids)
-                    # не дублюємо inventory для одного product_id
-                    while product_id in used_products:
-                        product_id = random.choice(product_ids)
-                    used_products.add(product_id)
-                    quantity = round(random.uniform(0, 200), 2)
-                    last_updated = datetime.now() - timedelta(days=random.randint(0, 365))
-                    location = random.choice(locations)
+                with conn.cursor() as cur:
+                    _install_stock_ledger(cur)
+                    if rebuild:
+                        for statement in STOCK_LEDGER_REBUILD:
+                            cur.execute(statement)
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                return False, e.pgerror or str(e)
+        self.invalidate_schema()
+        self.invalidate_rows("product")
+        self.invalidate_rows("inventory")
+        return True, None
+
+    def uninstall_stock_ledger(self) -> Tuple[bool, Optional[str]]:
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                with conn.cursor() as cur:
+                    for statement in STOCK_LEDGER_UNINSTALL:
+                        cur.execute(statement)
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                return False, e.pgerror or str(e)
+        self.invalidate_schema()
+        self.invalidate_rows("product")
+        return True, None
+
+    # ----------------- Секціонування supply -----------------
+    def supply_partitioned(self) -> bool:
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = 'supply'::regclass")
+            return cur.fetchone()[0]
+
+    def supply_partitions(self) -> List[Dict[str, Any]]:
+        # [{"name", "from", "to", "rows"}]; у секції DEFAULT межі None
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(SUPPLY_PARTITIONS_QUERY)
+            result = []
+            for name, bound, rows in cur.fetchall():
+                lo, hi = partition_bounds(bound)
+                result.append({"name": name, "from": lo, "to": hi, "rows": rows})
+            return result
+
+    def partition_supply(self) -> Tuple[bool, Optional[str]]:
+        # Одноразова міграція: supply стає таблицею, секціонованою за місяцями supply_date.
+        # Дані копіюються в одній транзакції під ACCESS EXCLUSIVE; PK стає (supply_id, supply_date),
+        # бо ключ секціонування має входити до кожного унікального індексу. Унікальність інших
+        # колонок (document_number) зберігають guard-таблиці (SUPPLY_UNIQUE_GUARD).
+        if self.supply_partitioned():
+            return True, None
+        meta = self._schema().get("supply")
+        if meta and meta["children"]:
+            return False, "На supply посилаються інші таблиці: " + ", ".join(sorted({t for t, _, _ in meta["children"]}))
+        # тригери книги зникають разом зі старою supply і ставляться на нову в тій самій транзакції
+        ledger_installed = self.stock_ledger_installed()
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (next(iter(REPORT_VIEWS)),))
+            views_existed = cur.fetchone()[0]
+            cur.execute(SUPPLY_UNIQUE_INDEXES_QUERY)
+            unsupported = _unguardable(cur.fetchall())
+        if unsupported:
+            return False, unsupported
+        if views_existed:
+            # вітрини посилаються на стару таблицю і перебудовуються після міграції
+            ok, err = self.drop_report_views()
+            if not ok:
+                return False, err
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("LOCK TABLE supply IN ACCESS EXCLUSIVE MODE")
+                    cur.execute(SUPPLY_UNIQUE_INDEXES_QUERY)
+                    unique = cur.fetchall()
+                    refused = _unguardable(unique)
+                    if refused:
+                        raise _MigrationRefused(refused)
                     cur.execute("""
-                        INSERT INTO inventory(inventory_id, product_id, quantity, last_updated, location)
-                        VALUES (%s,%s,%s,%s,%s)
-                    """, (inventory_id, product_id, quantity, last_updated, location))
+                        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+                        WHERE i.indrelid = 'supply'::regclass AND NOT i.indisprimary
+                          AND i.indexrelid <> ALL (%s::regclass[])
+                    """, ([name for name, _, _, _ in unique],))
+                    indexes = cur.fetchall()
+                    cur.execute("""
+                        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+                        WHERE conrelid = 'supply'::regclass AND contype = 'f'
+                    """)
+                    fks = cur.fetchall()
+                    cur.execute("""
+                        SELECT pg_get_serial_sequence('supply', 'supply_id'), attidentity <> ''
+                        FROM pg_attribute WHERE attrelid = 'supply'::regclass AND attname = 'supply_id'
+                    """)
+                    sequence, identity = cur.fetchone()
+                    cur.execute("SELECT MIN(supply_date)::date, MAX(supply_date)::date FROM supply")
+                    oldest, newest = cur.fetchone()
+
+                    cur.execute("ALTER TABLE supply RENAME TO supply_legacy")
+                    cur.execute(
+                        "CREATE TABLE supply (LIKE supply_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS"
+                        + (" INCLUDING IDENTITY" if identity else "") + ") PARTITION BY RANGE (supply_date)"
+                    )
+                    cur.execute("CREATE TABLE supply_default PARTITION OF supply DEFAULT")
+                    today = date.today()
+                    for month in month_starts(oldest or today, add_months(newest or today, SUPPLY_PARTITIONING["months_ahead"])):
+                        _create_supply_partition(cur, month)
+                    cur.execute("INSERT INTO supply SELECT * FROM supply_legacy")
+                    if identity:
+                        cur.execute("SELECT setval(pg_get_serial_sequence('supply', 'supply_id'), "
+                                    "(SELECT COALESCE(MAX(supply_id), 1) FROM supply))")
+                    elif sequence:
+                        # serial-послідовність інакше зникне разом зі старою таблицею
+                        cur.execute(sql.SQL("ALTER SEQUENCE {} OWNED BY supply.supply_id").format(sql.SQL(sequence)))
+                    cur.execute("DROP TABLE supply_legacy")
+
+                    cur.execute("ALTER TABLE supply ADD PRIMARY KEY (supply_id, supply_date)")
+                    for name, definition in fks:
+                        cur.execute(sql.SQL("ALTER TABLE supply ADD CONSTRAINT {} ").format(sql.Identifier(name))
+                                    + sql.SQL(definition))
+                    for (definition,) in indexes:
+                        cur.execute(definition)
+                    for index, _, columns, types in unique:
+                        _create_supply_guard(cur, index, columns, types)
+                    if ledger_installed:
+                        # дані перенесено до створення тригерів, тож залишки не змінюються
+                        _install_stock_ledger(cur)
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                error = e.pgerror or str(e)
+            except _MigrationRefused as e:
+                conn.rollback()
+                error = str(e)
+            else:
+                error = None
+        if error is not None:
+            # вітрини повертаються на незмінену таблицю
+            if views_existed:
+                self.create_report_views()
+            return False, error
+        self.invalidate_schema()
+        self.invalidate_rows("supply")
+        if views_existed:
+            ok, err = self.create_report_views()
+            if not ok:
+                return False, err
+        return True, None
+
+    def ensure_supply_partitions(self, start: Optional[date] = None, end: Optional[date] = None,
+                                 months_ahead: Optional[int] = None) -> Tuple[bool, Optional[str]]:
+        # Місячні секції для [start, end]; типово - від поточного місяця на months_ahead вперед
+        start = start or date.today()
+        if end is None:
+            ahead = SUPPLY_PARTITIONING["months_ahead"] if months_ahead is None else months_ahead
+            end = add_months(date.today(), ahead)
+        existing = {p["from"] for p in self.supply_partitions()}
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                with conn.cursor() as cur:
+                    for month in month_starts(start, end):
+                        if month not in existing:
+                            _create_supply_partition(cur, month)
+                conn.commit()
                 return True, None
+            except psycopg2.Error as e:
+                conn.rollback()
+                return False, e.pgerror or str(e)
+
+    def detach_supply_partition(self, name: str, archive: bool = True) -> Tuple[bool, Optional[str]]:
+        # Від'єднана секція переноситься в архівну схему (archive) або видаляється
+        schema = SUPPLY_PARTITIONING["archive_schema"]
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql.SQL("ALTER TABLE supply DETACH PARTITION {}").format(sql.Identifier(name)))
+                    # рядки секції більше не в supply: їхні ключі звільняються в guard-таблицях
+                    cur.execute(SUPPLY_GUARDS_QUERY, (SUPPLY_GUARD_COMMENT,))
+                    for guard, columns in cur.fetchall():
+                        cur.execute(sql.SQL("DELETE FROM {} g USING {} p WHERE ({}) = ({})").format(
+                            sql.Identifier(guard), sql.Identifier(name),
+                            sql.SQL(", ").join(sql.Identifier("g", c) for c in columns),
+                            sql.SQL(", ").join(sql.Identifier("p", c) for c in columns)))
+                    if archive:
+                        cur.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(schema)))
+                        cur.execute(sql.SQL("ALTER TABLE {} SET SCHEMA {}").format(
+                            sql.Identifier(name), sql.Identifier(schema)))
+                    else:
+                        cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                return False, e.pgerror or str(e)
+        self.invalidate_rows("supply")
+        return True, None
+
+    def archive_supply_partitions(self, retention_months: Optional[int] = None,
+                                  archive: bool = True) -> Tuple[bool, Optional[str], List[str]]:
+        # Секції, що повністю старші за retention_months місяців від поточного
+        cutoff = add_months(date.today(), -(retention_months or SUPPLY_PARTITIONING["retention_months"]))
+        done = []
+        for p in self.supply_partitions():
+            if p["to"] is not None and p["to"] <= cutoff:
+                ok, err = self.detach_supply_partition(p["name"], archive)
+                if not ok:
+                    return False, err, done
+                done.append(p["name"])
+        return True, None, done
+
+    def _route_supply(self, newest: date) -> Tuple[bool, Optional[str]]:
+        # Генератори пишуть дати за останній рік: секції на кожен місяць, щоб рядки не йшли в DEFAULT
+        if not self.supply_partitioned():
+            return True, None
+        return self.ensure_supply_partitions(newest - timedelta(days=366), newest)
+
+    # ----------------- Генерація даних -----------------
+    def _generate(self, table: str, count: int, start_id: int, seed: Optional[int], workers: Optional[int],
+                  chunk_size: Optional[int], context: Dict[str, Any],
+                  picked: Optional[List[int]] = None) -> GenerateResult:
+        # Блоки з datagen (за потреби - у кількох процесах) потоком ідуть у COPY FROM STDIN
+        seed = datagen.resolve_seed(seed)
+        chunk_size = chunk_size or GENERATE["chunk_size"]
+        workers = workers or GENERATE["workers"]
+        blocks = datagen.plan_blocks(table, seed, start_id, count, chunk_size, picked)
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                started = time.perf_counter()
+                query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+                    sql.Identifier(table),
+                    sql.SQL(', ').join(map(sql.Identifier, datagen.COLUMNS[table]))
+                ).as_string(cur)
+                for text in datagen.render_blocks(blocks, context, workers):
+                    cur.copy_expert(query, io.StringIO(text))
+                self.invalidate_rows(table, cur=cur)
+                stats = datagen.throughput(count, time.perf_counter() - started)
+                stats["seed"] = seed
+                return True, None, stats
+            except psycopg2.Error as e:
+                return False, e.pgerror or str(e), None
+
+    def _fetch_ids(self, query: str) -> List[int]:
+        # id впорядковані, щоб однаковий seed давав однаковий вибір незалежно від фізичного порядку рядків
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query)
+            return [r[0] for r in cur.fetchall()]
+
+    def generate_suppliers(self, count: int, chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                           workers: Optional[int] = None) -> GenerateResult:
+        try:
+            start_id = self.reserve_ids("supplier", count)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e), None
+        return self._generate("supplier", count, start_id, seed, workers, chunk_size, {})
+
+    def generate_products(self, count: int, chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                          workers: Optional[int] = None) -> GenerateResult:
+        try:
+            start_id = self.reserve_ids("product", count)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e), None
+        return self._generate("product", count, start_id, seed, workers, chunk_size, {})
+
+    def generate_supplies(self, count: int, chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                          workers: Optional[int] = None, base_time: Optional[datetime] = None) -> GenerateResult:
+        try:
+            # FK: get existing supplier_ids and product_ids
+            supplier_ids = self._fetch_ids("SELECT supplier_id FROM supplier ORDER BY 1")
+            product_ids = self._fetch_ids("SELECT product_id FROM product ORDER BY 1")
+            if not supplier_ids or not product_ids:
+                return False, "Відсутні дані для FK", None
+            start_id = self.reserve_ids("supply", count)
+            base_time = base_time or datagen.default_base_time()
+            ok, err = self._route_supply(base_time.date())
+            if not ok:
+                return False, err, None
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e), None
+        context = {
+            "supplier_ids": supplier_ids,
+            "product_ids": product_ids,
+            "base_time": base_time,
+        }
+        return self._generate("supply", count, start_id, seed, workers, chunk_size, context)
+
+    def generate_inventory(self, count: int, chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                           workers: Optional[int] = None, base_time: Optional[datetime] = None) -> GenerateResult:
+        try:
+            # лише товари без запису обліку (inventory.product_id унікальний)
+            product_ids = self._fetch_ids("""
+                SELECT p.product_id FROM product p
+                WHERE NOT EXISTS (SELECT 1 FROM inventory i WHERE i.product_id = p.product_id)
+                ORDER BY 1
+            """)
+            if not product_ids:
+                return False, "Відсутні продукти для FK", None
+            seed = datagen.resolve_seed(seed)
+            # вибірка без повторень замість повторних спроб random.choice; count обмежується кількістю товарів
+            picked = datagen.sample_products(seed, product_ids, count)
+            start_id = self.reserve_ids("inventory", len(picked))
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e), None
+        context = {"base_time": base_time or datagen.default_base_time()}
+        return self._generate("inventory", len(picked), start_id, seed, workers, chunk_size, context, picked)
+
+    # ----------------- Генерація на сервері (generate_series) -----------------
+    def _generate_server(self, table: str, count: int) -> GenerateResult:
+        try:
+            # до взяття з'єднання: ensure_id_sequence бере з пулу власне
+            self.ensure_id_sequence(table)
+        except psycopg2.Error as e:
+            return False, e.pgerror or str(e), None
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                started = time.perf_counter()
+                cur.execute(SERVER_GENERATE[table], {"count": count})
+                self.invalidate_rows(table, cur=cur)
+                return True, None, datagen.throughput(cur.rowcount, time.perf_counter() - started)
+            except psycopg2.Error as e:
+                return False, e.pgerror or str(e), None
+
+    def generate_suppliers_server(self, count: int) -> GenerateResult:
+        return self._generate_server("supplier", count)
+
+    def generate_products_server(self, count: int) -> GenerateResult:
+        return self._generate_server("product", count)
+
+    def generate_supplies_server(self, count: int) -> GenerateResult:
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                cur.execute("SELECT EXISTS (SELECT 1 FROM supplier) AND EXISTS (SELECT 1 FROM product)")
+                if not cur.fetchone()[0]:
+                    return False, "Відсутні дані для FK", None
+            except psycopg2.Error as e:
+                return False, e.pgerror or str(e), None
+        ok, err = self._route_supply(date.today())
+        if not ok:
+            return False, err, None
+        return self._generate_server("supply", count)
+
+    def generate_inventory_server(self, count: int) -> GenerateResult:
+        with self.connection() as conn, conn.cursor() as cur:
+            try:
+                cur.execute("SELECT EXISTS (SELECT 1 FROM product)")
+                if not cur.fetchone()[0]:
+                    return False, "Відсутні продукти для FK", None
+            except psycopg2.Error as e:
+                return False, e.pgerror or str(e), None
+        return self._generate_server("inventory", count)
+
+    def generate_all(self, count: int, server: bool = False,
+                     seed: Optional[int] = None) -> List[Tuple[str, GenerateResult]]:
+        # supplier і product незалежні, supply та inventory залежать лише від них:
+        # кожен етап виконується паралельно на окремих з'єднаннях пулу
+        if server:
+            phases = [
+                [("supplier", self.generate_suppliers_server, (count,)),
+                 ("product", self.generate_products_server, (count,))],
+                [("supply", self.generate_supplies_server, (count,)),
+                 ("inventory", self.generate_inventory_server, (count,))],
+            ]
+        else:
+            seed = datagen.resolve_seed(seed)
+            phases = [
+                [("supplier", self.generate_suppliers, (count, None, seed)),
+                 ("product", self.generate_products, (count, None, seed))],
+                [("supply", self.generate_supplies, (count, None, seed)),
+                 ("inventory", self.generate_inventory, (count, None, seed))],
+            ]
+        results = []
+        for phase in phases:
+            results.extend(self.run_parallel(phase))
+        return results
+
+
+class UnitOfWork:
+    # Явна транзакція на одному з'єднанні пулу з проміжним COMMIT кожні commit_every операцій:
+    #
+    #   with model.unit_of_work(commit_every=500) as uow:
+    #       for row in rows:
+    #           ok, err = uow.insert("supply", row)
+    #
+    # З savepoints помилкова операція відкочується до власного SAVEPOINT і повертає (False, помилка),
+    # без них помилка прокидається винятком і відкочує все незафіксоване. Вихід без винятку
+    # фіксує залишок. Кеш рядків інвалідується після кожного COMMIT.
+    def __init__(self, model: DBModel, commit_every: Optional[int] = None, savepoints: Optional[bool] = None):
+        self.model = model
+        self.commit_every = commit_every or UNIT_OF_WORK["commit_every"]
+        self.savepoints = UNIT_OF_WORK["savepoints"] if savepoints is None else savepoints
+        self.conn = None
+        self.cur = None
+        self.done = 0
+        self.pending = 0
+        self.commits = 0
+        self.errors: List[Tuple[int, str]] = []
+        self._ops = 0
+        self._groups = 0
+        # (таблиця, ключі або None, cascade) незафіксованих змін
+        self._dirty: List[Tuple[str, Optional[List[Any]], bool]] = []
+
+    def __enter__(self) -> "UnitOfWork":
+        self.conn = self.model._checkout()
+        self.conn.autocommit = False
+        self.cur = self.conn.cursor()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+        finally:
+            # після COMMIT нічого не відкочується; після винятку - все незафіксоване
+            self.conn.rollback()
+            self.pending = 0
+            self._dirty.clear()
+            self.cur.close()
+            self.model._checkin(self.conn)
+            self.conn = self.cur = None
+
+    def commit(self):
+        # NOTIFY - у цій же транзакції: інші процеси отримають його лише разом зі змінами
+        for table, keys, cascade in self._dirty:
+            self.model._notify_invalidation(table, keys, cascade, self.cur)
+        self.conn.commit()
+        if self.pending:
+            self.commits += 1
+        self.done += self.pending
+        self.pending = 0
+        for table, keys, cascade in self._dirty:
+            self.model.invalidate_rows(table, keys, cascade, notify=False)
+        self._dirty.clear()
+
+    def execute(self, query: Any, params: Optional[Any] = None, table: Optional[str] = None,
+                keys: Optional[List[Any]] = None, cascade: bool = False) -> Tuple[bool, Optional[str]]:
+        # table/keys - що інвалідувати в кеші рядків після COMMIT (keys None - уся таблиця)
+        index = self._ops
+        self._ops += 1
+        if self.savepoints:
+            # SAVEPOINT і RELEASE ідуть одним зверненням разом з операцією
+            if not isinstance(query, sql.Composable):
+                query = sql.SQL(query)
+            query = sql.SQL("SAVEPOINT uow_op; ") + query + sql.SQL("; RELEASE SAVEPOINT uow_op")
+        try:
+            self.cur.execute(query, params)
+        except psycopg2.Error as e:
+            if not self.savepoints:
+                raise
+            self.cur.execute("ROLLBACK TO SAVEPOINT uow_op")
+            self.errors.append((index, e.pgerror or str(e)))
+            return False, e.pgerror or str(e)
+        if table is not None:
+            self._dirty.append((table, keys, cascade))
+        self.pending += 1
+        # усередині savepoint() COMMIT звільнив би точку збереження групи
+        if self.pending >= self.commit_every and not self._groups:
+            self.commit()
+        return True, None
+
+    def insert(self, table: str, data: Dict[str, Any], reserve_id: bool = False) -> Tuple[bool, Optional[str]]:
+        if reserve_id:
+            try:
+                data = self.model._with_id(table, data)
             except psycopg2.Error as e:
                 return False, e.pgerror or str(e)
+        cols = tuple(data.keys())
+        pk = self.model.primary_key(table)
+        return self.execute(_insert_sql(table, cols), [data[c] for c in cols], table,
+                            [data[pk]] if pk in data else None)
+
+    def update(self, table: str, pk: str, pk_value: Any, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        cols = tuple(data.keys())
+        keys = [pk_value, data[pk]] if pk in data else [pk_value]
+        return self.execute(_update_sql(table, pk, cols), [data[c] for c in cols] + [pk_value], table,
+                            keys, pk in data)
+
+    def delete(self, table: str, pk: str, pk_value: Any) -> Tuple[bool, Optional[str]]:
+        return self.execute(_delete_sql(table, pk), (pk_value,), table, [pk_value], True)
+
+    @contextmanager
+    def savepoint(self):
+        # Група операцій, що відкочується разом: виняток прокидається далі, транзакція лишається придатною
+        name = sql.Identifier(f"uow_group_{self._groups}")
+        self.cur.execute(sql.SQL("SAVEPOINT {}").format(name))
+        self._groups += 1
+        pending, dirty = self.pending, len(self._dirty)
+        try:
+            yield self
+        except Exception:
+            self.cur.execute(sql.SQL("ROLLBACK TO SAVEPOINT {}").format(name))
+            self.pending = pending
+            del self._dirty[dirty:]
+            raise
+        else:
+            self.cur.execute(sql.SQL("RELEASE SAVEPOINT {}").format(name))
+        finally:
+            self._groups -= 1
+
+
+_cache_log = logging.getLogger("dbmodel.cache")
+
+
+def _pool_slots() -> int:
+    # з'єднання пулу для connection(): без основного self.conn
+    return max(POOL["maxconn"] - 1, 1)
+
+
+# SQLSTATE foreign_key_violation
+_FK_VIOLATION = "23503"
+
+# Таблиці, які тригери складської книги змінюють при записі в ключову таблицю
+_LEDGER_DEPENDENTS = {"supply": ["inventory", "product"], "inventory": ["product"]}
+
+def _install_stock_ledger(cur):
+    # Тригери рівня інструкції з перехідними таблицями допустимі на корені секціонованої supply
+    channel = sql.Literal(STOCK_LEDGER["alert_channel"])
+    for statement in STOCK_LEDGER_INSTALL:
+        cur.execute(sql.SQL(statement).format(channel=channel))
+
+
+class _MigrationRefused(Exception):
+    pass
+
+
+def _unguardable(unique_indexes: List[Tuple[Any, ...]]) -> Optional[str]:
+    # Рядки SUPPLY_UNIQUE_INDEXES_QUERY, яких guard-таблиця не замінить (вирази, часткові індекси)
+    names = [name for name, simple, _, _ in unique_indexes if not simple]
+    if not names:
+        return None
+    return ("Унікальні індекси з виразами або умовою WHERE не можна зберегти на секціонованій supply: "
+            + ", ".join(names) + ". Міграцію не виконано.")
+
+
+def _create_supply_guard(cur, index: str, columns: List[str], types: List[str]):
+    # Унікальний індекс без supply_date -> guard-таблиця з PK під назвою індексу та тригери на supply
+    guard = f"{index[:48]}_guard"
+    cols = [sql.Identifier(c) for c in columns]
+    params = {
+        "guard": sql.Identifier(guard),
+        "constraint": sql.Identifier(index),
+        "comment": sql.Literal(SUPPLY_GUARD_COMMENT),
+        "columns": sql.SQL(", ").join(cols),
+        "column_defs": sql.SQL(", ").join(sql.SQL("{} {}").format(c, sql.SQL(t)) for c, t in zip(cols, types)),
+        "guard_columns": sql.SQL(", ").join(sql.Identifier("g", c) for c in columns),
+        "old_columns": sql.SQL(", ").join(sql.Identifier("o", c) for c in columns),
+        "new_columns": sql.SQL(", ").join(sql.Identifier("n", c) for c in columns),
+    }
+    for event in ("insert", "update", "delete", "truncate"):
+        params[f"{event}_trigger"] = sql.Identifier(f"{guard}_{event}")
+    for statement in SUPPLY_UNIQUE_GUARD:
+        cur.execute(sql.SQL(statement).format(**params))
+
+
+def _create_supply_partition(cur, month: date):
+    # Рядки цього місяця, що вже потрапили в DEFAULT, переносяться в нову секцію до ATTACH
+    params = {
+        "name": sql.Identifier(f"supply_p{month:%Y%m}"),
+        "lo": sql.Literal(month.isoformat()),
+        "hi": sql.Literal(add_months(month, 1).isoformat()),
+    }
+    cur.execute(SUPPLY_PARTITION_HAS_DEFAULT)
+    has_default = cur.fetchone()[0]
+    if has_default:
+        cur.execute(sql.SQL(SUPPLY_PARTITION_IN_DEFAULT).format(**params))
+    if not has_default or not cur.fetchone()[0]:
+        cur.execute(sql.SQL(SUPPLY_PARTITION_CREATE).format(**params))
+        return
+    for statement in SUPPLY_PARTITION_FROM_DEFAULT:
+        cur.execute(sql.SQL(statement).format(**params))
+
+
+@lru_cache(maxsize=256)
+def _insert_sql(table: str, cols: Tuple[str, ...]) -> sql.Composed:
+    return sql.SQL('INSERT INTO {} ({}) VALUES ({})').format(
+        sql.Identifier(table),
+        sql.SQL(', ').join(map(sql.Identifier, cols)),
+        sql.SQL(', ').join(sql.Placeholder() * len(cols))
+    )
+
+
+@lru_cache(maxsize=256)
+def _update_sql(table: str, pk: str, cols: Tuple[str, ...]) -> sql.Composed:
+    set_clause = sql.SQL(', ').join(
+        sql.Composed([sql.Identifier(c), sql.SQL(' = '), sql.Placeholder()]) for c in cols
+    )
+    return sql.SQL('UPDATE {} SET {} WHERE {} = %s').format(
+        sql.Identifier(table),
+        set_clause,
+        sql.Identifier(pk)
+    )
+
+
+@lru_cache(maxsize=256)
+def _delete_sql(table: str, pk: str) -> sql.Composed:
+    return sql.SQL('DELETE FROM {} WHERE {} = %s').format(sql.Identifier(table), sql.Identifier(pk))
+
+
+def _pages(items: Iterable[Any], page_size: int) -> Iterator[Tuple[int, List[Any]]]:
+    # (зсув першого елемента, сторінка)
+    page: List[Any] = []
+    offset = 0
+    for item in items:
+        page.append(item)
+        if len(page) >= page_size:
+            yield offset, page
+            offset += len(page)
+            page = []
+    if page:
+        yield offset, page
+
+
+def _group_by_columns(rows: List[Dict[str, Any]]) -> List[Tuple[Tuple[str, ...], List[Dict[str, Any]]]]:
+    # execute_values потребує однакового набору колонок у всіх рядках запиту
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(tuple(row.keys()), []).append(row)
+    return list(groups.items())
@@ -0,0 +1,612 @@
+# queries.py
+# SQL та допоміжні структури, спільні для DBModel (psycopg2) і AsyncDBModel (psycopg 3):
+# модуль не залежить від драйвера.
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# Метадані схеми public: одна строка на (колонка, FK); PK-позиція з pg_index.indkey.
+# Тип двічі: без модифікаторів (для приведень %s::тип, що не мають обрізати значення) і оголошений,
+# як numeric(10,2) чи character varying(100)
+SCHEMA_QUERY = """
+SELECT c.relname,
+       a.attname,
+       format_type(a.atttypid, NULL),
+       format_type(a.atttypid, a.atttypmod),
+       NOT a.attnotnull,
+       array_position(pk.indkey::int2[], a.attnum),
+       fk.parent_table,
+       fk.parent_column
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+LEFT JOIN pg_index pk ON pk.indrelid = c.oid AND pk.indisprimary
+LEFT JOIN LATERAL (
+    SELECT pc.relname AS parent_table, pa.attname AS parent_column
+    FROM pg_constraint con
+    JOIN LATERAL unnest(con.conkey, con.confkey) AS k(att, parent_att) ON k.att = a.attnum
+    JOIN pg_class pc ON pc.oid = con.confrelid
+    JOIN pg_attribute pa ON pa.attrelid = con.confrelid AND pa.attnum = k.parent_att
+    WHERE con.conrelid = c.oid AND con.contype = 'f'
+) fk ON true
+WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+ORDER BY c.relname, a.attnum;
+"""
+
+# Аналітичні звіти; {window} - необов'язковий фільтр за датою постачання
+REPORT_QUERIES = {
+    "supplier_totals": """
+        SELECT s.supplier_id, s.company_name,
+               COUNT(sp.supply_id) AS supplies_count,
+               COALESCE(SUM(sp.quantity * sp.unit_price), 0) AS total_cost
+        FROM supplier s
+        LEFT JOIN supply sp ON sp.supplier_id = s.supplier_id {window}
+        GROUP BY s.supplier_id, s.company_name
+        ORDER BY total_cost DESC
+    """,
+    "products_below_min_stock": """
+        SELECT p.product_id, p.product_name, p.min_stock,
+               COALESCE(i.quantity, 0) AS quantity,
+               p.min_stock - COALESCE(i.quantity, 0) AS shortage
+        FROM product p
+        LEFT JOIN inventory i ON i.product_id = p.product_id
+        WHERE COALESCE(i.quantity, 0) < p.min_stock
+        ORDER BY shortage DESC
+    """,
+    "category_supply_costs": """
+        SELECT p.category,
+               COUNT(*) AS supplies_count,
+               SUM(sp.quantity * sp.unit_price) AS total_cost
+        FROM supply sp
+        JOIN product p ON p.product_id = sp.product_id
+        {window}
+        GROUP BY p.category
+        ORDER BY total_cost DESC
+    """,
+    "top_products_by_supply_volume": """
+        SELECT p.product_id, p.product_name,
+               SUM(sp.quantity) AS total_quantity,
+               COUNT(*) AS supplies_count
+        FROM supply sp
+        JOIN product p ON p.product_id = sp.product_id
+        {window}
+        GROUP BY p.product_id, p.product_name
+        ORDER BY total_quantity DESC
+        LIMIT %(limit)s
+    """,
+    "last_month_supplies": """
+        SELECT sp.supply_id, sp.supply_date, sp.document_number,
+               s.company_name, p.product_name, sp.quantity, sp.unit_price
+        FROM supply sp
+        JOIN supplier s ON s.supplier_id = sp.supplier_id
+        JOIN product p ON p.product_id = sp.product_id
+        WHERE sp.supply_date >= now() - make_interval(days => %(days)s)
+        ORDER BY sp.supply_date DESC
+    """,
+}
+
+# Матеріалізовані вітрини звітів: назва -> (запит, унікальні колонки для REFRESH CONCURRENTLY,
+# колонка сортування звіту, за якою додатково будується індекс)
+REPORT_VIEWS = {
+    "mv_supplier_totals": ("""
+        SELECT s.supplier_id, s.company_name,
+               COUNT(sp.supply_id) AS supplies_count,
+               COALESCE(SUM(sp.quantity * sp.unit_price), 0) AS total_cost
+        FROM supplier s
+        LEFT JOIN supply sp ON sp.supplier_id = s.supplier_id
+        GROUP BY s.supplier_id, s.company_name
+    """, ["supplier_id"], "total_cost"),
+    "mv_products_below_min_stock": ("""
+        SELECT p.product_id, p.product_name, p.min_stock,
+               COALESCE(i.quantity, 0) AS quantity,
+               p.min_stock - COALESCE(i.quantity, 0) AS shortage
+        FROM product p
+        LEFT JOIN inventory i ON i.product_id = p.product_id
+        WHERE COALESCE(i.quantity, 0) < p.min_stock
+    """, ["product_id"], "shortage"),
+    "mv_category_supply_costs": ("""
+        SELECT p.category,
+               COUNT(*) AS supplies_count,
+               SUM(sp.quantity * sp.unit_price) AS total_cost
+        FROM supply sp
+        JOIN product p ON p.product_id = sp.product_id
+        GROUP BY p.category
+    """, ["category"], None),
+    "mv_product_supply_volume": ("""
+        SELECT p.product_id, p.product_name,
+               SUM(sp.quantity) AS total_quantity,
+               COUNT(*) AS supplies_count
+        FROM supply sp
+        JOIN product p ON p.product_id = sp.product_id
+        GROUP BY p.product_id, p.product_name
+    """, ["product_id"], "total_quantity"),
+    "mv_recent_supplies": ("""
+        SELECT sp.supply_id, sp.supply_date, sp.document_number,
+               s.company_name, p.product_name, sp.quantity, sp.unit_price
+        FROM supply sp
+        JOIN supplier s ON s.supplier_id = sp.supplier_id
+        JOIN product p ON p.product_id = sp.product_id
+        WHERE sp.supply_date >= now() - make_interval(days => {recent_days})
+    """, ["supply_id"], "supply_date"),
+}
+
+# Ті самі звіти, прочитані з вітрин
+REPORT_VIEW_QUERIES = {
+    "supplier_totals": "SELECT * FROM mv_supplier_totals ORDER BY total_cost DESC",
+    "products_below_min_stock": "SELECT * FROM mv_products_below_min_stock ORDER BY shortage DESC",
+    "category_supply_costs": "SELECT * FROM mv_category_supply_costs ORDER BY total_cost DESC",
+    "top_products_by_supply_volume":
+        "SELECT * FROM mv_product_supply_volume ORDER BY total_quantity DESC LIMIT %(limit)s",
+    "last_month_supplies": """
+        SELECT * FROM mv_recent_supplies
+        WHERE supply_date >= now() - make_interval(days => %(days)s)
+        ORDER BY supply_date DESC
+    """,
+}
+
+# Складська книга: кожен INSERT/UPDATE/DELETE у supply змінює inventory.quantity на різницю
+# в тій самій транзакції (тригери рівня оператора з таблицями переходів - один UPDATE на
+# оператор, зокрема на весь COPY). product.below_min підтримується тригерами на inventory
+# і product; частковий індекс по ньому робить звіт про нестачу пропорційним кількості таких товарів.
+STOCK_LEDGER_INSTALL = [
+    # NULL допускається: значення завжди виставляє тригер product_stock_flag
+    "ALTER TABLE product ADD COLUMN IF NOT EXISTS below_min boolean",
+    """
+    CREATE OR REPLACE FUNCTION stock_ledger_adjust(delta_product integer[], delta_qty numeric[])
+    RETURNS void LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE inventory i
+        SET quantity = i.quantity + d.qty, last_updated = now()
+        FROM unnest(delta_product, delta_qty) AS d(product_id, qty)
+        WHERE i.product_id = d.product_id AND d.qty <> 0;
+
+        IF EXISTS (SELECT 1 FROM unnest(delta_product, delta_qty) AS d(product_id, qty)
+                   WHERE d.qty <> 0
+                     AND NOT EXISTS (SELECT 1 FROM inventory i WHERE i.product_id = d.product_id)) THEN
+            -- нові записи обліку: id з діапазону inventory_id_blocks, конкурентна вставка - через ON CONFLICT
+            WITH fresh AS (
+                SELECT d.product_id, d.qty
+                FROM unnest(delta_product, delta_qty) AS d(product_id, qty)
+                WHERE d.qty <> 0
+                  AND NOT EXISTS (SELECT 1 FROM inventory x WHERE x.product_id = d.product_id)
+            ), m AS (
+                SELECT dbmodel_reserve_ids('inventory_id_blocks', (SELECT count(*) FROM fresh)) - 1 AS last
+            )
+            INSERT INTO inventory AS i (inventory_id, product_id, quantity, last_updated, location)
+            SELECT m.last + row_number() OVER (ORDER BY f.product_id), f.product_id, f.qty, now(), 'Нерозподілено'
+            FROM fresh f, m
+            ON CONFLICT (product_id) DO UPDATE
+                SET quantity = i.quantity + EXCLUDED.quantity, last_updated = now();
+        END IF;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION stock_ledger_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        ids integer[];
+        qty numeric[];
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(product_id), array_agg(q) INTO ids, qty
+            FROM (SELECT product_id, SUM(quantity) AS q FROM new_rows GROUP BY product_id) d;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT array_agg(product_id), array_agg(q) INTO ids, qty
+            FROM (SELECT product_id, -SUM(quantity) AS q FROM old_rows GROUP BY product_id) d;
+        ELSE
+            SELECT array_agg(product_id), array_agg(q) INTO ids, qty
+            FROM (SELECT product_id, SUM(quantity) AS q
+                  FROM (SELECT product_id, quantity FROM new_rows
+                        UNION ALL
+                        SELECT product_id, -quantity FROM old_rows) u
+                  GROUP BY product_id) d;
+        END IF;
+        IF ids IS NOT NULL THEN
+            PERFORM stock_ledger_adjust(ids, qty);
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION stock_flag_refresh() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        ids integer[];
+        alerts integer[];
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(DISTINCT product_id) INTO ids FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT array_agg(DISTINCT product_id) INTO ids FROM old_rows;
+        ELSE
+            SELECT array_agg(DISTINCT product_id) INTO ids
+            FROM (SELECT product_id FROM new_rows UNION SELECT product_id FROM old_rows) u;
+        END IF;
+        WITH changed AS (
+            UPDATE product p
+            SET below_min = COALESCE(i.quantity, 0) < p.min_stock
+            FROM unnest(ids) AS a(product_id)
+            LEFT JOIN inventory i ON i.product_id = a.product_id
+            WHERE p.product_id = a.product_id
+              AND p.below_min IS DISTINCT FROM (COALESCE(i.quantity, 0) < p.min_stock)
+            RETURNING p.product_id, p.below_min
+        )
+        SELECT array_agg(product_id) INTO alerts FROM changed WHERE below_min;
+        IF alerts IS NOT NULL THEN
+            PERFORM pg_notify(TG_ARGV[0], array_to_string(alerts, ','));
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION product_stock_flag() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.below_min := COALESCE((SELECT quantity FROM inventory WHERE product_id = NEW.product_id), 0)
+                         < NEW.min_stock;
+        RETURN NEW;
+    END $$
+    """,
+    "DROP TRIGGER IF EXISTS supply_stock_insert ON supply",
+    "DROP TRIGGER IF EXISTS supply_stock_update ON supply",
+    "DROP TRIGGER IF EXISTS supply_stock_delete ON supply",
+    "DROP TRIGGER IF EXISTS inventory_stock_flag_insert ON inventory",
+    "DROP TRIGGER IF EXISTS inventory_stock_flag_update ON inventory",
+    "DROP TRIGGER IF EXISTS inventory_stock_flag_delete ON inventory",
+    "DROP TRIGGER IF EXISTS product_stock_flag ON product",
+    """CREATE TRIGGER supply_stock_insert AFTER INSERT ON supply
+       REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stock_ledger_apply()""",
+    """CREATE TRIGGER supply_stock_update AFTER UPDATE ON supply
+       REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stock_ledger_apply()""",
+    """CREATE TRIGGER supply_stock_delete AFTER DELETE ON supply
+       REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION stock_ledger_apply()""",
+    """CREATE TRIGGER inventory_stock_flag_insert AFTER INSERT ON inventory
+       REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stock_flag_refresh({channel})""",
+    """CREATE TRIGGER inventory_stock_flag_update AFTER UPDATE ON inventory
+       REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stock_flag_refresh({channel})""",
+    """CREATE TRIGGER inventory_stock_flag_delete AFTER DELETE ON inventory
+       REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION stock_flag_refresh({channel})""",
+    """CREATE TRIGGER product_stock_flag BEFORE INSERT OR UPDATE OF product_id, min_stock, below_min ON product
+       FOR EACH ROW EXECUTE FUNCTION product_stock_flag()""",
+    "UPDATE product p SET below_min = COALESCE((SELECT quantity FROM inventory i WHERE i.product_id = p.product_id), 0) < p.min_stock",
+    "CREATE INDEX IF NOT EXISTS product_below_min_idx ON product (product_id) WHERE below_min",
+]
+
+STOCK_LEDGER_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS supply_stock_insert ON supply",
+    "DROP TRIGGER IF EXISTS supply_stock_update ON supply",
+    "DROP TRIGGER IF EXISTS supply_stock_delete ON supply",
+    "DROP TRIGGER IF EXISTS inventory_stock_flag_insert ON inventory",
+    "DROP TRIGGER IF EXISTS inventory_stock_flag_update ON inventory",
+    "DROP TRIGGER IF EXISTS inventory_stock_flag_delete ON inventory",
+    "DROP TRIGGER IF EXISTS product_stock_flag ON product",
+    "DROP FUNCTION IF EXISTS stock_ledger_apply()",
+    "DROP FUNCTION IF EXISTS stock_ledger_adjust(integer[], numeric[])",
+    "DROP FUNCTION IF EXISTS stock_flag_refresh()",
+    "DROP FUNCTION IF EXISTS product_stock_flag()",
+    "DROP INDEX IF EXISTS product_below_min_idx",
+    "ALTER TABLE product DROP COLUMN IF EXISTS below_min",
+]
+
+# Залишки заново з усієї історії постачань: наявні записи обліку перераховуються
+# (без постачань - 0), для товарів без запису він створюється; тригери inventory оновлюють below_min
+STOCK_LEDGER_REBUILD = [
+    """
+    UPDATE inventory i
+    SET quantity = COALESCE(s.total, 0), last_updated = now()
+    FROM inventory x
+    LEFT JOIN (SELECT product_id, SUM(quantity) AS total FROM supply GROUP BY product_id) s
+           ON s.product_id = x.product_id
+    WHERE i.inventory_id = x.inventory_id AND i.quantity IS DISTINCT FROM COALESCE(s.total, 0)
+    """,
+    """
+    SELECT stock_ledger_adjust(array_agg(product_id), array_agg(total))
+    FROM (SELECT s.product_id, SUM(s.quantity) AS total
+          FROM supply s
+          WHERE NOT EXISTS (SELECT 1 FROM inventory i WHERE i.product_id = s.product_id)
+          GROUP BY s.product_id) d
+    """,
+]
+
+# Звіт про нестачу за прапорцем below_min (частковий індекс product_below_min_idx)
+LOW_STOCK_FLAGGED_QUERY = """
+    SELECT p.product_id, p.product_name, p.min_stock,
+           COALESCE(i.quantity, 0) AS quantity,
+           p.min_stock - COALESCE(i.quantity, 0) AS shortage
+    FROM product p
+    LEFT JOIN inventory i ON i.product_id = p.product_id
+    WHERE p.below_min
+    ORDER BY shortage DESC
+"""
+
+# Ключові колонки (без INCLUDE) усіх індексів таблиць public, у порядку індексу
+INDEX_COLUMNS_QUERY = """
+SELECT t.relname, ic.relname, array_agg(a.attname ORDER BY k.ord)
+FROM pg_index i
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_class ic ON ic.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+JOIN LATERAL unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord) ON k.ord <= i.indnkeyatts
+JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+WHERE n.nspname = 'public'
+GROUP BY t.relname, ic.relname
+"""
+
+# Оцінка кількості рядків таблиць public за статистикою планувальника
+TABLE_ROWS_QUERY = """
+SELECT c.relname, GREATEST(c.reltuples, 0)::bigint
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+"""
+
+# Секції supply з межами (FOR VALUES FROM (...) TO (...) або DEFAULT) та оцінкою рядків
+SUPPLY_PARTITIONS_QUERY = """
+SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), GREATEST(c.reltuples, 0)::bigint
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'supply'::regclass
+ORDER BY c.relname
+"""
+
+# Нова місячна секція supply: {name} - ідентифікатор, {lo}/{hi} - літерали меж [lo, hi).
+# Якщо рядки місяця вже лежать у supply_default, секція створюється окремою таблицею, рядки
+# переносяться в неї і лише тоді вона приєднується (інакше ATTACH відмовить через DEFAULT)
+SUPPLY_PARTITION_CREATE = "CREATE TABLE {name} PARTITION OF supply FOR VALUES FROM ({lo}) TO ({hi})"
+SUPPLY_PARTITION_HAS_DEFAULT = "SELECT to_regclass('supply_default') IS NOT NULL"
+SUPPLY_PARTITION_IN_DEFAULT = "SELECT EXISTS (SELECT 1 FROM supply_default WHERE supply_date >= {lo} AND supply_date < {hi})"
+SUPPLY_PARTITION_FROM_DEFAULT = [
+    "CREATE TABLE {name} (LIKE supply INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+    """
+    WITH moved AS (DELETE FROM supply_default WHERE supply_date >= {lo} AND supply_date < {hi} RETURNING *)
+    INSERT INTO {name} SELECT * FROM moved
+    """,
+    "ALTER TABLE supply ATTACH PARTITION {name} FOR VALUES FROM ({lo}) TO ({hi})",
+]
+
+# Унікальні індекси supply без supply_date: на секціонованій таблиці їх не створити, тому міграція
+# переносить їх у guard-таблиці. simple - лише колонки, без виразів і WHERE
+SUPPLY_UNIQUE_INDEXES_QUERY = """
+SELECT ci.relname, i.indexprs IS NULL AND i.indpred IS NULL,
+       array_agg(a.attname ORDER BY k.ord), array_agg(format_type(a.atttypid, a.atttypmod) ORDER BY k.ord)
+FROM pg_index i
+JOIN pg_class ci ON ci.oid = i.indexrelid
+JOIN LATERAL unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord) ON true
+LEFT JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+WHERE i.indrelid = 'supply'::regclass AND i.indisunique AND NOT i.indisprimary
+GROUP BY ci.relname, i.indexprs, i.indpred
+HAVING NOT bool_or(a.attname IS NOT DISTINCT FROM 'supply_date')
+"""
+
+SUPPLY_GUARD_COMMENT = "dbmodel: supply unique guard"
+
+# Guard-таблиці з колонками їхнього PK (див. SUPPLY_UNIQUE_GUARD)
+SUPPLY_GUARDS_QUERY = """
+SELECT c.relname, array_agg(a.attname ORDER BY k.ord)
+FROM pg_class c
+JOIN pg_index i ON i.indrelid = c.oid AND i.indisprimary
+JOIN LATERAL unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord) ON true
+JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = k.attnum
+WHERE c.relnamespace = 'public'::regnamespace AND obj_description(c.oid, 'pg_class') = %s
+GROUP BY c.relname
+"""
+
+# Глобальна унікальність колонок секціонованої supply: ключі копіюються в {guard} з PK під назвою
+# вихідного обмеження, тож порушення дає ту саму помилку 23505. Тригери рівня інструкції на корені, як
+# у складської книги: переміщення рядків між секціями (прямий DML по секції) їх не запускає, а
+# UPDATE із переходом у іншу секцію потрапляє в перехідні таблиці. DETACH чистить ключі окремо.
+SUPPLY_UNIQUE_GUARD = [
+    "CREATE TABLE {guard} ({column_defs}, CONSTRAINT {constraint} PRIMARY KEY ({columns}))",
+    "COMMENT ON TABLE {guard} IS {comment}",
+    "INSERT INTO {guard} ({columns}) SELECT {columns} FROM supply WHERE ({columns}) IS NOT NULL",
+    """
+    CREATE OR REPLACE FUNCTION {guard}() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            TRUNCATE {guard};
+            RETURN NULL;
+        END IF;
+        -- UPDATE без зміни ключів (і PK) guard не чіпає; вкладений IF - old_rows є лише в UPDATE і DELETE
+        IF TG_OP = 'UPDATE' THEN
+            IF NOT EXISTS (
+                SELECT 1 FROM new_rows n
+                LEFT JOIN old_rows o ON o.supply_id = n.supply_id AND o.supply_date = n.supply_date
+                WHERE o.supply_id IS NULL OR ({old_columns}) IS DISTINCT FROM ({new_columns})
+            ) THEN
+                RETURN NULL;
+            END IF;
+        END IF;
+        IF TG_OP <> 'INSERT' THEN
+            DELETE FROM {guard} g USING old_rows o WHERE ({guard_columns}) = ({old_columns});
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            INSERT INTO {guard} ({columns})
+            SELECT {new_columns} FROM new_rows n WHERE ({new_columns}) IS NOT NULL;
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    """CREATE TRIGGER {insert_trigger} AFTER INSERT ON supply
+       REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {guard}()""",
+    """CREATE TRIGGER {update_trigger} AFTER UPDATE ON supply
+       REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {guard}()""",
+    """CREATE TRIGGER {delete_trigger} AFTER DELETE ON supply
+       REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {guard}()""",
+    "CREATE TRIGGER {truncate_trigger} AFTER TRUNCATE ON supply FOR EACH STATEMENT EXECUTE FUNCTION {guard}()",
+]
+
+# Рядок результату: словник (ROW_FORMAT "dict") або namedtuple ("tuple")
+Row = Union[Dict[str, Any], Tuple[Any, ...]]
+
+# (рядки, серверний час виконання в мс, текст EXPLAIN, помилка)
+ReportResult = Tuple[List[Row], Optional[float], str, Optional[str]]
+
+# (кількість оброблених рядків, [(індекс рядка у вхідній послідовності, помилка)])
+BatchResult = Tuple[int, List[Tuple[int, str]]]
+
+# (успіх, помилка, статистика швидкодії {"rows", "seconds", "rows_per_sec"[, "seed"]})
+GenerateResult = Tuple[bool, Optional[str], Optional[Dict[str, float]]]
+
+# (успіх, помилка, статистика {"rows", "seconds", "rows_per_sec", "bytes", "path"})
+TransferResult = Tuple[bool, Optional[str], Optional[Dict[str, Any]]]
+
+
+# Пошук за назвами: оператор term <% column (word_similarity) підтримується GIN-індексом gin_trgm_ops.
+# CONCURRENTLY - індексування мільйонів рядків не блокує запис; невдала побудова лишає
+# невалідний індекс, який перед повтором видаляється (SEARCH_INDEX_INVALID)
+SEARCH_EXTENSION = "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+SEARCH_INDEX = "CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} USING gin ({column} gin_trgm_ops)"
+SEARCH_INDEX_INVALID = "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)"
+
+
+# Резервування id діапазонами: на таблицю - послідовність {table}_id_blocks (див. id_sequence),
+# dbmodel_reserve_ids видає n послідовних id одним nextval + setval. Обидва виклики
+# нетранзакційні, тому блокування береться лише на їх час, а не до кінця транзакції викликача.
+# Встановлення - під advisory-блокуванням: конкурентні CREATE OR REPLACE FUNCTION падають
+# з "tuple concurrently updated". dbmodel_sync_ids піднімає послідовність до MAX(pk), якщо
+# рядки з'явилися в обхід неї.
+ID_BLOCKS_INSTALL = [
+    "SELECT pg_advisory_xact_lock(hashtext('dbmodel_id_blocks'))",
+    """
+    CREATE OR REPLACE FUNCTION dbmodel_reserve_ids(seq regclass, n bigint) RETURNS bigint
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        first_id bigint;
+    BEGIN
+        PERFORM pg_advisory_lock(hashtext(seq::text));
+        first_id := nextval(seq);
+        IF n > 1 THEN
+            PERFORM setval(seq, first_id + n - 1);
+        END IF;
+        PERFORM pg_advisory_unlock(hashtext(seq::text));
+        RETURN first_id;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION dbmodel_sync_ids(seq regclass, floor_id bigint) RETURNS void
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM pg_advisory_lock(hashtext(seq::text));
+        PERFORM setval(seq, GREATEST(COALESCE(pg_sequence_last_value(seq), 0), floor_id, 1));
+        PERFORM pg_advisory_unlock(hashtext(seq::text));
+    END $$
+    """,
+    "CREATE SEQUENCE IF NOT EXISTS {seq}",
+    "SELECT dbmodel_sync_ids({seq_name}, (SELECT COALESCE(MAX({pk}), 0) FROM {table}))",
+]
+
+
+def id_sequence(table: str) -> str:
+    return f"{table}_id_blocks"
+
+
+def add_months(day: date, months: int) -> date:
+    # Перше число місяця, зсунутого на months
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_starts(start: date, end: date) -> List[date]:
+    # Перші числа всіх місяців від start до end включно
+    result, month = [], add_months(start, 0)
+    while month <= end:
+        result.append(month)
+        month = add_months(month, 1)
+    return result
+
+
+def partition_bounds(bound: str) -> Tuple[Optional[date], Optional[date]]:
+    # pg_get_expr(relpartbound) -> (from, to); для DEFAULT - (None, None)
+    m = _BOUND_RE.search(bound)
+    if not m:
+        return None, None
+    return date.fromisoformat(m.group(1)[:10]), date.fromisoformat(m.group(2)[:10])
+
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+# Генерація одним INSERT ... SELECT на таблицю; розподіли значень ті самі,
+# що й у generate_* (random.choice -> елемент масиву за random(), randint -> floor(random() * n)).
+# Перший id - з dbmodel_reserve_ids у CTE (обчислюється один раз), тож потрібна послідовність
+# таблиці (ensure_id_sequence)
+SERVER_GENERATE = {
+    "supplier": """
+        WITH m AS (SELECT dbmodel_reserve_ids('supplier_id_blocks', %(count)s) AS start)
+        INSERT INTO supplier(supplier_id, company_name, contact_person, phone, email)
+        SELECT m.start + g,
+               'Компанія ' || (m.start + g),
+               (ARRAY['Іван', 'Петро', 'Ольга', 'Марія', 'Андрій'])[1 + floor(random() * 5)::int] || ' ' ||
+               (ARRAY['Іванов', 'Петренко', 'Сидоренко', 'Коваленко', 'Бондаренко'])[1 + floor(random() * 5)::int],
+               '+380' || (500000000 + floor(random() * 500000000)::bigint),
+               'user' || (m.start + g) || '@' ||
+               (ARRAY['example.ua', 'mail.ua', 'suppliers.ua'])[1 + floor(random() * 3)::int]
+        FROM m, generate_series(0, %(count)s - 1) g
+    """,
+    "product": """
+        WITH m AS (SELECT dbmodel_reserve_ids('product_id_blocks', %(count)s) AS start)
+        INSERT INTO product(product_id, product_name, unit_measure, min_stock, category)
+        SELECT m.start + g,
+               'Товар ' || (m.start + g),
+               (ARRAY['шт', 'уп', 'кг', 'л'])[1 + floor(random() * 4)::int],
+               1 + floor(random() * 100)::int,
+               (ARRAY['Комп''ютерна техніка', 'Оргтехніка', 'Канцтовари', 'Витратні матеріали'])
+                   [1 + floor(random() * 4)::int]
+        FROM m, generate_series(0, %(count)s - 1) g
+    """,
+    "supply": """
+        WITH m AS (SELECT dbmodel_reserve_ids('supply_id_blocks', %(count)s) AS start),
+             s AS (SELECT array_agg(supplier_id) AS ids FROM supplier),
+             p AS (SELECT array_agg(product_id) AS ids FROM product)
+        INSERT INTO supply(supply_id, supplier_id, product_id, supply_date, document_number, quantity, unit_price)
+        SELECT m.start + g,
+               s.ids[1 + floor(random() * cardinality(s.ids))::int],
+               p.ids[1 + floor(random() * cardinality(p.ids))::int],
+               now() - floor(random() * 366)::int * interval '1 day',
+               'ПН-' || lpad((m.start + g)::text, greatest(5, length((m.start + g)::text)), '0'),
+               round((1 + random() * 99)::numeric, 2),
+               round((10 + random() * 4990)::numeric, 2)
+        FROM m, s, p, generate_series(0, %(count)s - 1) g
+    """,
+    # product_id вибирається без повторів серед товарів, що ще не мають запису обліку
+    "inventory": """
+        WITH picked AS (
+                 SELECT product_id, row_number() OVER () AS rn
+                 FROM (SELECT p.product_id
+                       FROM product p
+                       WHERE NOT EXISTS (SELECT 1 FROM inventory i WHERE i.product_id = p.product_id)
+                       ORDER BY random()
+                       LIMIT %(count)s) free
+             ),
+             m AS (SELECT dbmodel_reserve_ids('inventory_id_blocks', (SELECT count(*) FROM picked)) - 1 AS start)
+        INSERT INTO inventory(inventory_id, product_id, quantity, last_updated, location)
+        SELECT m.start + picked.rn,
+               picked.product_id,
+               round((random() * 200)::numeric, 2),
+               now() - floor(random() * 366)::int * interval '1 day',
+               (ARRAY['Секція A, полиця 1', 'Секція A, полиця 2', 'Секція A, полиця 3',
+                      'Секція B, полиця 1', 'Секція B, полиця 2', 'Секція B, полиця 3',
+                      'Секція C, полиця 1', 'Секція C, полиця 2', 'Секція C, полиця 3',
+                      'Секція D, полиця 1', 'Секція D, полиця 2'])[1 + floor(random() * 11)::int]
+        FROM m, picked
+    """,
+}
+
+
+def build_schema(rows: Iterable[Tuple[Any, ...]]) -> Dict[str, Dict[str, Any]]:
+    # Рядки SCHEMA_QUERY -> {таблиця: {"columns", "pk", "fks", "children"}}
+    schema: Dict[str, Dict[str, Any]] = {}
+    pk_positions: Dict[str, Dict[str, int]] = {}
+    for table, column, dtype, declared_type, nullable, pk_position, parent_table, parent_column in rows:
+        meta = schema.setdefault(table, {"columns": [], "pk": [], "fks": [], "children": []})
+        if not meta["columns"] or meta["columns"][-1]["name"] != column:
+            meta["columns"].append({"name": column, "type": dtype, "declared_type": declared_type,
+                                    "nullable": nullable})
+        if pk_position is not None:
+            pk_positions.setdefault(table, {})[column] = pk_position
+        if parent_table is not None:
+            meta["fks"].append((column, parent_table, parent_column))
+    for table, positions in pk_positions.items():
+        schema[table]["pk"] = sorted(positions, key=positions.get)
+    for table, meta in schema.items():
+        for column, parent_table, parent_column in meta["fks"]:
+            if parent_table in schema:
+                schema[parent_table]["children"].append((table, column, parent_column))
+    return schema
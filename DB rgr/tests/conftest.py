@@ -0,0 +1,5 @@
+# Модулі проєкту лежать на рівень вище і імпортуються як верхньорівневі (import models)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+
+import advisor
+
+COLUMNS = {"supply": ["supply_id", "supplier_id", "product_id", "supply_date", "quantity"]}
+
+
+def seq_scan(filter_text, output=()):
+    return {"query": "q", "kind": "seq_scan", "table": "supply", "alias": "sp", "filter": filter_text,
+            "output": list(output)}
+
+
+def test_covered_by_index_prefix():
+    indexes = {"supply": [["supplier_id", "supply_date"]]}
+    assert advisor._covered(indexes, "supply", ["supplier_id"])
+    assert advisor._covered(indexes, "supply", ["supplier_id", "supply_date"])
+    assert not advisor._covered(indexes, "supply", ["supply_date"])
+    assert not advisor._covered(indexes, "product", ["product_id"])
+
+
+def test_equality_columns_lead_the_key():
+    problem = seq_scan("((sp.supply_date >= now()) AND (sp.product_id = 5))", ["sp.quantity"])
+    suggestion = advisor.suggest_index(problem, COLUMNS, {})
+    assert suggestion["columns"] == ["product_id", "supply_date"]
+    assert suggestion["include"] == ["quantity"]
+
+
+def test_no_suggestion_when_prefix_indexed():
+    problem = seq_scan("(sp.product_id = 5)")
+    assert advisor.suggest_index(problem, COLUMNS, {"supply": [["product_id", "supply_date"]]}) is None
+
+
+def test_sort_problem_keeps_direction():
+    problem = {"query": "q", "kind": "sort", "table": "supply", "sort_key": ["sp.supply_date DESC"]}
+    suggestion = advisor.suggest_index(problem, COLUMNS, {})
+    assert suggestion["columns"] == ["supply_date"]
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+np = pytest.importorskip("numpy")
+
+import analytics
+
+
+def test_concentration_equal_suppliers():
+    result = analytics.supplier_concentration(np.array([1, 2, 1, 2]), np.array([1, 1, 1, 1]),
+                                              np.array([10.0, 10.0, 10.0, 10.0]), top=1)
+    assert result["hhi"] == pytest.approx(5000)
+    assert result["gini"] == pytest.approx(0)
+    assert result["top_share"] == pytest.approx(0.5)
+
+
+def test_concentration_single_and_skewed():
+    single = analytics.supplier_concentration(np.array([3, 3]), np.array([1, 2]), np.array([5.0, 5.0]))
+    assert single["hhi"] == pytest.approx(10000)
+    skewed = analytics.supplier_concentration(np.array([1, 2]), np.array([9, 1]), np.array([1.0, 1.0]), top=1)
+    assert skewed["suppliers"].tolist() == [1, 2]
+    assert skewed["hhi"] == pytest.approx(8200)
+    assert skewed["gini"] == pytest.approx(0.4)
+
+
+def test_rolling_volume_fills_gaps():
+    days = np.array(["2026-01-01", "2026-01-01", "2026-01-04"], dtype="datetime64[D]")
+    result = analytics.rolling_volume(days, np.array([1.0, 2.0, 5.0]), window_days=2)
+    assert result["daily"].tolist() == [3.0, 0.0, 0.0, 5.0]
+    assert result["rolling"].tolist() == [3.0, 3.0, 0.0, 5.0]
+
+
+def test_moving_average_and_group_percentiles():
+    assert analytics.price_moving_average(np.array([1.0, 2.0, 3.0, 4.0]), window=2).tolist() == [1.5, 2.5, 3.5]
+    keys = np.array([1, 2, 1, 2, 1])
+    values = np.array([5.0, 1.0, 3.0, 7.0, 4.0])
+    result = analytics.group_percentiles(keys, values, [0, 50, 100])
+    assert result["groups"].tolist() == [1, 2]
+    assert result["values"][0].tolist() == np.percentile([5.0, 3.0, 4.0], [0, 50, 100]).tolist()
+    assert result["values"][1].tolist() == np.percentile([1.0, 7.0], [0, 50, 100]).tolist()
@@ -0,0 +1,53 @@
+import struct
+
+import pytest
+
+pytest.importorskip("psycopg2")
+np = pytest.importorskip("numpy")
+
+import columnar
+
+COLUMNS = [("id", columnar._INT4), ("price", columnar._NUMERIC), ("day", columnar._DATE)]
+OFFSET = len(columnar._SIGNATURE) + 8
+
+
+def copy_binary(rows):
+    # бінарний COPY: сигнатура, прапорці, довжина розширення, рядки, -1
+    out = [columnar._SIGNATURE, struct.pack(">ii", 0, 0)]
+    for row in rows:
+        out.append(struct.pack(">h", len(row)))
+        for fmt, value in row:
+            if value is None:
+                out.append(struct.pack(">i", -1))
+            elif fmt == "text":
+                data = value.encode("utf-8")
+                out.append(struct.pack(">i", len(data)) + data)
+            else:
+                out.append(struct.pack(">i", struct.calcsize(fmt)) + struct.pack(fmt, value))
+    out.append(struct.pack(">h", -1))
+    return memoryview(b"".join(out))
+
+
+def test_fixed_width_rows():
+    data = copy_binary([[(">i", 1), (">d", 9.5), (">i", 0)], [(">i", 2), (">d", 0.25), (">i", 31)]])
+    result = columnar._parse_fixed(np, data, OFFSET, COLUMNS)
+    assert result["id"].tolist() == [1, 2]
+    assert result["price"].dtype == np.float64 and result["price"].tolist() == [9.5, 0.25]
+    assert result["day"].tolist() == [np.datetime64("2000-01-01").item(), np.datetime64("2000-02-01").item()]
+
+
+def test_nulls_fall_back_to_row_parser():
+    data = copy_binary([[(">i", 1), (">d", 9.5), (">i", 0)], [(">i", 2), (">d", None), (">i", None)]])
+    assert columnar._parse_fixed(np, data, OFFSET, COLUMNS) is None
+    result = columnar._parse_rows(np, data, OFFSET, COLUMNS)
+    assert result["id"].tolist() == [1, 2]
+    assert np.isnan(result["price"][1])
+    assert np.isnat(result["day"][1])
+
+
+def test_text_columns():
+    columns = [("id", columnar._INT8), ("name", 25)]
+    data = copy_binary([[(">q", 7), ("text", "Товар")], [(">q", 8), ("text", None)]])
+    result = columnar._parse_rows(np, data, OFFSET, columns)
+    assert result["id"].tolist() == [7, 8]
+    assert result["name"].tolist() == ["Товар", None]
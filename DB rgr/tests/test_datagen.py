@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import datagen
+
+CONTEXT = {"supplier_ids": [1, 2, 3], "product_ids": [10, 20], "base_time": datetime(2026, 1, 1)}
+
+
+def render(table, seed, count, block_size, workers=1):
+    blocks = datagen.plan_blocks(table, seed, 100, count, block_size)
+    return "".join(datagen.render_blocks(blocks, CONTEXT, workers))
+
+
+def test_plan_blocks_cover_range():
+    blocks = list(datagen.plan_blocks("supply", 7, 100, 25, 10))
+    assert [(b[2], b[3], b[4]) for b in blocks] == [(0, 100, 10), (1, 110, 10), (2, 120, 5)]
+
+
+def test_same_seed_same_rows_for_any_worker_count():
+    single = render("supply", 7, 50, 8)
+    assert render("supply", 7, 50, 8, workers=2) == single
+    assert render("supply", 8, 50, 8) != single
+    lines = single.splitlines()
+    assert len(lines) == 50
+    assert [int(line.split("\t")[0]) for line in lines] == list(range(100, 150))
+
+
+def test_blocks_render_independently():
+    # блок не залежить від попередніх: порядок виконання в пулі не впливає на результат
+    blocks = list(datagen.plan_blocks("supplier", 3, 1, 30, 10))
+    together = [datagen.render_block(b, CONTEXT) for b in blocks]
+    assert [datagen.render_block(b, CONTEXT) for b in reversed(blocks)] == together[::-1]
+
+
+def test_sample_products_unique_and_deterministic():
+    ids = list(range(1, 101))
+    picked = datagen.sample_products(5, ids, 30)
+    assert len(set(picked)) == 30
+    assert picked == datagen.sample_products(5, ids, 30)
+    assert sorted(datagen.sample_products(5, ids, 500)) == ids
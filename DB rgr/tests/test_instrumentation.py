@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from instrumentation import NORMALIZE_PREFIX, normalize
+
+
+def test_literals_and_whitespace():
+    query = "SELECT *  FROM t\n WHERE a = 'it''s' AND b = 4.5 AND c = 7"
+    assert normalize(query) == "SELECT * FROM t WHERE a = ? AND b = ? AND c = ?"
+
+
+def test_values_lists_collapse_to_one_key():
+    short = normalize("INSERT INTO t (a, b) VALUES (1, 'x')")
+    many = normalize("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y'), (3, 'z')")
+    assert many == "INSERT INTO t (a, b) VALUES (...)"
+    assert normalize("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y')") == many
+    assert short == "INSERT INTO t (a, b) VALUES (?, ?)"
+
+
+def test_values_with_casts():
+    # шаблон execute_values з явними приведеннями (_values_template)
+    query = "UPDATE t SET a = v.a FROM (VALUES (1::integer, 2.5::numeric), (3::integer, 4::numeric)) AS v (id, a)"
+    assert normalize(query) == "UPDATE t SET a = v.a FROM (VALUES (...)) AS v (id, a)"
+
+
+def test_long_batch_is_normalized_by_prefix():
+    batch = "INSERT INTO t (a, b) VALUES " + ", ".join(f"({i}, 'name {i}')" for i in range(20000))
+    assert len(batch) > NORMALIZE_PREFIX
+    assert normalize(batch) == "INSERT INTO t (a, b) VALUES (...)"
+    assert normalize(batch.encode("utf-8")) == normalize(batch)
+
+
+def test_truncated_string_literal_does_not_leak():
+    query = "INSERT INTO t (a) VALUES ('" + "secret" * 1000 + "')"
+    result = normalize(query)
+    assert "secret" not in result
+    assert result.startswith("INSERT INTO t (a) VALUES (?")
+
+
+def test_key_is_bounded():
+    query = "SELECT " + ", ".join(f"col_{i}" for i in range(500)) + " FROM t"
+    assert len(normalize(query)) == 300
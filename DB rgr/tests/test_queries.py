@@ -0,0 +1,45 @@
+from datetime import date
+
+from queries import add_months, build_schema, month_starts, partition_bounds
+
+
+def test_build_schema():
+    rows = [
+        ("product", "product_id", "integer", "integer", False, 1, None, None),
+        ("product", "price", "numeric", "numeric(10,2)", True, None, None, None),
+        ("supply", "supply_id", "integer", "integer", False, 1, None, None),
+        ("supply", "supply_date", "date", "date", False, 2, None, None),
+        ("supply", "product_id", "integer", "integer", False, None, "product", "product_id"),
+    ]
+    schema = build_schema(rows)
+    assert schema["supply"]["pk"] == ["supply_id", "supply_date"]
+    assert schema["supply"]["fks"] == [("product_id", "product", "product_id")]
+    assert schema["product"]["children"] == [("supply", "product_id", "product_id")]
+    assert schema["product"]["columns"][1] == {"name": "price", "type": "numeric",
+                                               "declared_type": "numeric(10,2)", "nullable": True}
+
+
+def test_column_with_two_fks_listed_once():
+    rows = [
+        ("a", "id", "integer", "integer", False, 1, None, None),
+        ("b", "id", "integer", "integer", False, 1, None, None),
+        ("c", "ref", "integer", "integer", True, None, "a", "id"),
+        ("c", "ref", "integer", "integer", True, None, "b", "id"),
+    ]
+    schema = build_schema(rows)
+    assert [c["name"] for c in schema["c"]["columns"]] == ["ref"]
+    assert len(schema["c"]["fks"]) == 2
+
+
+def test_partition_bounds():
+    bound = "FOR VALUES FROM ('2026-03-01 00:00:00') TO ('2026-04-01 00:00:00')"
+    assert partition_bounds(bound) == (date(2026, 3, 1), date(2026, 4, 1))
+    assert partition_bounds("DEFAULT") == (None, None)
+
+
+def test_months():
+    assert add_months(date(2026, 11, 17), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+    assert month_starts(date(2026, 11, 17), date(2027, 1, 1)) == [date(2026, 11, 1), date(2026, 12, 1),
+                                                                  date(2027, 1, 1)]
+    assert month_starts(date(2026, 5, 2), date(2026, 4, 30)) == []
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+pa = pytest.importorskip("pyarrow")
+
+import transfer
+
+
+@pytest.mark.parametrize("pg_type, expected", [
+    ("numeric(10,2)", pa.decimal128(10, 2)),
+    ("numeric(5)", pa.decimal128(5, 0)),
+    ("numeric", pa.float64()),
+    ("integer", pa.int32()),
+    ("character varying(100)", pa.string()),
+    ("timestamp(3) without time zone", pa.timestamp("us")),
+    ("timestamp with time zone", pa.timestamp("us", tz="UTC")),
+    ("date", pa.date32()),
+])
+def test_arrow_type(pg_type, expected):
+    assert transfer._arrow_type(pa, pg_type) == expected
+
+
+def test_decimal_keeps_exact_values():
+    # numeric(p,s) з CSV без втрати точності (float64 дав би 0.30000000000000004)
+    from decimal import Decimal
+    column = pa.array(["0.10", "0.20"]).cast(pa.decimal128(10, 2))
+    assert sum(column.to_pylist()) == Decimal("0.30")
+
+
+def test_table_path():
+    assert transfer.table_path("out", "supply") == "out/supply.csv".replace("/", transfer.os.sep)
+    assert transfer.table_path("out", "supply", "csv", "gzip").endswith("supply.csv.gz")
+    assert transfer.table_path("out", "supply", "parquet", "zstd").endswith("supply.parquet")
@@ -0,0 +1,307 @@
+# transfer.py
+# Потокове вивантаження і завантаження таблиць через COPY ... TO STDOUT / FROM STDIN.
+# CSV іде прямо у файл (за потреби через gzip/bz2/xz); Parquet і Arrow IPC пишуться pyarrow
+# з CSV-потоку COPY порціями, тож пам'ять не залежить від розміру таблиці.
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import sql
+
+import datagen
+from config import TRANSFER
+from instrumentation import QUERY_STATS
+from queries import TransferResult
+
+FORMATS = ("csv", "parquet", "arrow")
+
+# Стиснення потоку CSV; для parquet/arrow назва кодека передається pyarrow (zstd, lz4, snappy, ...)
+STREAM_COMPRESSION = {
+    "gzip": (".gz", gzip.open),
+    "bz2": (".bz2", bz2.open),
+    "xz": (".xz", lzma.open),
+}
+
+_PRECISION_RE = re.compile(r"\(\d+\)")
+
+
+def table_path(directory: str, table: str, fmt: str = "csv", compression: Optional[str] = None) -> str:
+    name = f"{table}.{fmt}"
+    if fmt == "csv" and compression:
+        name += STREAM_COMPRESSION[compression][0]
+    return os.path.join(directory, name)
+
+
+def _open(path: str, mode: str, compression: Optional[str]):
+    if compression:
+        return STREAM_COMPRESSION[compression][1](path, mode)
+    return open(path, mode)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.csv
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Для форматів parquet/arrow потрібен pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _arrow_type(pa, pg_type: str):
+    if pg_type.startswith("numeric("):
+        precision, _, scale = pg_type[len("numeric("):-1].partition(",")
+        return pa.decimal128(int(precision), int(scale or 0))
+    return {
+        "smallint": pa.int16(),
+        "integer": pa.int32(),
+        "bigint": pa.int64(),
+        "real": pa.float32(),
+        "double precision": pa.float64(),
+        "numeric": pa.float64(),
+        "boolean": pa.bool_(),
+        "date": pa.date32(),
+        "timestamp without time zone": pa.timestamp("us"),
+        "timestamp with time zone": pa.timestamp("us", tz="UTC"),
+    }.get(_PRECISION_RE.sub("", pg_type), pa.string())
+
+
+def _select_sql(model, table: str) -> sql.Composed:
+    # timestamptz вивантажується як UTC без зсуву, незалежно від TimeZone сеансу
+    cols = []
+    for c in model.columns_info(table):
+        ident = sql.Identifier(c["name"])
+        if _PRECISION_RE.sub("", c["type"]) == "timestamp with time zone":
+            cols.append(sql.SQL("({} AT TIME ZONE 'UTC') AS {}").format(ident, ident))
+        else:
+            cols.append(ident)
+    return sql.SQL("SELECT {} FROM {}").format(sql.SQL(', ').join(cols), sql.Identifier(table))
+
+
+def _result(path: str, rows: int, started: float) -> TransferResult:
+    stats = datagen.throughput(rows, time.perf_counter() - started)
+    stats["bytes"] = os.path.getsize(path)
+    stats["path"] = path
+    return True, None, stats
+
+
+# ----------------- Вивантаження -----------------
+def _export_csv(model, table: str, path: str, compression: Optional[str]) -> int:
+    with _open(path, "wb", compression) as f, model.connection() as conn, conn.cursor() as cur:
+        query = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(_select_sql(model, table))
+        cur.copy_expert(query.as_string(cur), f)
+        return cur.rowcount
+
+
+@contextmanager
+def _columnar_writer(pa, path: str, fmt: str, schema, compression: Optional[str]):
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(path, schema, compression=compression or "snappy")
+    else:
+        writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+    try:
+        yield writer
+    finally:
+        writer.close()
+
+
+def _export_columnar(model, table: str, path: str, fmt: str, compression: Optional[str]) -> int:
+    # COPY пише CSV у канал в окремому потоці, pyarrow читає його блоками по block_size
+    pa = _pyarrow()
+    # оголошений тип: numeric(p,s) стає decimal128 без втрати точності
+    target = pa.schema([(c["name"], _arrow_type(pa, c["declared_type"])) for c in model.columns_info(table)])
+    # у CSV timestamptz без зсуву: розбираються як наївні й приводяться до UTC у кожній порції
+    parse_types = {f.name: pa.timestamp(f.type.unit) if pa.types.is_timestamp(f.type) else f.type for f in target}
+    query = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(_select_sql(model, table))
+    read_fd, write_fd = os.pipe()
+    reader, writer_end = os.fdopen(read_fd, "rb"), os.fdopen(write_fd, "wb")
+    action = QUERY_STATS.current_action()
+    failure: List[BaseException] = []
+
+    def produce():
+        try:
+            with QUERY_STATS.attach(action), model.connection() as conn, conn.cursor() as cur:
+                cur.copy_expert(query.as_string(cur), writer_end)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            try:
+                writer_end.close()
+            except OSError as e:
+                # закритий читачем канал: буфер уже нікому дочитувати
+                if not failure:
+                    failure.append(e)
+
+    thread = threading.Thread(target=produce, name=f"copy-out-{table}", daemon=True)
+    thread.start()
+    rows = 0
+    error: Optional[Exception] = None
+    cut_short = False
+    try:
+        stream = pa.csv.open_csv(
+            reader,
+            read_options=pa.csv.ReadOptions(block_size=TRANSFER["block_size"]),
+            convert_options=pa.csv.ConvertOptions(
+                column_types=parse_types, strings_can_be_null=True, quoted_strings_can_be_null=False,
+                true_values=["t"], false_values=["f"],
+            ),
+        )
+        with _columnar_writer(pa, path, fmt, target, compression) as out:
+            for batch in stream:
+                out.write_table(pa.Table.from_batches([batch]).cast(target))
+                rows += batch.num_rows
+    except Exception as e:
+        error = e
+        # виробник додає помилку до закриття каналу: якщо вона вже є, читач отримав обірваний CSV
+        cut_short = bool(failure)
+    finally:
+        # якщо читач упав, закритий канал перериває COPY у потоці-виробнику
+        reader.close()
+        thread.join()
+    if error is None or cut_short:
+        # помилка COPY - першопричина; pyarrow бачив лише порожній чи обірваний CSV
+        if failure:
+            raise failure[0]
+        if error is not None:
+            raise error
+        return rows
+    # pyarrow упав сам (приведення типу, переповнення decimal, некоректне значення); помилка
+    # виробника після цього - лише наслідок закритого каналу (BrokenPipeError, QueryCanceled)
+    if failure:
+        raise error from failure[0]
+    raise error
+
+
+def export_table(model, table: str, path: str, fmt: str = "csv",
+                 compression: Optional[str] = None) -> TransferResult:
+    started = time.perf_counter()
+    try:
+        try:
+            if fmt == "csv":
+                rows = _export_csv(model, table, path, compression)
+            else:
+                rows = _export_columnar(model, table, path, fmt, compression)
+        except BaseException:
+            # недописаний файл не повинен виглядати як готове вивантаження
+            _remove(path)
+            raise
+    except psycopg2.Error as e:
+        return False, e.pgerror or str(e), None
+    except (OSError, ValueError, RuntimeError) as e:
+        return False, str(e), None
+    return _result(path, rows, started)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def export_tables(model, tables: List[str], directory: str, fmt: str = "csv", compression: Optional[str] = None,
+                  workers: Optional[int] = None) -> List[Tuple[str, TransferResult]]:
+    # Кожна таблиця - окремий COPY на своєму з'єднанні пулу
+    os.makedirs(directory, exist_ok=True)
+    tasks = [(table, export_table, (model, table, table_path(directory, table, fmt, compression), fmt, compression))
+             for table in tables]
+    return model.run_parallel(tasks, workers or TRANSFER["workers"])
+
+
+# ----------------- Завантаження -----------------
+def _import_csv(cur, table: str, path: str, compression: Optional[str]) -> int:
+    # Колонки беруться із заголовка файлу, тож порядок колонок у файлі й таблиці може відрізнятися
+    with _open(path, "rb", compression) as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]), [])
+        if not header:
+            return 0
+        query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+            sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, header))
+        )
+        cur.copy_expert(query.as_string(cur), f)
+        return cur.rowcount
+
+
+def _columnar_batches(pa, path: str, fmt: str):
+    if fmt == "parquet":
+        yield from pa.parquet.ParquetFile(path).iter_batches(batch_size=TRANSFER["batch_rows"])
+        return
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def _import_columnar(cur, table: str, path: str, fmt: str) -> int:
+    # Кожна порція перетворюється на CSV у пам'яті й іде окремим COPY у тій самій транзакції
+    pa = _pyarrow()
+    rows = 0
+    for batch in _columnar_batches(pa, path, fmt):
+        buf = pa.BufferOutputStream()
+        pa.csv.write_csv(batch, buf, write_options=pa.csv.WriteOptions(include_header=False))
+        query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+            sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, batch.schema.names))
+        )
+        cur.copy_expert(query.as_string(cur), io.BytesIO(buf.getvalue().to_pybytes()))
+        rows += batch.num_rows
+    return rows
+
+
+def import_table(model, table: str, path: str, fmt: str = "csv",
+                 compression: Optional[str] = None) -> TransferResult:
+    # Таблиця завантажується однією транзакцією: при помилці не лишається половини файлу
+    started = time.perf_counter()
+    with model.connection() as conn:
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                # наївні часові мітки у файлі - UTC (див. _select_sql)
+                cur.execute("SET LOCAL TIME ZONE 'UTC'")
+                if fmt == "csv":
+                    rows = _import_csv(cur, table, path, compression)
+                else:
+                    rows = _import_columnar(cur, table, path, fmt)
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            return False, e.pgerror or str(e), None
+        except (OSError, ValueError, RuntimeError) as e:
+            conn.rollback()
+            return False, str(e), None
+    model.invalidate_rows(table)
+    return _result(path, rows, started)
+
+
+def import_levels(model, tables: List[str]) -> List[List[str]]:
+    # Рівні графа FK: таблиця йде після всіх своїх батьківських таблиць із tables
+    remaining = list(tables)
+    levels: List[List[str]] = []
+    while remaining:
+        level = [t for t in remaining
+                 if all(parent == t or parent not in remaining for _, parent, _ in model.foreign_keys(t))]
+        # цикл FK - решта таблиць одним рівнем
+        level = level or list(remaining)
+        levels.append(level)
+        remaining = [t for t in remaining if t not in level]
+    return levels
+
+
+def import_tables(model, tables: List[str], directory: str, fmt: str = "csv", compression: Optional[str] = None,
+                  workers: Optional[int] = None) -> List[Tuple[str, TransferResult]]:
+    # Таблиці одного рівня FK завантажуються паралельно, рівні - послідовно
+    results = []
+    for level in import_levels(model, tables):
+        tasks = [(table, import_table, (model, table, table_path(directory, table, fmt, compression), fmt, compression))
+                 for table in level]
+        results.extend(model.run_parallel(tasks, workers or TRANSFER["workers"]))
+    return results
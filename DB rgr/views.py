@@ -1,5 +1,5 @@
 # views.py
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 def print_banner():
     print("===================================")
@@ -17,6 +17,8 @@ def show_menu():
     print("7. Генерація випадкових даних")
     print("8. Складні SQL запити")
     print("9. Перевірка дочірніх записів")
+    print("10. Статистика запитів")
+    print("11. Пошук за назвою")
     print("0. Вийти")
 
 def prompt(msg: str) -> str:
@@ -26,25 +28,44 @@ def prompt_nullable(msg: str) -> Optional[str]:
     raw = input(f"{msg} (залиште пустим для NULL): ").strip()
     return raw if raw != "" else None
 
+def prompt_page_nav() -> str:
+    return input("[n] далі, [p] назад, [q] вийти: ").strip().lower()
+
 def print_tables(tables: List[str]):
     print("\nТаблиці бази:")
     for t in tables:
         print(" -", t)
 
-def print_rows(rows: List[Dict[str, Any]]):
+def _print_records(rows: List[Any]):
+    # namedtuple-рядки (ROW_FORMAT "tuple"): назви колонок один раз, далі лише значення
+    if rows and hasattr(rows[0], "_fields"):
+        print(rows[0]._fields)
+        for r in rows:
+            print(tuple(r))
+        return
+    for r in rows:
+        print(r)
+
+def print_rows(rows: List[Any]):
     if not rows:
         print("Немає записів.")
         return
     print("\nРядки таблиці:")
-    for r in rows:
-        print(r)
+    _print_records(rows)
 
-def print_row(row: Optional[Dict[str, Any]]):
+def print_row(row: Optional[Any]):
     if not row:
         print("Запис не знайдено.")
     else:
         print("\nЗапис:")
-        print(row)
+        print(row._asdict() if hasattr(row, "_asdict") else row)
+
+def show_search_results(rows: List[Any], elapsed_ms: float):
+    print(f"\nЗнайдено {len(rows)} за {elapsed_ms:.1f} ms")
+    for r in rows:
+        r = r._asdict() if hasattr(r, "_asdict") else r
+        detail = f"  ({r['detail']})" if r["detail"] else ""
+        print(f"{r['rank']:.2f}  {r['source']:<9} {r['id']:<10} {r['label']}{detail}")
 
 def show_error(msg: str):
     print(f"[ПОМИЛКА] {msg}")
@@ -55,12 +76,128 @@ def show_success(msg: str):
 def show_message(msg: str):
     print(f"[INFO] {msg}")
 
-def show_query_result(rows: List[Dict[str, Any]], exec_time_ms: Optional[float], explain: str):
+def show_query_result(rows: List[Any], exec_time_ms: Optional[float], explain: str):
     print("\n=== Результат запиту ===")
-    for r in rows:
-        print(r)
+    _print_records(rows)
     if exec_time_ms is not None:
         print(f"\nЧас виконання: {exec_time_ms:.2f} ms")
     if explain:
         print("\n--- EXPLAIN ANALYZE ---")
         print(explain)
+
+def show_throughput(report: List[Tuple[str, Dict[str, float]]]):
+    if not report:
+        return
+    print("\n=== Швидкодія генерації ===")
+    print(f"{'Таблиця':<12}{'Рядків':>12}{'Час, с':>10}{'Рядків/с':>14}")
+    for name, stats in report:
+        print(f"{name:<12}{stats['rows']:>12}{stats['seconds']:>10.2f}{stats['rows_per_sec']:>14.0f}")
+    seeds = {stats["seed"] for _, stats in report if "seed" in stats}
+    if seeds:
+        print(f"Seed: {', '.join(map(str, sorted(seeds)))}")
+
+def show_query_stats(hot_spots: List[Dict[str, Any]], actions: Dict[str, Dict[str, Any]]):
+    print("\n=== Найдорожчі запити ===")
+    if not hot_spots:
+        print("Статистики ще немає (збір вмикається INSTRUMENTATION['enabled'] у config.py).")
+    for s in hot_spots:
+        avg = s["total_ms"] / s["calls"] if s["calls"] else 0.0
+        print(f"{s['total_ms']:>10.1f} ms  {s['calls']:>6}x  avg {avg:>8.2f}  max {s['max_ms']:>8.2f}  "
+              f"rows {s['rows']:>8}  {s['query'][:100]}")
+    print("\n=== Дії меню ===")
+    for name, a in sorted(actions.items(), key=lambda kv: kv[1]["db_ms"], reverse=True):
+        per_call = a["round_trips"] / a["calls"] if a["calls"] else a["round_trips"]
+        print(f"{name:<28} викликів {a['calls']:>4}  звернень до БД {a['round_trips']:>6} "
+              f"({per_call:.1f} на виклик)  час БД {a['db_ms']:>9.1f} ms")
+
+def show_cache_stats(stats: Optional[Dict[str, Any]]):
+    print("\n=== Кеш рядків ===")
+    if stats is None:
+        print("Кеш вимкнено (ROW_CACHE у config.py).")
+        return
+    print(f"рядків {stats['size']}/{stats['maxsize']}  влучань {stats['hits']}  промахів {stats['misses']}  "
+          f"витіснень {stats['evictions']}  застарілих put {stats['stale_puts']}  hit ratio {stats['hit_ratio']:.1%}")
+
+def show_advice(report: Dict[str, Any]):
+    print("\n=== Проблемні вузли планів ===")
+    if not report["problems"]:
+        print("Seq Scan і Sort на великих таблицях не знайдено.")
+    for p in report["problems"]:
+        if p["kind"] == "seq_scan":
+            print(f"{p['query']:<40} Seq Scan {p['table']} (~{p['table_rows']} рядків)  "
+                  f"відкинуто фільтром {p['rows_removed']}  {p['filter'] or ''}")
+        else:
+            print(f"{p['query']:<40} Sort {', '.join(p['sort_key'])}  рядків {p['rows']}  "
+                  f"{p['method'] or ''} ({p['space_type'] or '-'})")
+    print("\n=== Запропоновані індекси ===")
+    if not report["suggestions"]:
+        print("Немає.")
+    for s in report["suggestions"]:
+        print(f"{s['ddl']};")
+        print(f"    для: {', '.join(s['queries'])}")
+        for h in s.get("hypothetical", []):
+            used = "використовується" if h["uses_index"] else "не використовується"
+            print(f"    hypopg {h['query']}: вартість {h['cost_before']:.0f} -> {h['cost_after']:.0f} ({used})")
+        if "hypothetical_error" in s:
+            print(f"    hypopg: {s['hypothetical_error']}")
+    if not report["hypopg"]:
+        print("(розширення hypopg не встановлене - пропозиції не перевірені гіпотетичними індексами)")
+    print("\n=== Регресії планів ===")
+    if not report["regressions"]:
+        print("Плани не змінилися.")
+    for r in report["regressions"]:
+        print(f"{r['query']}: {r['old_ms']} ms -> {r['new_ms']} ms")
+        print(f"    було:  {r['old_shape']}")
+        print(f"    стало: {r['new_shape']}")
+    for e in report["errors"]:
+        print(f"Помилка {e['query']}: {e['error']}")
+
+def show_partitions(partitions: List[Dict[str, Any]]):
+    print("\n=== Секції supply ===")
+    if not partitions:
+        print("supply не секціонована.")
+    for p in partitions:
+        bounds = f"{p['from']} .. {p['to']}" if p["from"] else "DEFAULT"
+        print(f"{p['name']:<20} {bounds:<26} ~{p['rows']} рядків")
+
+def show_analytics(result: Dict[str, Any], tail: int = 10):
+    print(f"\n=== Аналітика постачань ({result['rows']} рядків) ===")
+    if not result["rows"]:
+        return
+    print("Перцентилі ціни: " + "  ".join(f"p{p:g}={v:.2f}" for p, v in result["price_percentiles"].items()))
+    moving = result["price_moving_average"]
+    if len(moving):
+        print(f"Ковзне середнє ціни (останнє): {moving[-1]:.2f}")
+    volume = result["rolling_volume"]
+    print(f"\nОбсяг за днями (останні {tail}):")
+    for day, daily, rolling in list(zip(volume["days"], volume["daily"], volume["rolling"]))[-tail:]:
+        print(f"{day}  {daily:>12.2f}  ковзний {rolling:>12.2f}")
+    c = result["concentration"]
+    print(f"\nКонцентрація постачальників: HHI {c['hhi']:.0f}  частка ТОП {c['top_share']:.1%}  Джині {c['gini']:.3f}")
+    for supplier, total, share in list(zip(c["suppliers"], c["totals"], c["shares"]))[:tail]:
+        print(f"постачальник {supplier:<8} {total:>16.2f}  {share:>7.2%}")
+    g = result["product_price_percentiles"]
+    print(f"\nПерцентилі ціни по товарах: {len(g['groups'])} товарів")
+
+def show_load_test(report: Dict[str, Any]):
+    meta = report["meta"]
+    print(f"\n=== Навантажувальний тест: {meta['workers']} працівників ({meta['mode']}), {meta['seconds']:.1f} с ===")
+    print(f"{'Операція':<18}{'К-сть':>9}{'Оп/с':>10}{'p50, мс':>10}{'p99, мс':>10}{'Помилок':>9}"
+          f"{'40P01':>7}{'55P03':>7}{'40001':>7}")
+    for name, s in report["operations"].items():
+        print(f"{name:<18}{s['count']:>9}{s['ops_per_sec']:>10.1f}{s['p50_ms']:>10.2f}{s['p99_ms']:>10.2f}"
+              f"{s['failed']:>9}{s['deadlocks']:>7}{s['lock_timeouts']:>7}{s['serialization_failures']:>7}")
+    server = report["server"]
+    waits = server["lock_waits"]
+    print(f"\nВзаємоблокувань на сервері (pg_stat_database): {server['deadlocks']}")
+    print(f"Очікування блокувань: у середньому {waits['avg_waiting']:.2f} сеансів, максимум {waits['max_waiting']} "
+          f"({waits['samples']} вибірок)")
+    for q in waits["top_queries"]:
+        print(f"{q['samples']:>6}  {q['query'][:100]}")
+
+def show_pg_stat_diff(rows: List[Dict[str, Any]]):
+    print("\n=== pg_stat_statements: приріст від знімка ===")
+    if not rows:
+        print("Змін немає.")
+    for r in rows:
+        print(f"{r['total_ms']:>10.1f} ms  {r['calls']:>6}x  rows {r['rows']:>8}  {' '.join(r['query'].split())[:100]}")